@@ -0,0 +1,185 @@
+"""Benchmark cases for the tracing overhead, shared by the pytest-benchmark
+suite (`test_tracing_overhead.py`) and the standalone runner (`run.py`).
+
+Each case factory returns a `BenchmarkCase`, whose `fn` performs `ops`
+operations per call. Results are reported per operation.
+"""
+
+import asyncio
+import contextvars
+import dataclasses
+from typing import Callable, Optional
+
+from opentelemetry import context as context_api, trace
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+from lmnr import Laminar, TracingLevel, observe
+from lmnr.openllmetry_sdk.tracing import get_tracer
+from lmnr.openllmetry_sdk.tracing.tracing import (
+    TracerWrapper,
+    update_association_properties,
+)
+
+from harness import OTLPStubServer
+
+ASYNC_BATCH = 100
+TRACING_OFF_BATCH = 100
+GENERATOR_ITEMS = 10
+EXPORT_BATCH = 512
+
+
+@dataclasses.dataclass
+class BenchmarkCase:
+    fn: Callable[[], None]
+    ops: int = 1
+    teardown: Optional[Callable[[], None]] = None
+
+
+def observe_sync() -> BenchmarkCase:
+    @observe()
+    def foo(x, y):
+        return x + y
+
+    return BenchmarkCase(fn=lambda: foo(1, 2))
+
+
+def observe_async() -> BenchmarkCase:
+    @observe()
+    async def foo(x, y):
+        return x + y
+
+    async def batch():
+        for _ in range(ASYNC_BATCH):
+            await foo(1, 2)
+
+    loop = asyncio.new_event_loop()
+    return BenchmarkCase(
+        fn=lambda: loop.run_until_complete(batch()),
+        ops=ASYNC_BATCH,
+        teardown=loop.close,
+    )
+
+
+def observe_generator() -> BenchmarkCase:
+    @observe()
+    def foo():
+        for i in range(GENERATOR_ITEMS):
+            yield i
+
+    def consume():
+        for _ in foo():
+            pass
+
+    # The generator wrapper leaves its span attached to the context of the
+    # consumer, run each call in a fresh context so the depth doesn't grow
+    return BenchmarkCase(fn=lambda: contextvars.copy_context().run(consume))
+
+
+def observe_tracing_off() -> BenchmarkCase:
+    # the fast path of `@observe` when the span would not be recorded
+    @observe()
+    def foo(x, y):
+        return x + y
+
+    def batch():
+        with Laminar.set_tracing_level(TracingLevel.OFF):
+            for _ in range(TRACING_OFF_BATCH):
+                foo(1, 2)
+
+    return BenchmarkCase(fn=batch, ops=TRACING_OFF_BATCH)
+
+
+def start_as_current_span() -> BenchmarkCase:
+    def fn():
+        with Laminar.start_as_current_span("foo", input={"x": 1}):
+            pass
+
+    return BenchmarkCase(fn=fn)
+
+
+def set_span_output() -> BenchmarkCase:
+    span = Laminar.start_span("outer")
+    token = context_api.attach(trace.set_span_in_context(span))
+    output = {"answer": "foo", "sources": ["a", "b", "c"]}
+
+    def teardown():
+        context_api.detach(token)
+        span.end()
+
+    return BenchmarkCase(fn=lambda: Laminar.set_span_output(output), teardown=teardown)
+
+
+def span_processor_on_start(depth: int) -> Callable[[], BenchmarkCase]:
+    def factory() -> BenchmarkCase:
+        wrapper = TracerWrapper()
+        parents = []
+        ctx = context_api.get_current()
+        with get_tracer() as tracer:
+            for i in range(depth):
+                parent = tracer.start_span(f"parent_{i}", context=ctx)
+                parents.append(parent)
+                ctx = trace.set_span_in_context(parent, ctx)
+            span = tracer.start_span("child", context=ctx)
+
+        def teardown():
+            span.end()
+            for parent in reversed(parents):
+                parent.end()
+
+        return BenchmarkCase(
+            fn=lambda: wrapper._span_processor_on_start(span, ctx),
+            teardown=teardown,
+        )
+
+    factory.__name__ = f"span_processor_on_start_depth_{depth}"
+    return factory
+
+
+def association_properties_update() -> BenchmarkCase:
+    token = context_api.attach(context_api.get_current())
+    span = Laminar.start_span("outer")
+    span_token = context_api.attach(trace.set_span_in_context(span))
+
+    def teardown():
+        context_api.detach(span_token)
+        span.end()
+        context_api.detach(token)
+
+    return BenchmarkCase(
+        fn=lambda: update_association_properties({"session_id": "session"}),
+        teardown=teardown,
+    )
+
+
+def exporter_throughput() -> BenchmarkCase:
+    server = OTLPStubServer().__enter__()
+    exporter = OTLPSpanExporter(endpoint=f"{server.url}/v1/traces")
+    spans = []
+    with get_tracer() as tracer:
+        for i in range(EXPORT_BATCH):
+            span = tracer.start_span(f"span_{i}", attributes={"lmnr.span.input": "x"})
+            span.end()
+            spans.append(span)
+
+    def teardown():
+        exporter.shutdown()
+        server.__exit__()
+
+    return BenchmarkCase(
+        fn=lambda: exporter.export(spans), ops=EXPORT_BATCH, teardown=teardown
+    )
+
+
+CASES: dict[str, Callable[[], BenchmarkCase]] = {
+    "observe_sync": observe_sync,
+    "observe_async": observe_async,
+    "observe_generator": observe_generator,
+    "observe_tracing_off": observe_tracing_off,
+    "start_as_current_span": start_as_current_span,
+    "set_span_output": set_span_output,
+    "span_processor_on_start_depth_1": span_processor_on_start(1),
+    "span_processor_on_start_depth_8": span_processor_on_start(8),
+    "span_processor_on_start_depth_32": span_processor_on_start(32),
+    "association_properties_update": association_properties_update,
+    "exporter_throughput": exporter_throughput,
+}
@@ -0,0 +1,13 @@
+import pytest
+
+from harness import init_laminar, reset_state
+
+
+@pytest.fixture(scope="session", autouse=True)
+def laminar():
+    return init_laminar()
+
+
+@pytest.fixture(scope="function", autouse=True)
+def clear_state():
+    reset_state()
@@ -0,0 +1,76 @@
+"""Latency the SDK adds to each datapoint of an evaluation, measured against an
+in-process stub of the Laminar API with injected latency.
+
+Usage:
+    python benchmarks/evaluation_latency.py
+    python benchmarks/evaluation_latency.py --latency-ms 100 --datapoints 50
+
+The datapoints are evaluated one at a time with an executor that returns
+right away, so the time between two consecutive executor calls is the
+critical path of a datapoint: span handling, evaluators, and any API round
+trip the evaluation waits for. Uploads that happen in the background don't
+count, so with a pipelined pre-registration the overhead stays well below the
+injected latency.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from harness import LaminarAPIStubServer, init_laminar
+
+init_laminar()
+
+from lmnr.sdk.evaluations import Evaluation  # noqa: E402
+
+
+def run(latency_ms: float, datapoints: int) -> dict[str, float]:
+    executor_starts = []
+
+    def executor(data):
+        executor_starts.append(time.perf_counter())
+        return data
+
+    with LaminarAPIStubServer(latency_seconds=latency_ms / 1000) as server:
+        evaluation = Evaluation(
+            data=[{"data": i, "target": i} for i in range(datapoints)],
+            executor=executor,
+            evaluators={"equal": lambda output, target: int(output == target)},
+            project_api_key="benchmark_key",
+            base_url=server.host,
+            http_port=server.port,
+            concurrency_limit=1,
+        )
+        start = time.perf_counter()
+        asyncio.run(evaluation.run())
+        total = time.perf_counter() - start
+        received = len(server.received_points)
+
+    if received != 2 * datapoints:
+        raise RuntimeError(f"Expected {2 * datapoints} points, received {received}")
+    gaps = [b - a for a, b in zip(executor_starts, executor_starts[1:])]
+    return {
+        "per_datapoint_ms": statistics.median(gaps) * 1000,
+        "total_ms": total * 1000,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--datapoints", type=int, default=20)
+    args = parser.parse_args()
+
+    result = run(args.latency_ms, args.datapoints)
+    print(
+        f"\n{args.datapoints} datapoints, {args.latency_ms:.0f} ms API latency:\n"
+        f"  critical path per datapoint  {result['per_datapoint_ms']:>8.1f} ms\n"
+        f"  total                        {result['total_ms']:>8.1f} ms"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
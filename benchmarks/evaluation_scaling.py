@@ -0,0 +1,94 @@
+"""Throughput of an evaluation with a CPU-bound synchronous evaluator, in
+thread mode and in process mode with an increasing number of workers.
+
+Usage:
+    python benchmarks/evaluation_scaling.py
+    python benchmarks/evaluation_scaling.py --datapoints 64 --work 200000
+
+In thread mode the evaluator calls are serialized on the GIL, so the
+throughput stays flat. In process mode it should grow close to linearly with
+the number of workers, up to the number of CPU cores.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+
+def executor(data: int) -> int:
+    return data
+
+
+def cpu_bound_evaluator(output: int, target: int) -> int:
+    # stands in for BLEU/ROUGE, regex matching or embedding math
+    total = 0
+    for i in range(target):
+        total = (total + i * output) % 1_000_003
+    return total % 2
+
+
+def run(mode: str, workers: int, datapoints: int, work: int) -> float:
+    from harness import LaminarAPIStubServer
+
+    from lmnr.sdk.evaluations import Evaluation
+
+    with LaminarAPIStubServer() as server:
+        evaluation = Evaluation(
+            data=[{"data": i, "target": work} for i in range(datapoints)],
+            executor=executor,
+            evaluators={"cpu_bound": cpu_bound_evaluator},
+            project_api_key="benchmark_key",
+            base_url=server.host,
+            http_port=server.port,
+            concurrency_limit=max(workers * 2, 4),
+            instruments=set(),
+            executor_mode=mode,
+            workers=workers,
+        )
+        if mode == "process":
+            # start the workers before timing, spawning them takes a while
+            futures = [
+                evaluation._sync_functions_executor.submit(executor, i)
+                for i in range(workers)
+            ]
+            for future in futures:
+                future.result()
+        start = time.perf_counter()
+        asyncio.run(evaluation.run())
+        return datapoints / (time.perf_counter() - start)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datapoints", type=int, default=32)
+    parser.add_argument("--work", type=int, default=300_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # only in the main process, so that the workers set up their own tracing
+    from harness import init_laminar
+
+    init_laminar()
+
+    results = [("thread", 1, run("thread", 1, args.datapoints, args.work))]
+    workers = 1
+    while workers <= args.max_workers:
+        results.append(
+            ("process", workers, run("process", workers, args.datapoints, args.work))
+        )
+        workers *= 2
+
+    baseline = results[1][2]
+    print(f"\n{'mode':<10}{'workers':>8}{'datapoints/s':>16}{'speedup':>10}")
+    for mode, workers, throughput in results:
+        print(
+            f"{mode:<10}{workers:>8}{throughput:>16.1f}"
+            f"{throughput / baseline:>9.2f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Shared set-up for the tracing overhead benchmarks.
+
+Laminar is initialized once per process with a span processor that exports
+to an exporter that drops all spans, so that the benchmarks measure the
+overhead of the SDK itself, and not the memory growth of an in-memory
+exporter or the network.
+"""
+
+import datetime
+import gzip
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Sequence
+from unittest.mock import patch
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import (
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+
+from lmnr import Laminar
+from lmnr.openllmetry_sdk import TracerManager
+from lmnr.openllmetry_sdk.tracing.tracing import TracerWrapper
+
+
+class DroppingSpanExporter(SpanExporter):
+    def __init__(self) -> None:
+        self.exported = 0
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        self.exported += len(spans)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+_exporter: Optional[DroppingSpanExporter] = None
+
+
+def init_laminar() -> DroppingSpanExporter:
+    global _exporter
+    if _exporter is not None:
+        return _exporter
+
+    _exporter = DroppingSpanExporter()
+    processor = SimpleSpanProcessor(_exporter)
+    orig_tracermanager_init = TracerManager.init
+
+    def mock_tracermanager_init(*args, **kwargs):
+        kwargs["processor"] = processor
+        orig_tracermanager_init(*args, **kwargs)
+
+    with patch(
+        "lmnr.openllmetry_sdk.TracerManager.init",
+        side_effect=mock_tracermanager_init,
+    ):
+        Laminar.initialize(project_api_key="benchmark_key", instruments=set())
+    return _exporter
+
+
+def reset_state() -> None:
+    # span paths are kept for the lifetime of the process, clear them between
+    # rounds so that the benchmarks don't measure dict growth
+    TracerWrapper.clear()
+
+
+class OTLPStubHandler(BaseHTTPRequestHandler):
+    """Accepts OTLP/HTTP export requests, optionally after a delay."""
+
+    latency_seconds: float = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if self.latency_seconds:
+            threading.Event().wait(self.latency_seconds)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-protobuf")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LaminarAPIStubHandler(OTLPStubHandler):
+    """Accepts the evaluation requests of the Laminar API, optionally after
+    a delay. Counts the datapoints it receives.
+    """
+
+    received_points: list
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if self.latency_seconds:
+            threading.Event().wait(self.latency_seconds)
+        if self.path == "/v1/evals":
+            response = json.dumps(
+                {
+                    "id": str(uuid.uuid4()),
+                    "createdAt": datetime.datetime.now().isoformat(),
+                    "groupId": "default",
+                    "name": "benchmark",
+                    "projectId": str(uuid.uuid4()),
+                }
+            ).encode()
+        else:
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            self.received_points.extend(json.loads(body)["points"])
+            response = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+
+class OTLPStubServer:
+    """In-process HTTP server to export spans to, without leaving the host."""
+
+    handler_class = OTLPStubHandler
+
+    def __init__(self, latency_seconds: float = 0.0):
+        handler = type(
+            "Handler", (self.handler_class,), {"latency_seconds": latency_seconds}
+        )
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "OTLPStubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class LaminarAPIStubServer(OTLPStubServer):
+    """In-process HTTP server that stands in for the Laminar API in the
+    evaluation benchmarks.
+    """
+
+    handler_class = LaminarAPIStubHandler
+
+    def __init__(self, latency_seconds: float = 0.0):
+        super().__init__(latency_seconds)
+        self.received_points = []
+        self._server.RequestHandlerClass.received_points = self.received_points
+
+    @property
+    def host(self) -> str:
+        return f"http://{self._server.server_address[0]}"
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
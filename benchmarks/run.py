@@ -0,0 +1,121 @@
+"""Standalone runner for the tracing overhead benchmarks.
+
+Usage:
+    python benchmarks/run.py                # compare against baseline.json
+    python benchmarks/run.py --save         # record a new baseline
+    python benchmarks/run.py --threshold 0.5 observe_sync observe_async
+
+Exits with a non-zero status if any case is slower than its baseline by more
+than the threshold (relative, 0.25 means 25% slower). Baselines are machine
+dependent, so record them on the machine you compare on.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from harness import init_laminar, reset_state
+
+init_laminar()
+
+from cases import CASES  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+MIN_ROUND_SECONDS = 0.05
+
+
+def measure(name: str, rounds: int) -> float:
+    """Returns the best time per operation in nanoseconds. The minimum is
+    used rather than the mean or median, as it is the least affected by
+    other load on the machine.
+    """
+    reset_state()
+    case = CASES[name]()
+    try:
+        # warm up and calibrate the number of calls per round
+        number = 1
+        while True:
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                case.fn()
+            elapsed = time.perf_counter_ns() - start
+            if elapsed >= MIN_ROUND_SECONDS * 1e9:
+                break
+            number *= 2
+
+        results = []
+        for _ in range(rounds):
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                case.fn()
+            elapsed = time.perf_counter_ns() - start
+            results.append(elapsed / (number * case.ops))
+        return min(results)
+    finally:
+        if case.teardown is not None:
+            case.teardown()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cases", nargs="*", help="Cases to run. Defaults to all.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="Save a new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    names = args.cases or list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(unknown)}")
+
+    baseline = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    regressions = []
+    for name in names:
+        ns_per_op = measure(name, args.rounds)
+        results[name] = round(ns_per_op, 1)
+        line = f"{name:<40} {ns_per_op:>12.1f} ns/op"
+        if name in baseline:
+            change = ns_per_op / baseline[name] - 1
+            line += f"  ({change:+.1%} vs baseline)"
+            if change > args.threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {
+                    "metadata": {
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                    },
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+
+    if regressions:
+        print(
+            f"{len(regressions)} case(s) regressed by more than "
+            f"{args.threshold:.0%}: {', '.join(regressions)}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,15 @@
+import pytest
+
+from cases import CASES
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_tracing_overhead(benchmark, name: str):
+    case = CASES[name]()
+    # results are per call, divide by `ops` to get the time per operation
+    benchmark.extra_info["ops"] = case.ops
+    try:
+        benchmark(case.fn)
+    finally:
+        if case.teardown is not None:
+            case.teardown()
@@ -2,6 +2,8 @@ from .sdk.client.synchronous.sync_client import LaminarClient
 from .sdk.client.asynchronous.async_client import AsyncLaminarClient
 from .sdk.datasets import EvaluationDataset, LaminarDataset
 from .sdk.evaluations import evaluate
+from .sdk.executor_cache import ExecutorCache
+from .sdk.executors import InstrumentedThreadPoolExecutor
 from .sdk.laminar import Laminar
 from .sdk.types import (
     AgentOutput,
@@ -16,7 +18,7 @@ from .sdk.types import (
     TracingLevel,
 )
 from .sdk.decorators import observe
-from .sdk.types import LaminarSpanContext
+from .sdk.types import LaminarSpanContext, SpanSpec, TraceUsage
 from .openllmetry_sdk import Instruments
 from .openllmetry_sdk.tracing.attributes import Attributes
 from opentelemetry.trace import use_span
@@ -27,9 +29,11 @@ __all__ = [
     "Attributes",
     "ChatMessage",
     "EvaluationDataset",
+    "ExecutorCache",
     "FinalOutputChunkContent",
     "HumanEvaluator",
     "Instruments",
+    "InstrumentedThreadPoolExecutor",
     "Laminar",
     "LaminarClient",
     "LaminarDataset",
@@ -38,7 +42,9 @@ __all__ = [
     "PipelineRunError",
     "PipelineRunResponse",
     "RunAgentResponseChunk",
+    "SpanSpec",
     "StepChunkContent",
+    "TraceUsage",
     "TracingLevel",
     "evaluate",
     "observe",
@@ -18,6 +18,42 @@ LOG.addHandler(console_log_handler)
 EVAL_DIR = "evals"
 
 
+def load_evaluation_file(file: str) -> bool:
+    """Execute an evaluation file as a module. Returns False if the file
+    can't be loaded.
+
+    The module is named after the file, and its directory is added to
+    `sys.path`, so that worker processes (`executor_mode="process"`) can
+    import the functions defined in it by name.
+    """
+    file = os.path.abspath(file)
+    directory = os.path.dirname(file)
+    if directory not in sys.path:
+        sys.path.append(directory)
+    name = os.path.splitext(os.path.basename(file))[0]
+    try:
+        found = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        found = None
+    if found is None or found.origin is None or os.path.abspath(found.origin) != file:
+        LOG.warning(
+            f"The module name {name!r} of {file} resolves to another module,"
+            " so its functions can't be run with executor_mode='process'."
+            " Rename the file to use them."
+        )
+        name = "user_module" + file
+
+    spec = importlib.util.spec_from_file_location(name, file)
+    if spec is None or spec.loader is None:
+        LOG.error(f"Could not load module specification from {file}")
+        return False
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+
+    spec.loader.exec_module(mod)
+    return True
+
+
 async def run_evaluation(args):
     sys.path.append(os.getcwd())
 
@@ -40,19 +76,10 @@ async def run_evaluation(args):
         prep_token = PREPARE_ONLY.set(True)
         LOG.info(f"Running evaluation from {file}")
         try:
-            file = os.path.abspath(file)
-            name = "user_module" + file
-
-            spec = importlib.util.spec_from_file_location(name, file)
-            if spec is None or spec.loader is None:
-                LOG.error(f"Could not load module specification from {file}")
+            if not load_evaluation_file(file):
                 if args.fail_on_error:
                     return
                 continue
-            mod = importlib.util.module_from_spec(spec)
-            sys.modules[name] = mod
-
-            spec.loader.exec_module(mod)
             evaluation = EVALUATION_INSTANCE.get()
             if evaluation is None:
                 LOG.warning("Evaluation instance not found")
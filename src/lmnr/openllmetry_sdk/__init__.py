@@ -1,6 +1,7 @@
 import sys
 
 from typing import Optional, Set
+from opentelemetry.sdk.metrics.export import MetricExporter
 from opentelemetry.sdk.trace import SpanProcessor
 from opentelemetry.sdk.trace.export import SpanExporter
 from opentelemetry.sdk.resources import SERVICE_NAME
@@ -12,6 +13,7 @@ from lmnr.openllmetry_sdk.config import (
     is_content_tracing_enabled,
     is_tracing_enabled,
 )
+from lmnr.openllmetry_sdk.tracing.costs import PriceTable
 from lmnr.openllmetry_sdk.tracing.tracing import TracerWrapper
 from typing import Dict
 
@@ -35,6 +37,11 @@ class TracerManager:
         base_http_url: Optional[str] = None,
         project_api_key: Optional[str] = None,
         max_export_batch_size: Optional[int] = None,
+        metric_exporter: Optional[MetricExporter] = None,
+        metrics_export_interval_millis: Optional[int] = None,
+        price_table: Optional[PriceTable] = None,
+        stack_sampling_interval_seconds: Optional[float] = None,
+        event_loop_lag_threshold_seconds: Optional[float] = None,
     ) -> None:
         if not is_tracing_enabled():
             return
@@ -64,6 +71,11 @@ class TracerManager:
             base_http_url=base_http_url,
             project_api_key=project_api_key,
             max_export_batch_size=max_export_batch_size,
+            metric_exporter=metric_exporter,
+            metrics_export_interval_millis=metrics_export_interval_millis,
+            price_table=price_table,
+            stack_sampling_interval_seconds=stack_sampling_interval_seconds,
+            event_loop_lag_threshold_seconds=event_loop_lag_threshold_seconds,
         )
 
     @staticmethod
@@ -1,18 +1,33 @@
 import json
 from functools import wraps
 import logging
-import os
 import pydantic
+import time
 import types
-from typing import Any, Literal, Optional, Union
+from typing import Any, Callable, Collection, Literal, Optional, Union
 
 from opentelemetry import trace
 from opentelemetry import context as context_api
 from opentelemetry.trace import Span
 
-from lmnr.sdk.utils import get_input_from_func_args, is_method
+from lmnr.sdk.utils import get_input_from_func_args, get_param_names, is_method
+from lmnr.openllmetry_sdk.decorators.sampling import (
+    CallsiteSampler,
+    record_suppressed_call,
+)
 from lmnr.openllmetry_sdk.tracing import get_tracer
-from lmnr.openllmetry_sdk.tracing.attributes import SPAN_INPUT, SPAN_OUTPUT, SPAN_TYPE
+from lmnr.openllmetry_sdk.tracing.attributes import (
+    SPAN_INPUT,
+    SPAN_OUTPUT,
+    SPAN_TYPE,
+    TRACING_LEVEL,
+)
+from lmnr.openllmetry_sdk.tracing.profiling import (
+    ProfileKind,
+    profile_span,
+    validate_profile,
+)
+from lmnr.openllmetry_sdk.tracing.rollup import SpanRollup, get_active_rollup
 from lmnr.openllmetry_sdk.tracing.tracing import TracerWrapper
 from lmnr.openllmetry_sdk.utils.json_encoder import JSONEncoder
 from lmnr.openllmetry_sdk.config import MAX_MANUAL_SPAN_PAYLOAD_SIZE
@@ -42,14 +57,52 @@ def entity_method(
     ignore_input: bool = False,
     ignore_output: bool = False,
     span_type: Union[Literal["DEFAULT"], Literal["LLM"], Literal["TOOL"]] = "DEFAULT",
+    sample_rate: Optional[float] = None,
+    max_per_second: Optional[float] = None,
+    input_fields: Optional[Collection[str]] = None,
+    input_mapper: Optional[Callable[[dict[str, Any]], Any]] = None,
+    output_fields: Optional[Collection[str]] = None,
+    output_mapper: Optional[Callable[[Any], Any]] = None,
+    profile: Optional[ProfileKind] = None,
+    profile_sample_rate: float = 1.0,
 ):
+    validate_profile(profile)
+    input_fields = frozenset(input_fields) if input_fields is not None else None
+    sampler = (
+        CallsiteSampler(sample_rate=sample_rate, max_per_second=max_per_second)
+        if sample_rate is not None or max_per_second is not None
+        else None
+    )
+
     def decorate(fn):
+        # Everything that only depends on the function is computed once here,
+        # so that the per-call overhead is limited to the checks in the wrapper
+        span_name = name or fn.__name__
+        fn_is_method = is_method(fn)
+        fn_param_names = get_param_names(fn)
+        validate_profile(profile, fn)
+
         @wraps(fn)
         def wrap(*args, **kwargs):
-            if not TracerWrapper.verify_initialized():
+            if _should_skip_tracing():
+                return fn(*args, **kwargs)
+            rollup = get_active_rollup(span_name)
+            if rollup is not None:
+                inp = None
+                if not ignore_input and rollup.wants_input():
+                    inp = _get_input(
+                        fn,
+                        fn_is_method,
+                        fn_param_names,
+                        args,
+                        kwargs,
+                        input_fields,
+                        input_mapper,
+                    )
+                return _call_in_rollup(rollup, inp, fn, args, kwargs)
+            if sampler is not None and not sampler.should_record():
+                record_suppressed_call(span_name)
                 return fn(*args, **kwargs)
-
-            span_name = name or fn.__name__
 
             with get_tracer() as tracer:
                 span = tracer.start_span(span_name, attributes={SPAN_TYPE: span_type})
@@ -57,42 +110,36 @@ def entity_method(
                 ctx = trace.set_span_in_context(span, context_api.get_current())
                 ctx_token = context_api.attach(ctx)
 
-                try:
-                    if _should_send_prompts() and not ignore_input:
-                        inp = json_dumps(
-                            get_input_from_func_args(fn, is_method(fn), args, kwargs)
-                        )
-                        if len(inp) > MAX_MANUAL_SPAN_PAYLOAD_SIZE:
-                            span.set_attribute(
-                                SPAN_INPUT, "Laminar: input too large to record"
-                            )
-                        else:
-                            span.set_attribute(SPAN_INPUT, inp)
-                except TypeError:
-                    pass
+                if not ignore_input:
+                    _process_input(
+                        span,
+                        fn,
+                        fn_is_method,
+                        fn_param_names,
+                        args,
+                        kwargs,
+                        input_fields,
+                        input_mapper,
+                    )
 
                 try:
-                    res = fn(*args, **kwargs)
+                    if profile is None:
+                        res = fn(*args, **kwargs)
+                    else:
+                        with profile_span(span, profile, profile_sample_rate):
+                            res = fn(*args, **kwargs)
                 except Exception as e:
                     _process_exception(span, e)
                     span.end()
+                    context_api.detach(ctx_token)
                     raise e
 
                 # span will be ended in the generator
                 if isinstance(res, types.GeneratorType):
                     return _handle_generator(span, res)
 
-                try:
-                    if _should_send_prompts() and not ignore_output:
-                        output = json_dumps(res)
-                        if len(output) > MAX_MANUAL_SPAN_PAYLOAD_SIZE:
-                            span.set_attribute(
-                                SPAN_OUTPUT, "Laminar: output too large to record"
-                            )
-                        else:
-                            span.set_attribute(SPAN_OUTPUT, output)
-                except TypeError:
-                    pass
+                if not ignore_output:
+                    _process_output(span, res, output_fields, output_mapper)
 
                 span.end()
                 context_api.detach(ctx_token)
@@ -110,14 +157,51 @@ def aentity_method(
     ignore_input: bool = False,
     ignore_output: bool = False,
     span_type: Union[Literal["DEFAULT"], Literal["LLM"], Literal["TOOL"]] = "DEFAULT",
+    sample_rate: Optional[float] = None,
+    max_per_second: Optional[float] = None,
+    input_fields: Optional[Collection[str]] = None,
+    input_mapper: Optional[Callable[[dict[str, Any]], Any]] = None,
+    output_fields: Optional[Collection[str]] = None,
+    output_mapper: Optional[Callable[[Any], Any]] = None,
+    profile: Optional[ProfileKind] = None,
+    profile_sample_rate: float = 1.0,
 ):
+    validate_profile(profile)
+    input_fields = frozenset(input_fields) if input_fields is not None else None
+    sampler = (
+        CallsiteSampler(sample_rate=sample_rate, max_per_second=max_per_second)
+        if sample_rate is not None or max_per_second is not None
+        else None
+    )
+
     def decorate(fn):
+        span_name = name or fn.__name__
+        fn_is_method = is_method(fn)
+        fn_param_names = get_param_names(fn)
+        validate_profile(profile, fn, is_async=True)
+
         @wraps(fn)
         async def wrap(*args, **kwargs):
-            if not TracerWrapper.verify_initialized():
+            if _should_skip_tracing():
+                return await fn(*args, **kwargs)
+            rollup = get_active_rollup(span_name)
+            if rollup is not None:
+                inp = None
+                if not ignore_input and rollup.wants_input():
+                    inp = _get_input(
+                        fn,
+                        fn_is_method,
+                        fn_param_names,
+                        args,
+                        kwargs,
+                        input_fields,
+                        input_mapper,
+                    )
+                with rollup.measure(inp):
+                    return await fn(*args, **kwargs)
+            if sampler is not None and not sampler.should_record():
+                record_suppressed_call(span_name)
                 return await fn(*args, **kwargs)
-
-            span_name = name or fn.__name__
 
             with get_tracer() as tracer:
                 span = tracer.start_span(span_name, attributes={SPAN_TYPE: span_type})
@@ -125,42 +209,36 @@ def aentity_method(
                 ctx = trace.set_span_in_context(span, context_api.get_current())
                 ctx_token = context_api.attach(ctx)
 
-                try:
-                    if _should_send_prompts() and not ignore_input:
-                        inp = json_dumps(
-                            get_input_from_func_args(fn, is_method(fn), args, kwargs)
-                        )
-                        if len(inp) > MAX_MANUAL_SPAN_PAYLOAD_SIZE:
-                            span.set_attribute(
-                                SPAN_INPUT, "Laminar: input too large to record"
-                            )
-                        else:
-                            span.set_attribute(SPAN_INPUT, inp)
-                except TypeError:
-                    pass
+                if not ignore_input:
+                    _process_input(
+                        span,
+                        fn,
+                        fn_is_method,
+                        fn_param_names,
+                        args,
+                        kwargs,
+                        input_fields,
+                        input_mapper,
+                    )
 
                 try:
-                    res = await fn(*args, **kwargs)
+                    if profile is None:
+                        res = await fn(*args, **kwargs)
+                    else:
+                        with profile_span(span, profile, profile_sample_rate):
+                            res = await fn(*args, **kwargs)
                 except Exception as e:
                     _process_exception(span, e)
                     span.end()
+                    context_api.detach(ctx_token)
                     raise e
 
                 # span will be ended in the generator
                 if isinstance(res, types.AsyncGeneratorType):
                     return await _ahandle_generator(span, ctx_token, res)
 
-                try:
-                    if _should_send_prompts() and not ignore_output:
-                        output = json_dumps(res)
-                        if len(output) > MAX_MANUAL_SPAN_PAYLOAD_SIZE:
-                            span.set_attribute(
-                                SPAN_OUTPUT, "Laminar: output too large to record"
-                            )
-                        else:
-                            span.set_attribute(SPAN_OUTPUT, output)
-                except TypeError:
-                    pass
+                if not ignore_output:
+                    _process_output(span, res, output_fields, output_mapper)
 
                 span.end()
                 context_api.detach(ctx_token)
@@ -172,6 +250,48 @@ def aentity_method(
     return decorate
 
 
+def _call_in_rollup(rollup: SpanRollup, inp: Optional[str], fn, args, kwargs):
+    start_time = time.time_ns()
+    try:
+        res = fn(*args, **kwargs)
+    except Exception:
+        rollup.record(start_time, time.time_ns(), True, inp)
+        raise
+    # the body of a generator runs while it is consumed, so it is measured
+    # until it is exhausted
+    if isinstance(res, types.GeneratorType):
+        return _rollup_generator(rollup, inp, start_time, res)
+    if isinstance(res, types.AsyncGeneratorType):
+        return _arollup_generator(rollup, inp, start_time, res)
+    rollup.record(start_time, time.time_ns(), False, inp)
+    return res
+
+
+def _rollup_generator(rollup: SpanRollup, inp: Optional[str], start_time: int, res):
+    error = False
+    try:
+        yield from res
+    except Exception:
+        error = True
+        raise
+    finally:
+        rollup.record(start_time, time.time_ns(), error, inp)
+
+
+async def _arollup_generator(
+    rollup: SpanRollup, inp: Optional[str], start_time: int, res
+):
+    error = False
+    try:
+        async for part in res:
+            yield part
+    except Exception:
+        error = True
+        raise
+    finally:
+        rollup.record(start_time, time.time_ns(), error, inp)
+
+
 def _handle_generator(span, res):
     # for some reason the SPAN_KEY is not being set in the context of the generator, so we re-set it
     context_api.attach(trace.set_span_in_context(span))
@@ -192,10 +312,106 @@ async def _ahandle_generator(span, ctx_token, res):
     context_api.detach(ctx_token)
 
 
+def _should_skip_tracing() -> bool:
+    """Fast path check, evaluated on every call of a decorated function.
+    Returns True if the span would not be recorded anyway, i.e. tracing is
+    not initialized (or disabled with TRACELOOP_TRACING_ENABLED), the tracing
+    level in the context is OFF, or the current trace is not sampled.
+    """
+    if not TracerWrapper.verify_initialized():
+        return True
+    ctx = context_api.get_current()
+    association_properties = ctx.get("association_properties")
+    if association_properties and association_properties.get(TRACING_LEVEL) == "off":
+        return True
+    span_context = trace.get_current_span(ctx).get_span_context()
+    return span_context.is_valid and not span_context.trace_flags.sampled
+
+
 def _should_send_prompts():
-    return (
-        os.getenv("TRACELOOP_TRACE_CONTENT") or "true"
-    ).lower() == "true" or context_api.get_value("override_enable_content_tracing")
+    # `TracerWrapper.enable_content_tracing` is read from TRACELOOP_TRACE_CONTENT
+    # once at initialization, so that we don't call `os.getenv` on every span
+    return TracerWrapper.enable_content_tracing or context_api.get_value(
+        "override_enable_content_tracing"
+    )
+
+
+def _get_input(
+    fn,
+    fn_is_method: bool,
+    fn_param_names: tuple[str, ...],
+    args,
+    kwargs,
+    input_fields: Optional[Collection[str]] = None,
+    input_mapper: Optional[Callable[[dict[str, Any]], Any]] = None,
+) -> Optional[str]:
+    try:
+        if _should_send_prompts():
+            inp = get_input_from_func_args(
+                fn,
+                fn_is_method,
+                args,
+                kwargs,
+                fields=input_fields,
+                param_names=fn_param_names,
+            )
+            if input_mapper is not None:
+                inp = input_mapper(inp)
+            inp = json_dumps(inp)
+            if len(inp) > MAX_MANUAL_SPAN_PAYLOAD_SIZE:
+                return "Laminar: input too large to record"
+            return inp
+    except TypeError:
+        pass
+    except Exception as e:
+        logging.warning("Failed to map the input of %s: %s", fn.__name__, e)
+    return None
+
+
+def _process_input(
+    span: Span,
+    fn,
+    fn_is_method: bool,
+    fn_param_names: tuple[str, ...],
+    args,
+    kwargs,
+    input_fields: Optional[Collection[str]] = None,
+    input_mapper: Optional[Callable[[dict[str, Any]], Any]] = None,
+):
+    inp = _get_input(
+        fn, fn_is_method, fn_param_names, args, kwargs, input_fields, input_mapper
+    )
+    if inp is not None:
+        span.set_attribute(SPAN_INPUT, inp)
+
+
+def _process_output(
+    span: Span,
+    res: Any,
+    output_fields: Optional[Collection[str]] = None,
+    output_mapper: Optional[Callable[[Any], Any]] = None,
+):
+    try:
+        if _should_send_prompts():
+            if output_fields is not None:
+                res = _select_fields(res, output_fields)
+            if output_mapper is not None:
+                res = output_mapper(res)
+            output = json_dumps(res)
+            if len(output) > MAX_MANUAL_SPAN_PAYLOAD_SIZE:
+                span.set_attribute(SPAN_OUTPUT, "Laminar: output too large to record")
+            else:
+                span.set_attribute(SPAN_OUTPUT, output)
+    except TypeError:
+        pass
+    except Exception as e:
+        logging.warning("Failed to map the output of span %s: %s", span.name, e)
+
+
+def _select_fields(obj: Any, fields: Collection[str]) -> dict[str, Any]:
+    if isinstance(obj, dict):
+        return {k: obj[k] for k in fields if k in obj}
+    return {k: getattr(obj, k) for k in fields if hasattr(obj, k)}
 
 
 def _process_exception(span: Span, e: Exception):
@@ -0,0 +1,65 @@
+import random
+import time
+from typing import Optional
+
+from opentelemetry import trace
+
+from lmnr.openllmetry_sdk.tracing.attributes import SPAN_SUPPRESSED_CALLS
+
+
+class CallsiteSampler:
+    """Decides whether a single call of a decorated function is recorded as a
+    span. Combines probabilistic sampling (`sample_rate`) with a token bucket
+    rate limiter (`max_per_second`). One instance is created per decorated
+    function.
+
+    The token bucket is intentionally lock-free. Concurrent callers may race
+    on the bucket state, which can let through or drop a few extra calls,
+    which is acceptable for sampling purposes and much cheaper than locking.
+    """
+
+    def __init__(
+        self,
+        sample_rate: Optional[float] = None,
+        max_per_second: Optional[float] = None,
+    ):
+        if sample_rate is not None and not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if max_per_second is not None and max_per_second <= 0:
+            raise ValueError("max_per_second must be positive")
+        self._sample_rate = sample_rate
+        self._max_per_second = max_per_second
+        # allow bursts of up to one second worth of calls
+        self._capacity = max(max_per_second or 0, 1)
+        self._tokens = self._capacity
+        self._last_refill = time.monotonic()
+
+    def should_record(self) -> bool:
+        if self._sample_rate is not None and random.random() >= self._sample_rate:
+            return False
+        if self._max_per_second is None:
+            return True
+
+        now = time.monotonic()
+        tokens = min(
+            self._capacity,
+            self._tokens + (now - self._last_refill) * self._max_per_second,
+        )
+        self._last_refill = now
+        if tokens < 1:
+            self._tokens = tokens
+            return False
+        self._tokens = tokens - 1
+        return True
+
+
+def record_suppressed_call(span_name: str) -> None:
+    """Increment the count of suppressed `span_name` calls on the current span,
+    so that the totals are still visible on the parent.
+    """
+    span = trace.get_current_span()
+    if not span.is_recording():
+        return
+    key = f"{SPAN_SUPPRESSED_CALLS}.{span_name}"
+    attributes = getattr(span, "attributes", None) or {}
+    span.set_attribute(key, attributes.get(key, 0) + 1)
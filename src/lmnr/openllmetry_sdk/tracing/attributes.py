@@ -9,6 +9,33 @@ SPAN_IDS_PATH = "lmnr.span.ids_path"
 SPAN_INSTRUMENTATION_SOURCE = "lmnr.span.instrumentation_source"
 SPAN_SDK_VERSION = "lmnr.span.sdk_version"
 SPAN_LANGUAGE_VERSION = "lmnr.span.language_version"
+SPAN_SUPPRESSED_CALLS = "lmnr.span.suppressed_calls"
+SPAN_COUNTERS = "lmnr.span.counters"
+SPAN_VALUES = "lmnr.span.values"
+SPAN_PROFILE_CPU = "lmnr.span.profile.cpu"
+SPAN_PROFILE_MEMORY = "lmnr.span.profile.memory"
+SPAN_PROFILE_MEMORY_PEAK = "lmnr.span.profile.memory.peak_bytes"
+SPAN_PROFILE_STACKS = "lmnr.span.profile.stacks"
+SPAN_EVENT_LOOP_LAG_MAX = "lmnr.span.event_loop_lag.max_ms"
+SPAN_EVENT_LOOP_LAG_TOTAL = "lmnr.span.event_loop_lag.total_ms"
+# cost of the span and of all its descendants that ended before it
+SPAN_TOTAL_COST = "lmnr.span.total_cost"
+# the output was read from a cache instead of running the function
+SPAN_CACHED = "lmnr.span.cached"
+
+ROLLUP_COUNT = "lmnr.rollup.count"
+ROLLUP_ERROR_COUNT = "lmnr.rollup.error_count"
+ROLLUP_DURATION_TOTAL = "lmnr.rollup.duration_ns.total"
+ROLLUP_DURATION_MIN = "lmnr.rollup.duration_ns.min"
+ROLLUP_DURATION_MAX = "lmnr.rollup.duration_ns.max"
+ROLLUP_DURATION_P95 = "lmnr.rollup.duration_ns.p95"
+ROLLUP_SAMPLED_INPUTS = "lmnr.rollup.sampled_inputs"
+
+TRACE_USAGE_INPUT_TOKENS = "lmnr.trace.usage.input_tokens"
+TRACE_USAGE_OUTPUT_TOKENS = "lmnr.trace.usage.output_tokens"
+TRACE_USAGE_COST = "lmnr.trace.usage.cost"
+TRACE_USAGE_LLM_CALLS = "lmnr.trace.usage.llm_calls"
+TRACE_USAGE_TOOL_CALLS = "lmnr.trace.usage.tool_calls"
 
 ASSOCIATION_PROPERTIES = "lmnr.association.properties"
 SESSION_ID = "session_id"
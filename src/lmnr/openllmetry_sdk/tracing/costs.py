@@ -0,0 +1,197 @@
+import functools
+import json
+import re
+import threading
+
+from collections import OrderedDict
+from typing import Optional
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.semconv_ai import SpanAttributes
+from opentelemetry.util.types import AttributeValue
+
+from lmnr.openllmetry_sdk.utils import get_number_attribute
+from lmnr.openllmetry_sdk.tracing.attributes import SPAN_TOTAL_COST, Attributes
+
+# USD per 1M tokens. Bump the version when the prices change.
+DEFAULT_PRICE_TABLE_VERSION = "2025-06-01"
+DEFAULT_MODEL_PRICES: dict[str, tuple[float, float]] = {
+    # model: (input, output)
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4.1": (2.0, 8.0),
+    "gpt-4.1-mini": (0.4, 1.6),
+    "gpt-4.1-nano": (0.1, 0.4),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-3.5-turbo": (0.5, 1.5),
+    "o1": (15.0, 60.0),
+    "o1-mini": (1.1, 4.4),
+    "o3": (2.0, 8.0),
+    "o3-mini": (1.1, 4.4),
+    "o4-mini": (1.1, 4.4),
+    "claude-opus-4": (15.0, 75.0),
+    "claude-sonnet-4": (3.0, 15.0),
+    "claude-3-7-sonnet": (3.0, 15.0),
+    "claude-3-5-sonnet": (3.0, 15.0),
+    "claude-3-5-haiku": (0.8, 4.0),
+    "claude-3-opus": (15.0, 75.0),
+    "claude-3-haiku": (0.25, 1.25),
+    "gemini-2.5-pro": (1.25, 10.0),
+    "gemini-2.5-flash": (0.3, 2.5),
+    "gemini-2.0-flash": (0.1, 0.4),
+    "gemini-1.5-pro": (1.25, 5.0),
+    "gemini-1.5-flash": (0.075, 0.3),
+}
+
+# Parents that never end in this process, e.g. non-recording spans, leave
+# their descendants' costs behind, so the number of traces is bounded
+MAX_TRACKED_TRACES = 10000
+
+# e.g. `-2024-08-06`, `-20241022`, `-latest`, `-001`
+_MODEL_SUFFIX_RE = re.compile(r"-(\d{4}-\d{2}-\d{2}|\d{8}|latest|\d{3})$")
+
+
+class PriceTable:
+    """Per-token prices by model name. Lookups are dict lookups; names that
+    are not in the table, e.g. dated model versions, are normalized once and
+    the result is cached.
+    """
+
+    def __init__(
+        self,
+        prices: dict[str, tuple[float, float]],
+        version: Optional[str] = None,
+    ):
+        self.version = version
+        self._prices_per_million = dict(prices)
+        # stored per token, not per 1M tokens
+        self._prices = {
+            model.lower(): (input_price / 1e6, output_price / 1e6)
+            for model, (input_price, output_price) in prices.items()
+        }
+        self._lookup = functools.lru_cache(maxsize=1024)(self._lookup_uncached)
+
+    @classmethod
+    def default(cls) -> "PriceTable":
+        return cls(DEFAULT_MODEL_PRICES, version=DEFAULT_PRICE_TABLE_VERSION)
+
+    @classmethod
+    def from_file(cls, path: str) -> "PriceTable":
+        """Load a price table from a JSON file of the form
+        `{"version": "...", "prices": {"model": [input, output]}}`, with
+        prices in USD per 1M tokens.
+        """
+        with open(path) as f:
+            data = json.load(f)
+        return cls(
+            {model: tuple(prices) for model, prices in data["prices"].items()},
+            version=data.get("version"),
+        )
+
+    def with_overrides(
+        self, prices: dict[str, tuple[float, float]]
+    ) -> "PriceTable":
+        return PriceTable({**self._prices_per_million, **prices}, version=self.version)
+
+    def get(self, model: str) -> Optional[tuple[float, float]]:
+        """Price per input and output token of `model`, if known."""
+        price = self._prices.get(model)
+        if price is not None:
+            return price
+        return self._lookup(model)
+
+    def _lookup_uncached(self, model: str) -> Optional[tuple[float, float]]:
+        # e.g. `openai/gpt-4o-2024-08-06` -> `gpt-4o`
+        name = model.lower().rsplit("/", 1)[-1]
+        while True:
+            price = self._prices.get(name)
+            if price is not None:
+                return price
+            stripped = _MODEL_SUFFIX_RE.sub("", name)
+            if stripped == name:
+                return None
+            name = stripped
+
+
+class CostCalculator:
+    """Computes the cost of ended LLM spans from their model and token
+    counts, if not set already, and rolls the costs up the span tree: when a
+    span ends, `lmnr.span.total_cost` is set to its own cost plus the total
+    cost of its children that ended before it.
+
+    The costs of a trace are dropped when its local root span ends.
+    """
+
+    def __init__(self, price_table: PriceTable):
+        self.price_table = price_table
+        # trace id -> span id -> total cost of the ended children of the span
+        self._descendants_cost: OrderedDict[int, dict[int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_end(self, span: ReadableSpan) -> dict[str, AttributeValue]:
+        """Returns the attributes to add to the span."""
+        attributes = span.attributes or {}
+        cost_attributes = {}
+
+        own_cost = get_number_attribute(attributes, Attributes.TOTAL_COST.value)
+        if own_cost is None:
+            cost_attributes = self._compute_cost(attributes)
+            own_cost = cost_attributes.get(Attributes.TOTAL_COST.value)
+
+        span_context = span.get_span_context()
+        is_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            if is_root:
+                trace_costs = self._descendants_cost.pop(span_context.trace_id, {})
+            else:
+                trace_costs = self._descendants_cost.get(span_context.trace_id, {})
+            descendants_cost = trace_costs.pop(span_context.span_id, None)
+        if own_cost is None and descendants_cost is None:
+            return cost_attributes
+
+        total_cost = (own_cost or 0.0) + (descendants_cost or 0.0)
+        cost_attributes[SPAN_TOTAL_COST] = total_cost
+        if not is_root:
+            with self._lock:
+                trace_costs = self._descendants_cost.get(span_context.trace_id)
+                if trace_costs is None:
+                    trace_costs = self._descendants_cost[span_context.trace_id] = {}
+                    if len(self._descendants_cost) > MAX_TRACKED_TRACES:
+                        self._descendants_cost.popitem(last=False)
+                trace_costs[span.parent.span_id] = (
+                    trace_costs.get(span.parent.span_id, 0.0) + total_cost
+                )
+        return cost_attributes
+
+    def _compute_cost(self, attributes) -> dict[str, AttributeValue]:
+        model = attributes.get(Attributes.RESPONSE_MODEL.value) or attributes.get(
+            Attributes.REQUEST_MODEL.value
+        )
+        if not isinstance(model, str):
+            return {}
+        price = self.price_table.get(model)
+        if price is None:
+            return {}
+        input_tokens = get_number_attribute(
+            attributes,
+            Attributes.INPUT_TOKEN_COUNT.value,
+            SpanAttributes.LLM_USAGE_PROMPT_TOKENS,
+        )
+        output_tokens = get_number_attribute(
+            attributes,
+            Attributes.OUTPUT_TOKEN_COUNT.value,
+            SpanAttributes.LLM_USAGE_COMPLETION_TOKENS,
+        )
+        if input_tokens is None and output_tokens is None:
+            return {}
+        input_cost = (input_tokens or 0) * price[0]
+        output_cost = (output_tokens or 0) * price[1]
+        return {
+            Attributes.INPUT_COST.value: input_cost,
+            Attributes.OUTPUT_COST.value: output_cost,
+            Attributes.TOTAL_COST.value: input_cost + output_cost,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._descendants_cost.clear()
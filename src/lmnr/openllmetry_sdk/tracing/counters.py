@@ -0,0 +1,122 @@
+import threading
+
+from array import array
+from bisect import bisect_left
+from typing import Optional
+
+from opentelemetry.util.types import AttributeValue
+
+from lmnr.openllmetry_sdk.tracing.attributes import SPAN_COUNTERS, SPAN_VALUES
+
+# Same as the default explicit bucket boundaries of OpenTelemetry histograms
+DEFAULT_BUCKET_BOUNDS = (
+    0.0,
+    5.0,
+    10.0,
+    25.0,
+    50.0,
+    75.0,
+    100.0,
+    250.0,
+    500.0,
+    750.0,
+    1000.0,
+    2500.0,
+    5000.0,
+    7500.0,
+    10000.0,
+)
+
+
+class ValueSummary:
+    """Count, sum, min, max and histogram bucket counts of the values
+    observed under one name. The i-th bucket counts values in
+    `(bounds[i - 1], bounds[i]]`, the last one counts values above all bounds.
+    """
+
+    __slots__ = ("count", "sum", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.buckets = array("q", [0] * (len(DEFAULT_BUCKET_BOUNDS) + 1))
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.buckets[bisect_left(DEFAULT_BUCKET_BOUNDS, value)] += 1
+
+
+class SpanCounters:
+    """Counters and value summaries accumulated on one span with
+    `Laminar.count` and `Laminar.observe_value`, and set as attributes of the
+    span when it ends.
+    """
+
+    def __init__(self):
+        self.counters: dict[str, float] = {}
+        self.values: dict[str, ValueSummary] = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            summary = self.values.get(name)
+            if summary is None:
+                summary = self.values[name] = ValueSummary()
+            summary.add(value)
+
+    def to_attributes(self) -> dict[str, AttributeValue]:
+        with self._lock:
+            attributes: dict[str, AttributeValue] = {
+                f"{SPAN_COUNTERS}.{name}": value
+                for name, value in self.counters.items()
+            }
+            for name, summary in self.values.items():
+                prefix = f"{SPAN_VALUES}.{name}"
+                attributes[f"{prefix}.count"] = summary.count
+                attributes[f"{prefix}.sum"] = summary.sum
+                attributes[f"{prefix}.min"] = summary.min
+                attributes[f"{prefix}.max"] = summary.max
+                attributes[f"{prefix}.buckets"] = summary.buckets.tolist()
+                attributes[f"{prefix}.bucket_bounds"] = list(DEFAULT_BUCKET_BOUNDS)
+            return attributes
+
+
+_span_counters: dict[int, SpanCounters] = {}
+_span_counters_lock = threading.Lock()
+
+
+def get_span_counters(span_id: int) -> SpanCounters:
+    counters = _span_counters.get(span_id)
+    if counters is None:
+        with _span_counters_lock:
+            counters = _span_counters.setdefault(span_id, SpanCounters())
+    return counters
+
+
+def find_span_counters(span_id: int) -> Optional[SpanCounters]:
+    """Like `get_span_counters`, but doesn't create the counters, e.g. for
+    spans that may have ended already."""
+    return _span_counters.get(span_id)
+
+
+def pop_span_counters_attributes(span_id: int) -> dict[str, AttributeValue]:
+    """Remove the counters of an ended span and return them as attributes."""
+    counters = _span_counters.pop(span_id, None)
+    if counters is None:
+        return {}
+    return counters.to_attributes()
+
+
+def clear_span_counters() -> None:
+    _span_counters.clear()
@@ -0,0 +1,161 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+import weakref
+
+from typing import Optional
+
+from opentelemetry.sdk.trace import ReadableSpan, Span
+from opentelemetry.util.types import AttributeValue
+
+from lmnr.openllmetry_sdk.tracing.attributes import (
+    SPAN_EVENT_LOOP_LAG_MAX,
+    SPAN_EVENT_LOOP_LAG_TOTAL,
+)
+
+EVENT_LOOP_BLOCKED_EVENT = "event_loop_blocked"
+MAX_BLOCKED_STACK_DEPTH = 32
+
+
+class _SpanLag:
+    __slots__ = ("span", "max", "total")
+
+    def __init__(self, span: Span):
+        self.span = span
+        self.max = 0.0
+        self.total = 0.0
+
+
+class _LoopState:
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval_seconds: float):
+        self.loop_ref = weakref.ref(loop)
+        self.thread_id = threading.get_ident()
+        self.interval_seconds = interval_seconds
+        self.expected_beat = time.monotonic() + interval_seconds
+        self.spans: dict[int, _SpanLag] = {}
+        # set by the watchdog thread while the loop is blocked
+        self.blocked_stack: Optional[str] = None
+
+
+class LoopLagMonitor:
+    """Measures the scheduling delay of asyncio event loops with a heartbeat
+    callback, and attributes it to the spans that were open in the loop's
+    thread meanwhile: the max and total lag are set as attributes when a span
+    ends. A watchdog thread captures the stack of loops that are blocked for
+    longer than the threshold, and the stack is added as an event to the most
+    recently started open span of the loop.
+
+    A loop is monitored from the first span started while it is running.
+    """
+
+    def __init__(self, threshold_seconds: float = 0.1):
+        self.threshold_seconds = threshold_seconds
+        self.interval_seconds = threshold_seconds / 2
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._span_loops: dict[int, _LoopState] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._watchdog = threading.Thread(
+            target=self._watch, name="lmnr-loop-monitor", daemon=True
+        )
+        self._watchdog.start()
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+        with self._lock:
+            self._loops.clear()
+            self._span_loops.clear()
+
+    def on_start(self, span: Span) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._stopped.is_set():
+            return
+        with self._lock:
+            state = self._loops.get(loop)
+            if state is None:
+                state = self._loops[loop] = _LoopState(loop, self.interval_seconds)
+                loop.call_later(self.interval_seconds, self._heartbeat, state)
+            span_id = span.get_span_context().span_id
+            state.spans[span_id] = _SpanLag(span)
+            self._span_loops[span_id] = state
+
+    def on_end(self, span: ReadableSpan) -> dict[str, AttributeValue]:
+        """Returns the attributes to add to the span."""
+        span_id = span.get_span_context().span_id
+        with self._lock:
+            state = self._span_loops.pop(span_id, None)
+            if state is None:
+                return {}
+            span_lag = state.spans.pop(span_id)
+        return {
+            SPAN_EVENT_LOOP_LAG_MAX: span_lag.max * 1000,
+            SPAN_EVENT_LOOP_LAG_TOTAL: span_lag.total * 1000,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            for state in self._loops.values():
+                state.spans.clear()
+            self._span_loops.clear()
+
+    def _heartbeat(self, state: _LoopState) -> None:
+        if self._stopped.is_set():
+            return
+        now = time.monotonic()
+        lag = max(now - state.expected_beat, 0.0)
+        with self._lock:
+            blocked_stack, state.blocked_stack = state.blocked_stack, None
+            span_lags = list(state.spans.values())
+        for span_lag in span_lags:
+            span_lag.total += lag
+            if lag > span_lag.max:
+                span_lag.max = lag
+        if blocked_stack is not None and span_lags:
+            span_lags[-1].span.add_event(
+                EVENT_LOOP_BLOCKED_EVENT,
+                {"duration_ms": lag * 1000, "stack": blocked_stack},
+            )
+
+        state.expected_beat = now + state.interval_seconds
+        loop = state.loop_ref()
+        if loop is not None and not loop.is_closed():
+            loop.call_later(state.interval_seconds, self._heartbeat, state)
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            now = time.monotonic()
+            with self._lock:
+                blocked = [
+                    (state, state.expected_beat)
+                    for loop, state in self._loops.items()
+                    if loop.is_running()
+                    and state.blocked_stack is None
+                    and now - state.expected_beat > self.threshold_seconds
+                ]
+            if not blocked:
+                continue
+            frames = sys._current_frames()
+            for state, expected_beat in blocked:
+                frame = frames.get(state.thread_id)
+                if frame is None:
+                    continue
+                stack = "".join(
+                    traceback.format_stack(frame, limit=MAX_BLOCKED_STACK_DEPTH)
+                )
+                with self._lock:
+                    # skip if the heartbeat has run meanwhile
+                    if state.expected_beat == expected_beat:
+                        state.blocked_stack = stack
@@ -0,0 +1,148 @@
+from typing import Optional
+
+from opentelemetry.context import Context
+from opentelemetry.metrics import Meter
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.semconv_ai import SpanAttributes
+from opentelemetry.trace import StatusCode
+from opentelemetry.util.types import AttributeValue
+
+from lmnr.openllmetry_sdk.utils import get_number_attribute
+from lmnr.openllmetry_sdk.tracing.attributes import (
+    ASSOCIATION_PROPERTIES,
+    SESSION_ID,
+    SPAN_TYPE,
+    USER_ID,
+    Attributes,
+)
+
+TOKEN_USAGE_METRIC = "gen_ai.client.token.usage"
+OPERATION_DURATION_METRIC = "gen_ai.client.operation.duration"
+COST_METRIC = "lmnr.llm.cost"
+
+# Association properties that are unique per session or user, or set freely
+# by the user, would make the number of metric streams unbounded, so they are
+# not used for grouping
+_EXCLUDED_ASSOCIATION_PROPERTIES = {
+    f"{ASSOCIATION_PROPERTIES}.{SESSION_ID}",
+    f"{ASSOCIATION_PROPERTIES}.{USER_ID}",
+}
+_EXCLUDED_ASSOCIATION_PROPERTIES_PREFIX = f"{ASSOCIATION_PROPERTIES}.metadata."
+
+
+class LLMMetricsSpanProcessor(SpanProcessor):
+    """Derives token usage, cost and latency metrics from ended LLM spans.
+
+    The metrics are grouped by provider, model and association properties
+    (except session id, user id and metadata), so that dashboards can read
+    the aggregates instead of scanning every span. Failed calls are also
+    grouped by the type of the exception.
+    """
+
+    def __init__(self, meter: Meter):
+        self._token_usage = meter.create_histogram(
+            TOKEN_USAGE_METRIC,
+            unit="{token}",
+            description="Number of input and output tokens used",
+        )
+        self._duration = meter.create_histogram(
+            OPERATION_DURATION_METRIC,
+            unit="s",
+            description="Duration of LLM calls",
+        )
+        self._cost = meter.create_counter(
+            COST_METRIC,
+            unit="USD",
+            description="Cost of LLM calls",
+        )
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None):
+        pass
+
+    def on_end(self, span: ReadableSpan):
+        attributes = span.attributes or {}
+        if not is_llm_span(attributes):
+            return
+
+        metric_attributes = _get_metric_attributes(attributes)
+        if span.status.status_code == StatusCode.ERROR:
+            metric_attributes["error.type"] = _get_error_type(span)
+
+        input_tokens = get_number_attribute(
+            attributes,
+            Attributes.INPUT_TOKEN_COUNT.value,
+            SpanAttributes.LLM_USAGE_PROMPT_TOKENS,
+        )
+        if input_tokens is not None:
+            self._token_usage.record(
+                input_tokens, {**metric_attributes, "gen_ai.token.type": "input"}
+            )
+        output_tokens = get_number_attribute(
+            attributes,
+            Attributes.OUTPUT_TOKEN_COUNT.value,
+            SpanAttributes.LLM_USAGE_COMPLETION_TOKENS,
+        )
+        if output_tokens is not None:
+            self._token_usage.record(
+                output_tokens, {**metric_attributes, "gen_ai.token.type": "output"}
+            )
+
+        cost = get_number_attribute(attributes, Attributes.TOTAL_COST.value)
+        if cost is None:
+            input_cost = get_number_attribute(attributes, Attributes.INPUT_COST.value)
+            output_cost = get_number_attribute(attributes, Attributes.OUTPUT_COST.value)
+            if input_cost is not None or output_cost is not None:
+                cost = (input_cost or 0) + (output_cost or 0)
+        if cost is not None:
+            self._cost.add(cost, metric_attributes)
+
+        if span.start_time is not None and span.end_time is not None:
+            self._duration.record(
+                (span.end_time - span.start_time) / 1e9, metric_attributes
+            )
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def is_llm_span(attributes) -> bool:
+    return attributes.get(SPAN_TYPE) == "LLM" or (
+        Attributes.PROVIDER.value in attributes
+        and (
+            Attributes.REQUEST_MODEL.value in attributes
+            or Attributes.RESPONSE_MODEL.value in attributes
+        )
+    )
+
+
+def _get_metric_attributes(attributes) -> dict[str, AttributeValue]:
+    metric_attributes = {}
+    for key in (
+        Attributes.PROVIDER.value,
+        Attributes.REQUEST_MODEL.value,
+        Attributes.RESPONSE_MODEL.value,
+    ):
+        if key in attributes:
+            metric_attributes[key] = attributes[key]
+    for key, value in attributes.items():
+        if (
+            key.startswith(f"{ASSOCIATION_PROPERTIES}.")
+            and key not in _EXCLUDED_ASSOCIATION_PROPERTIES
+            and not key.startswith(_EXCLUDED_ASSOCIATION_PROPERTIES_PREFIX)
+        ):
+            metric_attributes[key] = value
+    return metric_attributes
+
+
+def _get_error_type(span: ReadableSpan) -> str:
+    # the status description is a free-text message, only the exception
+    # class name has a bounded number of values
+    for event in reversed(span.events):
+        if event.name == "exception" and event.attributes:
+            exception_type = event.attributes.get("exception.type")
+            if isinstance(exception_type, str) and exception_type:
+                return exception_type
+    return "error"
@@ -0,0 +1,172 @@
+import cProfile
+import inspect
+import json
+import os
+import pstats
+import random
+import threading
+import tracemalloc
+
+from contextlib import contextmanager
+from typing import Any, Callable, Literal, Optional
+
+from opentelemetry.trace import Span
+
+from lmnr.openllmetry_sdk.tracing.attributes import (
+    SPAN_PROFILE_CPU,
+    SPAN_PROFILE_MEMORY,
+    SPAN_PROFILE_MEMORY_PEAK,
+)
+
+ProfileKind = Literal["cpu", "memory"]
+
+PROFILE_TOP_N = 20
+
+# tracemalloc is process wide, cProfile can only be enabled on one thread at
+# a time, and nested profiles would only multiply the overhead, so at most one
+# span is profiled at a time. Spans that start while another one is profiled
+# are not profiled.
+_profiler_lock = threading.Lock()
+
+
+def validate_profile(
+    profile: Optional[str],
+    fn: Optional[Callable[..., Any]] = None,
+    is_async: bool = False,
+) -> None:
+    """Raises a ValueError if `profile` is not a valid profile kind, or
+    can't be attributed to calls of `fn`, if given."""
+    if profile not in (None, "cpu", "memory"):
+        raise ValueError(f"profile must be 'cpu' or 'memory', got {profile!r}")
+    if profile is None or fn is None:
+        return
+    fn = inspect.unwrap(fn)
+    if inspect.isgeneratorfunction(fn) or inspect.isasyncgenfunction(fn):
+        # the body only runs when the generator is iterated, interleaved with
+        # the code of the caller
+        raise ValueError("profile is not supported for generator functions")
+    if profile == "cpu" and is_async:
+        # cProfile profiles the event loop thread, i.e. also all the other
+        # tasks that run while the function awaits
+        raise ValueError("profile='cpu' is not supported for async functions")
+
+
+@contextmanager
+def profile_span(
+    span: Span,
+    profile: Optional[ProfileKind],
+    sample_rate: float = 1.0,
+    top_n: int = PROFILE_TOP_N,
+):
+    """Profile the code run within the context and attach the top `top_n`
+    entries to `span` as a JSON attribute. Does nothing if `profile` is None,
+    the span is sampled out, or another span is being profiled.
+    """
+    if (
+        profile is None
+        or not span.is_recording()
+        or (sample_rate < 1 and random.random() >= sample_rate)
+        or not _profiler_lock.acquire(blocking=False)
+    ):
+        yield
+        return
+
+    try:
+        if profile == "cpu":
+            with _profile_cpu(span, top_n):
+                yield
+        else:
+            with _profile_memory(span, top_n):
+                yield
+    finally:
+        _profiler_lock.release()
+
+
+@contextmanager
+def _profile_cpu(span: Span, top_n: int):
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # another profiling tool is active
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        span.set_attribute(SPAN_PROFILE_CPU, _cpu_top_entries(profiler, top_n))
+
+
+@contextmanager
+def _profile_memory(span: Span, top_n: int):
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    start_size = tracemalloc.get_traced_memory()[0]
+    try:
+        yield
+    finally:
+        peak = tracemalloc.get_traced_memory()[1]
+        after = tracemalloc.take_snapshot()
+        if started:
+            tracemalloc.stop()
+        span.set_attribute(SPAN_PROFILE_MEMORY, _memory_top_entries(before, after, top_n))
+        span.set_attribute(SPAN_PROFILE_MEMORY_PEAK, max(peak - start_size, 0))
+
+
+def _cpu_top_entries(profiler: cProfile.Profile, top_n: int) -> str:
+    stats = pstats.Stats(profiler).stats
+    entries = sorted(
+        (
+            (function, stat)
+            for function, stat in stats.items()
+            if function[0] != __file__
+        ),
+        key=lambda entry: entry[1][3],
+        reverse=True,
+    )[:top_n]
+    return json.dumps(
+        [
+            {
+                "function": _format_function(function),
+                "calls": stat[1],
+                "own_s": round(stat[2], 6),
+                "cumulative_s": round(stat[3], 6),
+            }
+            for function, stat in entries
+        ]
+    )
+
+
+def _memory_top_entries(
+    before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, top_n: int
+) -> str:
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+    diff = after.filter_traces(filters).compare_to(
+        before.filter_traces(filters), "lineno"
+    )
+    return json.dumps(
+        [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+            }
+            for stat in diff[:top_n]
+            if stat.size_diff != 0
+        ]
+    )
+
+
+def _format_function(function: tuple[str, int, str]) -> str:
+    filename, line, name = function
+    if filename == "~":
+        # built-in function
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
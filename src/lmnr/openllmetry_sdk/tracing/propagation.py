@@ -0,0 +1,189 @@
+import importlib
+
+from typing import Collection, Optional
+
+from opentelemetry import propagate, trace
+from opentelemetry.context import Context
+from opentelemetry.instrumentation.instrumentor import BaseInstrumentor
+from opentelemetry.instrumentation.utils import unwrap
+from opentelemetry.propagators.composite import CompositePropagator
+from opentelemetry.propagators.textmap import (
+    CarrierT,
+    Getter,
+    Setter,
+    TextMapPropagator,
+    default_getter,
+    default_setter,
+)
+from opentelemetry.trace.propagation.tracecontext import (
+    TraceContextTextMapPropagator,
+)
+from opentelemetry.trace.span import TraceState
+from wrapt import wrap_function_wrapper
+
+from lmnr.sdk.traceparent import decode_traceparent, encode_traceparent
+
+TRACEPARENT_HEADER = "traceparent"
+TRACESTATE_HEADER = "tracestate"
+
+WRAPPED_METHODS = [
+    {
+        "package": "httpx",
+        "object": "Client",
+        "method": "send",
+        "headers": "request",
+    },
+    {
+        "package": "httpx",
+        "object": "AsyncClient",
+        "method": "send",
+        "headers": "request",
+    },
+    {
+        "package": "requests.sessions",
+        "object": "Session",
+        "method": "send",
+        "headers": "request",
+    },
+    {
+        "package": "aiohttp.client",
+        "object": "ClientSession",
+        "method": "_request",
+        "headers": "kwargs",
+    },
+]
+
+
+class TraceparentPropagator(TextMapPropagator):
+    """W3C trace context propagator that uses the cached codec from
+    `lmnr.sdk.traceparent`, so that injecting the same span context into many
+    requests only formats it once. `tracestate` is propagated as well, so it
+    can stand in for `TraceContextTextMapPropagator`.
+    """
+
+    def extract(
+        self,
+        carrier: CarrierT,
+        context: Optional[Context] = None,
+        getter: Getter[CarrierT] = default_getter,
+    ) -> Context:
+        if context is None:
+            context = Context()
+        values = getter.get(carrier, TRACEPARENT_HEADER)
+        if not values:
+            return context
+        span_context = decode_traceparent(values[0])
+        if span_context is None:
+            return context
+        tracestate_values = getter.get(carrier, TRACESTATE_HEADER)
+        if tracestate_values:
+            # the decoded span context is cached and shared, so copy it
+            span_context = trace.SpanContext(
+                trace_id=span_context.trace_id,
+                span_id=span_context.span_id,
+                is_remote=True,
+                trace_flags=span_context.trace_flags,
+                trace_state=TraceState.from_header(tracestate_values),
+            )
+        return trace.set_span_in_context(trace.NonRecordingSpan(span_context), context)
+
+    def inject(
+        self,
+        carrier: CarrierT,
+        context: Optional[Context] = None,
+        setter: Setter[CarrierT] = default_setter,
+    ) -> None:
+        span_context = trace.get_current_span(context).get_span_context()
+        if not span_context.is_valid:
+            return
+        setter.set(
+            carrier,
+            TRACEPARENT_HEADER,
+            encode_traceparent(
+                span_context.trace_id, span_context.span_id, span_context.trace_flags
+            ),
+        )
+        if span_context.trace_state:
+            setter.set(carrier, TRACESTATE_HEADER, span_context.trace_state.to_header())
+
+    @property
+    def fields(self) -> set[str]:
+        return {TRACEPARENT_HEADER, TRACESTATE_HEADER}
+
+
+def compose_with_global_textmap(propagator: TextMapPropagator) -> TextMapPropagator:
+    """Combine `propagator` with the current global propagators, e.g. baggage,
+    so that setting it globally doesn't drop them. Any
+    `TraceContextTextMapPropagator` is replaced, since `TraceparentPropagator`
+    handles the same headers.
+    """
+    global_textmap = propagate.get_global_textmap()
+    propagators = (
+        global_textmap._propagators
+        if isinstance(global_textmap, CompositePropagator)
+        else [global_textmap]
+    )
+    kept = [
+        p
+        for p in propagators
+        if not isinstance(p, (TraceContextTextMapPropagator, type(propagator)))
+    ]
+    return CompositePropagator([*kept, propagator])
+
+
+def _inject_into_request(wrapped, instance, args, kwargs):
+    if trace.get_current_span().get_span_context().is_valid:
+        request = args[0] if args else kwargs.get("request")
+        if request is not None and TRACEPARENT_HEADER not in request.headers:
+            propagate.inject(request.headers)
+    return wrapped(*args, **kwargs)
+
+
+def _inject_into_kwargs(wrapped, instance, args, kwargs):
+    if trace.get_current_span().get_span_context().is_valid:
+        # only aiohttp is wrapped here, which depends on multidict
+        from multidict import CIMultiDict
+
+        # don't mutate the caller's headers, and keep repeated ones
+        headers = CIMultiDict(kwargs.get("headers") or {})
+        if TRACEPARENT_HEADER not in headers:
+            propagate.inject(headers)
+            kwargs["headers"] = headers
+    return wrapped(*args, **kwargs)
+
+
+class HTTPContextPropagationInstrumentor(BaseInstrumentor):
+    """Injects the current trace context into the headers of outgoing httpx,
+    requests and aiohttp requests. Unlike the OpenTelemetry HTTP client
+    instrumentations, no spans are created. The wrappers work the same for
+    sync and async clients, since the headers are injected at call time.
+    """
+
+    def instrumentation_dependencies(self) -> Collection[str]:
+        return ()
+
+    def _instrument(self, **kwargs):
+        for wrapped_method in WRAPPED_METHODS:
+            try:
+                wrap_function_wrapper(
+                    wrapped_method["package"],
+                    f"{wrapped_method['object']}.{wrapped_method['method']}",
+                    (
+                        _inject_into_request
+                        if wrapped_method["headers"] == "request"
+                        else _inject_into_kwargs
+                    ),
+                )
+            except ModuleNotFoundError:
+                pass  # that's ok, we're not instrumenting everything
+
+    def _uninstrument(self, **kwargs):
+        for wrapped_method in WRAPPED_METHODS:
+            try:
+                module = importlib.import_module(wrapped_method["package"])
+            except ModuleNotFoundError:
+                continue
+            unwrap(
+                getattr(module, wrapped_method["object"]),
+                wrapped_method["method"],
+            )
@@ -0,0 +1,101 @@
+import math
+import threading
+import time
+
+from array import array
+from contextlib import contextmanager
+from typing import Optional
+
+from opentelemetry.context import get_value
+
+from lmnr.openllmetry_sdk.tracing.attributes import (
+    ROLLUP_COUNT,
+    ROLLUP_DURATION_MAX,
+    ROLLUP_DURATION_MIN,
+    ROLLUP_DURATION_P95,
+    ROLLUP_DURATION_TOTAL,
+    ROLLUP_ERROR_COUNT,
+    ROLLUP_SAMPLED_INPUTS,
+)
+
+ROLLUPS_CONTEXT_KEY = "lmnr_rollups"
+
+
+class SpanRollup:
+    """Aggregates the spans with the same name created within a
+    `Laminar.rollup` context into a single span. Only the durations (in a
+    compact array), the error count and the first few inputs are stored.
+    """
+
+    def __init__(self, name: str, max_sampled_inputs: int = 3):
+        self.name = name
+        self.max_sampled_inputs = max_sampled_inputs
+        self.count = 0
+        self.error_count = 0
+        self.start_time: Optional[int] = None
+        self.end_time: Optional[int] = None
+        self.sampled_inputs: list[str] = []
+        self._durations = array("q")
+        self._lock = threading.Lock()
+
+    def wants_input(self) -> bool:
+        return len(self.sampled_inputs) < self.max_sampled_inputs
+
+    def record(
+        self,
+        start_time: int,
+        end_time: int,
+        error: bool = False,
+        input: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            self.count += 1
+            if error:
+                self.error_count += 1
+            if self.start_time is None or start_time < self.start_time:
+                self.start_time = start_time
+            if self.end_time is None or end_time > self.end_time:
+                self.end_time = end_time
+            self._durations.append(end_time - start_time)
+            if input is not None and self.wants_input():
+                self.sampled_inputs.append(input)
+
+    @contextmanager
+    def measure(self, input: Optional[str] = None):
+        start_time = time.time_ns()
+        error = False
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.record(start_time, time.time_ns(), error, input)
+
+    def to_attributes(self) -> dict:
+        with self._lock:
+            durations = sorted(self._durations)
+            count = self.count
+            error_count = self.error_count
+            sampled_inputs = list(self.sampled_inputs)
+        if not durations:
+            return {ROLLUP_COUNT: 0}
+        p95_index = max(math.ceil(0.95 * len(durations)) - 1, 0)
+        attributes = {
+            ROLLUP_COUNT: count,
+            ROLLUP_ERROR_COUNT: error_count,
+            ROLLUP_DURATION_TOTAL: sum(durations),
+            ROLLUP_DURATION_MIN: durations[0],
+            ROLLUP_DURATION_MAX: durations[-1],
+            ROLLUP_DURATION_P95: durations[p95_index],
+        }
+        if sampled_inputs:
+            attributes[ROLLUP_SAMPLED_INPUTS] = sampled_inputs
+        return attributes
+
+
+def get_active_rollup(span_name: str) -> Optional[SpanRollup]:
+    rollups = get_value(ROLLUPS_CONTEXT_KEY)
+    if not rollups:
+        return None
+    return rollups.get(span_name)
@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+
+from types import CodeType, FrameType
+from typing import Optional
+
+from opentelemetry.sdk.trace import ReadableSpan, Span
+from opentelemetry.util.types import AttributeValue
+
+from lmnr.openllmetry_sdk.tracing.attributes import SPAN_PROFILE_STACKS
+
+MAX_STACK_DEPTH = 64
+MAX_STACKS_PER_SPAN = 50
+
+
+class StackSampler:
+    """Samples the stacks of all threads at a fixed interval from a
+    background thread, and counts each sample towards the span that was most
+    recently started, and has not ended yet, in the sampled thread. When the
+    span ends, its sampled stacks are returned as attributes in the folded
+    format (`outer;inner;innermost count`), which flame graph tools read.
+
+    Spans are attributed to the thread they were started in. For asyncio
+    code, where many spans are open in the same thread, samples go to the
+    most recently started span, so the attribution is approximate.
+    """
+
+    def __init__(self, interval_seconds: float = 0.01):
+        self.interval_seconds = interval_seconds
+        self._thread_spans: dict[int, list[int]] = {}
+        self._span_threads: dict[int, int] = {}
+        self._samples: dict[int, dict[str, int]] = {}
+        self._labels: dict[CodeType, str] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="lmnr-stack-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def on_start(self, span: Span) -> None:
+        span_id = span.get_span_context().span_id
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._thread_spans.setdefault(thread_id, []).append(span_id)
+            self._span_threads[span_id] = thread_id
+
+    def on_end(self, span: ReadableSpan) -> dict[str, AttributeValue]:
+        """Returns the attributes to add to the span."""
+        span_id = span.get_span_context().span_id
+        with self._lock:
+            thread_id = self._span_threads.pop(span_id, None)
+            if thread_id is not None:
+                spans = self._thread_spans[thread_id]
+                spans.remove(span_id)
+                if not spans:
+                    del self._thread_spans[thread_id]
+            samples = self._samples.pop(span_id, None)
+        if not samples:
+            return {}
+        stacks = sorted(samples.items(), key=lambda item: item[1], reverse=True)
+        return {
+            SPAN_PROFILE_STACKS: [
+                f"{stack} {count}" for stack, count in stacks[:MAX_STACKS_PER_SPAN]
+            ]
+        }
+
+    def sample(self) -> None:
+        with self._lock:
+            active_spans = {
+                thread_id: spans[-1] for thread_id, spans in self._thread_spans.items()
+            }
+        if not active_spans:
+            return
+        frames = sys._current_frames()
+        folded_stacks = {
+            span_id: self._fold(frames[thread_id])
+            for thread_id, span_id in active_spans.items()
+            if thread_id in frames
+        }
+        with self._lock:
+            for span_id, stack in folded_stacks.items():
+                # the span may have ended meanwhile
+                if span_id in self._span_threads:
+                    samples = self._samples.setdefault(span_id, {})
+                    samples[stack] = samples.get(stack, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._thread_spans.clear()
+            self._span_threads.clear()
+            self._samples.clear()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            self.sample()
+
+    def _fold(self, frame: Optional[FrameType]) -> str:
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return ";".join(labels)
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (
+                f"{code.co_name} ({os.path.basename(code.co_filename)}"
+                f":{code.co_firstlineno})"
+            )
+        return label
@@ -6,6 +6,7 @@ import uuid
 from contextvars import Context
 from lmnr.sdk.client.asynchronous.async_client import AsyncLaminarClient
 from lmnr.sdk.client.synchronous.sync_client import LaminarClient
+from lmnr.sdk.executors import register_executor_metrics
 from lmnr.sdk.log import VerboseColorfulFormatter
 from lmnr.openllmetry_sdk.instruments import Instruments
 from lmnr.openllmetry_sdk.tracing.attributes import (
@@ -18,6 +19,19 @@ from lmnr.openllmetry_sdk.tracing.attributes import (
     TRACING_LEVEL,
 )
 from lmnr.openllmetry_sdk.tracing.content_allow_list import ContentAllowList
+from lmnr.openllmetry_sdk.tracing.costs import CostCalculator, PriceTable
+from lmnr.openllmetry_sdk.tracing.loop_monitor import LoopLagMonitor
+from lmnr.openllmetry_sdk.tracing.metrics import LLMMetricsSpanProcessor
+from lmnr.openllmetry_sdk.tracing.propagation import compose_with_global_textmap
+from lmnr.openllmetry_sdk.tracing.stack_sampler import StackSampler
+from lmnr.openllmetry_sdk.tracing.usage import (
+    TraceUsageAccumulator,
+    TraceUsageTracker,
+)
+from lmnr.openllmetry_sdk.tracing.counters import (
+    clear_span_counters,
+    pop_span_counters_attributes,
+)
 from lmnr.openllmetry_sdk.utils import is_notebook
 from lmnr.openllmetry_sdk.utils.package_check import is_package_installed
 from opentelemetry import trace
@@ -29,19 +43,39 @@ from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
 )
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import Compression
 from opentelemetry.instrumentation.threading import ThreadingInstrumentor
-from opentelemetry.context import get_value, attach, get_current, set_value
+from opentelemetry.attributes import BoundedAttributes
+from opentelemetry.context import get_value, attach, set_value
 from opentelemetry.propagate import set_global_textmap
 from opentelemetry.propagators.textmap import TextMapPropagator
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import (
+    MetricExporter,
+    PeriodicExportingMetricReader,
+)
 from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider, SpanProcessor, Span
+from opentelemetry.sdk.util.instrumentation import InstrumentationScope
+from opentelemetry.sdk.trace import (
+    Event,
+    ReadableSpan,
+    TracerProvider,
+    SpanProcessor,
+    Span,
+)
 from opentelemetry.sdk.trace.export import (
     SpanExporter,
     SimpleSpanProcessor,
     BatchSpanProcessor,
 )
-from opentelemetry.trace import get_tracer_provider, ProxyTracerProvider
+from opentelemetry.trace import (
+    get_tracer_provider,
+    ProxyTracerProvider,
+    SpanContext,
+    Status,
+    StatusCode,
+)
+from opentelemetry.util.types import AttributeValue
 
-from typing import Dict, Optional, Set
+from typing import Dict, Optional, Sequence, Set
 
 from lmnr.version import __version__, PYTHON_VERSION
 
@@ -84,6 +118,13 @@ class TracerWrapper(object):
     __span_id_lists: dict[int, list[str]] = {}
     __client: LaminarClient = None
     __async_client: AsyncLaminarClient = None
+    __tracer: trace.Tracer = None
+    __meter_provider: Optional[MeterProvider] = None
+    __metrics_processor: Optional[LLMMetricsSpanProcessor] = None
+    __cost_calculator: Optional[CostCalculator] = None
+    __trace_usage_tracker: Optional[TraceUsageTracker] = None
+    __stack_sampler: Optional[StackSampler] = None
+    __loop_monitor: Optional[LoopLagMonitor] = None
 
     def __new__(
         cls,
@@ -96,9 +137,17 @@ class TracerWrapper(object):
         base_http_url: Optional[str] = None,
         project_api_key: Optional[str] = None,
         max_export_batch_size: Optional[int] = None,
+        metric_exporter: Optional[MetricExporter] = None,
+        metrics_export_interval_millis: Optional[int] = None,
+        price_table: Optional[PriceTable] = None,
+        stack_sampling_interval_seconds: Optional[float] = None,
+        event_loop_lag_threshold_seconds: Optional[float] = None,
     ) -> "TracerWrapper":
-        cls._initialize_logger(cls)
         if not hasattr(cls, "instance"):
+            # Only done once, `TracerWrapper()` is called on every span creation
+            # to get the singleton instance, and each logger initialization
+            # adds a new handler.
+            cls._initialize_logger(cls)
             obj = cls.instance = super(TracerWrapper, cls).__new__(cls)
             if not TracerWrapper.endpoint:
                 return obj
@@ -114,6 +163,7 @@ class TracerWrapper(object):
 
             obj.__resource = Resource(attributes=TracerWrapper.resource_attributes)
             obj.__tracer_provider = init_tracer_provider(resource=obj.__resource)
+            obj.__tracer = obj.__tracer_provider.get_tracer(TRACER_NAME)
             if processor:
                 obj.__spans_processor: SpanProcessor = processor
                 obj.__spans_processor_original_on_start = processor.on_start
@@ -137,10 +187,39 @@ class TracerWrapper(object):
                 obj.__spans_processor_original_on_start = None
 
             obj.__spans_processor.on_start = obj._span_processor_on_start
+            obj.__spans_processor_original_on_end = obj.__spans_processor.on_end
+            obj.__spans_processor.on_end = obj._span_processor_on_end
             obj.__tracer_provider.add_span_processor(obj.__spans_processor)
 
+            if metric_exporter:
+                obj.__meter_provider = MeterProvider(
+                    resource=obj.__resource,
+                    metric_readers=[
+                        PeriodicExportingMetricReader(
+                            metric_exporter,
+                            export_interval_millis=metrics_export_interval_millis,
+                        )
+                    ],
+                )
+                # called from `_span_processor_on_end`, so that the metrics
+                # see the computed costs
+                meter = obj.__meter_provider.get_meter(TRACER_NAME, __version__)
+                obj.__metrics_processor = LLMMetricsSpanProcessor(meter)
+                register_executor_metrics(meter)
+
+            if price_table:
+                obj.__cost_calculator = CostCalculator(price_table)
+            obj.__trace_usage_tracker = TraceUsageTracker()
+            if stack_sampling_interval_seconds:
+                obj.__stack_sampler = StackSampler(stack_sampling_interval_seconds)
+                obj.__stack_sampler.start()
+            if event_loop_lag_threshold_seconds:
+                obj.__loop_monitor = LoopLagMonitor(event_loop_lag_threshold_seconds)
+                obj.__loop_monitor.start()
+
             if propagator:
-                set_global_textmap(propagator)
+                set_global_textmap(compose_with_global_textmap(propagator))
+                init_http_context_propagation()
 
             # this makes sure otel context is propagated so we always want it
             ThreadingInstrumentor().instrument()
@@ -178,23 +257,13 @@ class TracerWrapper(object):
     def _span_processor_on_start(
         self, span: Span, parent_context: Optional[Context] = None
     ):
-        span_path_in_context = get_value("span_path", parent_context or get_current())
-        span_path_in_context = None
-        parent_span_path = span_path_in_context or (
-            self.__span_id_to_path.get(span.parent.span_id) if span.parent else None
+        span_path, span_ids_path = self._register_span_path(
+            span.name,
+            span.get_span_context().span_id,
+            span.parent.span_id if span.parent else None,
         )
-        parent_span_ids_path = (
-            self.__span_id_lists.get(span.parent.span_id, []) if span.parent else []
-        )
-        span_path = parent_span_path + [span.name] if parent_span_path else [span.name]
-        span_ids_path = parent_span_ids_path + [
-            str(uuid.UUID(int=span.get_span_context().span_id))
-        ]
         span.set_attribute(SPAN_PATH, span_path)
         span.set_attribute(SPAN_IDS_PATH, span_ids_path)
-        set_value("span_path", span_path, get_current())
-        self.__span_id_to_path[span.get_span_context().span_id] = span_path
-        self.__span_id_lists[span.get_span_context().span_id] = span_ids_path
 
         span.set_attribute(SPAN_INSTRUMENTATION_SOURCE, "python")
         span.set_attribute(SPAN_SDK_VERSION, __version__)
@@ -210,10 +279,112 @@ class TracerWrapper(object):
                 else:
                     attach(set_value("override_enable_content_tracing", False))
 
+        if self.__stack_sampler:
+            self.__stack_sampler.on_start(span)
+        if self.__loop_monitor:
+            self.__loop_monitor.on_start(span)
+
         # Call original on_start method if it exists in custom processor
         if self.__spans_processor_original_on_start:
             self.__spans_processor_original_on_start(span, parent_context)
 
+    def _span_processor_on_end(self, span: ReadableSpan):
+        # Attributes can't be set on an ended span, so the span is rebuilt
+        # with the accumulated counters, computed costs and trace usage if
+        # there are any
+        extra_attributes = pop_span_counters_attributes(
+            span.get_span_context().span_id
+        )
+        if self.__stack_sampler:
+            extra_attributes.update(self.__stack_sampler.on_end(span))
+        if self.__loop_monitor:
+            extra_attributes.update(self.__loop_monitor.on_end(span))
+        if self.__cost_calculator:
+            extra_attributes.update(self.__cost_calculator.on_end(span))
+        # after the costs are computed, so that they are included
+        extra_attributes.update(
+            self.__trace_usage_tracker.on_end(
+                span,
+                (
+                    {**span.attributes, **extra_attributes}
+                    if extra_attributes
+                    else span.attributes
+                ),
+            )
+        )
+        if extra_attributes:
+            span = _with_attributes(span, extra_attributes)
+        if self.__metrics_processor:
+            self.__metrics_processor.on_end(span)
+        self.__spans_processor_original_on_end(span)
+
+    def _register_span_path(
+        self, span_name: str, span_id: int, parent_span_id: Optional[int]
+    ) -> tuple[list[str], list[str]]:
+        parent_span_path = (
+            self.__span_id_to_path.get(parent_span_id) if parent_span_id else None
+        )
+        parent_span_ids_path = (
+            self.__span_id_lists.get(parent_span_id, []) if parent_span_id else []
+        )
+        span_path = parent_span_path + [span_name] if parent_span_path else [span_name]
+        span_ids_path = parent_span_ids_path + [str(uuid.UUID(int=span_id))]
+        self.__span_id_to_path[span_id] = span_path
+        self.__span_id_lists[span_id] = span_ids_path
+        return span_path, span_ids_path
+
+    def record_span(
+        self,
+        name: str,
+        span_context: SpanContext,
+        parent: Optional[SpanContext],
+        attributes: dict[str, AttributeValue],
+        start_time: int,
+        end_time: int,
+        status: Optional[Status] = None,
+        events: Sequence[Event] = (),
+    ) -> None:
+        """Record an already finished span, e.g. pre-timed work, without
+        starting it and attaching it to the context. The span gets the same
+        path and SDK attributes as spans started through the tracer, and is
+        sent directly to the span processor.
+
+        Parents must be recorded (or started) before their children for the
+        span path to be computed.
+        """
+        span_path, span_ids_path = self._register_span_path(
+            name, span_context.span_id, parent.span_id if parent else None
+        )
+        span_attributes = {
+            **attributes,
+            SPAN_PATH: span_path,
+            SPAN_IDS_PATH: span_ids_path,
+            SPAN_INSTRUMENTATION_SOURCE: "python",
+            SPAN_SDK_VERSION: __version__,
+            SPAN_LANGUAGE_VERSION: f"python@{PYTHON_VERSION}",
+        }
+        association_properties = get_value("association_properties")
+        if association_properties is not None:
+            span_attributes.update(
+                _get_association_properties_attributes(association_properties)
+            )
+
+        span = ReadableSpan(
+            name=name,
+            context=span_context,
+            parent=parent,
+            resource=self.__resource,
+            # validates the values and converts sequences to tuples, as for
+            # spans started through the tracer
+            attributes=BoundedAttributes(attributes=span_attributes),
+            start_time=start_time,
+            end_time=end_time,
+            status=status or Status(StatusCode.UNSET),
+            events=events,
+            instrumentation_scope=InstrumentationScope(TRACER_NAME),
+        )
+        self.__spans_processor.on_end(span)
+
     @staticmethod
     def set_static_params(
         resource_attributes: dict,
@@ -235,17 +406,38 @@ class TracerWrapper(object):
         # Any state cleanup. Now used in between tests
         cls.__span_id_to_path = {}
         cls.__span_id_lists = {}
+        clear_span_counters()
+        instance = getattr(cls, "instance", cls)
+        if instance.__cost_calculator:
+            instance.__cost_calculator.clear()
+        if instance.__trace_usage_tracker:
+            instance.__trace_usage_tracker.clear()
+        if instance.__stack_sampler:
+            instance.__stack_sampler.clear()
+        if instance.__loop_monitor:
+            instance.__loop_monitor.clear()
 
     def shutdown(self):
         self.__spans_processor.force_flush()
         self.__spans_processor.shutdown()
         self.__tracer_provider.shutdown()
+        if self.__stack_sampler:
+            self.__stack_sampler.shutdown()
+        if self.__loop_monitor:
+            self.__loop_monitor.shutdown()
+        if self.__meter_provider:
+            self.__meter_provider.shutdown()
 
     def flush(self):
+        if self.__meter_provider:
+            self.__meter_provider.force_flush()
         return self.__spans_processor.force_flush()
 
     def get_tracer(self):
-        return self.__tracer_provider.get_tracer(TRACER_NAME)
+        return self.__tracer
+
+    def get_trace_usage(self, trace_id: int) -> Optional[TraceUsageAccumulator]:
+        return self.__trace_usage_tracker.get(trace_id)
 
 
 def set_association_properties(properties: dict) -> None:
@@ -282,12 +474,38 @@ def remove_association_properties(properties: dict) -> None:
     set_association_properties(props)
 
 
+def _with_attributes(
+    span: ReadableSpan, attributes: dict[str, AttributeValue]
+) -> ReadableSpan:
+    return ReadableSpan(
+        name=span.name,
+        context=span.get_span_context(),
+        parent=span.parent,
+        resource=span.resource,
+        attributes=BoundedAttributes(attributes={**span.attributes, **attributes}),
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
 def _set_association_properties_attributes(span, properties: dict) -> None:
+    for key, value in _get_association_properties_attributes(properties).items():
+        span.set_attribute(key, value)
+
+
+def _get_association_properties_attributes(properties: dict) -> dict:
+    attributes = {}
     for key, value in properties.items():
         if key == TRACING_LEVEL:
-            span.set_attribute(f"lmnr.internal.{TRACING_LEVEL}", value)
+            attributes[f"lmnr.internal.{TRACING_LEVEL}"] = value
             continue
-        span.set_attribute(f"{ASSOCIATION_PROPERTIES}.{key}", value)
+        attributes[f"{ASSOCIATION_PROPERTIES}.{key}"] = value
+    return attributes
 
 
 def set_managed_prompt_tracing_context(
@@ -754,6 +972,21 @@ def init_milvus_instrumentor():
         return False
 
 
+def init_http_context_propagation():
+    try:
+        from lmnr.openllmetry_sdk.tracing.propagation import (
+            HTTPContextPropagationInstrumentor,
+        )
+
+        instrumentor = HTTPContextPropagationInstrumentor()
+        if not instrumentor.is_instrumented_by_opentelemetry:
+            instrumentor.instrument()
+        return True
+    except Exception as e:
+        module_logger.error(f"Error initializing HTTP context propagation: {e}")
+        return False
+
+
 def init_requests_instrumentor():
     try:
         if is_package_installed("requests"):
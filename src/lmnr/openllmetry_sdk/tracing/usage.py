@@ -0,0 +1,124 @@
+import threading
+
+from collections import OrderedDict
+from typing import Mapping, Optional
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.semconv_ai import SpanAttributes
+from opentelemetry.util.types import AttributeValue
+
+from lmnr.openllmetry_sdk.tracing.attributes import (
+    SPAN_TYPE,
+    TRACE_USAGE_COST,
+    TRACE_USAGE_INPUT_TOKENS,
+    TRACE_USAGE_LLM_CALLS,
+    TRACE_USAGE_OUTPUT_TOKENS,
+    TRACE_USAGE_TOOL_CALLS,
+    Attributes,
+)
+from lmnr.openllmetry_sdk.tracing.metrics import is_llm_span
+from lmnr.openllmetry_sdk.utils import get_number_attribute
+
+# Spans that end after their root span recreate the accumulator of their
+# trace, which is then never written, so the number of traces is bounded
+MAX_TRACKED_TRACES = 10000
+
+
+class TraceUsageAccumulator:
+    __slots__ = ("input_tokens", "output_tokens", "cost", "llm_calls", "tool_calls")
+
+    def __init__(self):
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self.llm_calls = 0
+        self.tool_calls = 0
+
+    def to_attributes(self) -> dict[str, AttributeValue]:
+        return {
+            TRACE_USAGE_INPUT_TOKENS: self.input_tokens,
+            TRACE_USAGE_OUTPUT_TOKENS: self.output_tokens,
+            TRACE_USAGE_COST: self.cost,
+            TRACE_USAGE_LLM_CALLS: self.llm_calls,
+            TRACE_USAGE_TOOL_CALLS: self.tool_calls,
+        }
+
+
+class TraceUsageTracker:
+    """Accumulates the token usage, cost, and number of LLM and tool calls of
+    the ended spans of each trace, and returns the totals as attributes for
+    the local root span of the trace, when it ends.
+    """
+
+    def __init__(self):
+        self._traces: OrderedDict[int, TraceUsageAccumulator] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_end(
+        self, span: ReadableSpan, attributes: Mapping[str, AttributeValue]
+    ) -> dict[str, AttributeValue]:
+        """Returns the attributes to add to the span. `attributes` are the
+        attributes of the span, including the ones that are about to be added.
+        """
+        trace_id = span.get_span_context().trace_id
+        is_root = span.parent is None or span.parent.is_remote
+        is_llm = is_llm_span(attributes)
+        is_tool = attributes.get(SPAN_TYPE) == "TOOL"
+
+        if not (is_root or is_llm or is_tool):
+            return {}
+
+        with self._lock:
+            if is_root:
+                usage = self._traces.pop(trace_id, None)
+                if usage is None:
+                    if not (is_llm or is_tool):
+                        return {}
+                    usage = TraceUsageAccumulator()
+            else:
+                usage = self._traces.get(trace_id)
+                if usage is None:
+                    usage = self._traces[trace_id] = TraceUsageAccumulator()
+                    if len(self._traces) > MAX_TRACKED_TRACES:
+                        self._traces.popitem(last=False)
+            if is_llm:
+                _add_llm_usage(usage, attributes)
+            if is_tool:
+                usage.tool_calls += 1
+            return usage.to_attributes() if is_root else {}
+
+    def get(self, trace_id: int) -> Optional[TraceUsageAccumulator]:
+        """A copy of the usage accumulated so far in the trace, if any."""
+        with self._lock:
+            usage = self._traces.get(trace_id)
+            if usage is None:
+                return None
+            usage_copy = TraceUsageAccumulator()
+            for field in TraceUsageAccumulator.__slots__:
+                setattr(usage_copy, field, getattr(usage, field))
+            return usage_copy
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+
+def _add_llm_usage(usage: TraceUsageAccumulator, attributes) -> None:
+    usage.llm_calls += 1
+    usage.input_tokens += (
+        get_number_attribute(
+            attributes,
+            Attributes.INPUT_TOKEN_COUNT.value,
+            SpanAttributes.LLM_USAGE_PROMPT_TOKENS,
+        )
+        or 0
+    )
+    usage.output_tokens += (
+        get_number_attribute(
+            attributes,
+            Attributes.OUTPUT_TOKEN_COUNT.value,
+            SpanAttributes.LLM_USAGE_COMPLETION_TOKENS,
+        )
+        or 0
+    )
+    usage.cost += get_number_attribute(attributes, Attributes.TOTAL_COST.value) or 0.0
@@ -1,3 +1,6 @@
+from typing import Optional, Union
+
+
 def cameltosnake(camel_string: str) -> str:
     if not camel_string:
         return ""
@@ -24,3 +27,12 @@ def is_notebook():
         return True
     except Exception:
         return False
+
+
+def get_number_attribute(attributes, *keys: str) -> Optional[Union[int, float]]:
+    """Value of the first of `keys` that is set to a number in `attributes`."""
+    for key in keys:
+        value = attributes.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+    return None
@@ -1,12 +1,15 @@
 """Evals resource for interacting with Laminar evaluations API."""
 
+import gzip
+import json
 import uuid
-from typing import Optional
+from typing import Optional, Union
 
 from lmnr.sdk.client.asynchronous.resources.base import BaseAsyncResource
 from lmnr.sdk.types import (
     InitEvaluationResponse,
     EvaluationResultDatapoint,
+    PartialEvaluationDatapoint,
 )
 
 
@@ -39,26 +42,37 @@ class AsyncEvals(BaseAsyncResource):
     async def save_datapoints(
         self,
         eval_id: uuid.UUID,
-        datapoints: list[EvaluationResultDatapoint],
+        datapoints: list[Union[EvaluationResultDatapoint, PartialEvaluationDatapoint]],
         group_name: Optional[str] = None,
+        compress: bool = False,
     ):
         """Save evaluation datapoints.
 
         Args:
             eval_id (uuid.UUID): The evaluation ID.
-            datapoints (list[EvaluationResultDatapoint]): The datapoints to save.
+            datapoints (list[Union[EvaluationResultDatapoint, PartialEvaluationDatapoint]]):
+                The datapoints to save.
             group_name (Optional[str], optional): Group name for the datapoints. Defaults to None.
+            compress (bool, optional): Whether to gzip the request body. Defaults to False.
 
         Raises:
             ValueError: If there's an error saving the datapoints.
         """
-        response = await self._client.post(
-            self._base_url + f"/v1/evals/{eval_id}/datapoints",
-            json={
-                "points": [datapoint.to_dict() for datapoint in datapoints],
-                "groupName": group_name,
-            },
-            headers=self._headers(),
-        )
+        payload = {
+            "points": [datapoint.to_dict() for datapoint in datapoints],
+            "groupName": group_name,
+        }
+        if compress:
+            response = await self._client.post(
+                self._base_url + f"/v1/evals/{eval_id}/datapoints",
+                content=gzip.compress(json.dumps(payload).encode("utf-8")),
+                headers={**self._headers(), "Content-Encoding": "gzip"},
+            )
+        else:
+            response = await self._client.post(
+                self._base_url + f"/v1/evals/{eval_id}/datapoints",
+                json=payload,
+                headers=self._headers(),
+            )
         if response.status_code != 200:
             raise ValueError(f"Error saving evaluation datapoints: {response.text}")
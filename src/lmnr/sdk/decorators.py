@@ -4,7 +4,16 @@ from lmnr.openllmetry_sdk.decorators.base import (
 )
 from opentelemetry.trace import INVALID_SPAN, get_current_span
 
-from typing import Callable, Literal, Optional, TypeVar, Union, cast
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Literal,
+    Optional,
+    TypeVar,
+    Union,
+    cast,
+)
 from typing_extensions import ParamSpec
 
 from lmnr.openllmetry_sdk.tracing.attributes import SESSION_ID
@@ -24,6 +33,14 @@ def observe(
     ignore_input: bool = False,
     ignore_output: bool = False,
     span_type: Union[Literal["DEFAULT"], Literal["LLM"], Literal["TOOL"]] = "DEFAULT",
+    sample_rate: Optional[float] = None,
+    max_per_second: Optional[float] = None,
+    input_fields: Optional[Collection[str]] = None,
+    input_mapper: Optional[Callable[[dict[str, Any]], Any]] = None,
+    output_fields: Optional[Collection[str]] = None,
+    output_mapper: Optional[Callable[[Any], Any]] = None,
+    profile: Optional[Literal["cpu", "memory"]] = None,
+    profile_sample_rate: float = 1.0,
 ) -> Callable[[Callable[P, R]], Callable[P, R]]:
     """The main decorator entrypoint for Laminar. This is used to wrap
     functions and methods to create spans.
@@ -34,8 +51,45 @@ def observe(
                         Defaults to None.
         session_id (Optional[str], optional): Session ID to associate with the
                         span and the following context. Defaults to None.
+        sample_rate (Optional[float], optional): Fraction of calls of this
+                        function that are recorded as spans, between 0 and 1.
+                        Defaults to None (all calls are recorded).
+        max_per_second (Optional[float], optional): Maximum number of spans
+                        recorded per second for this function. Calls that are
+                        sampled out or rate limited do not create spans, and
+                        are counted in the
+                        `lmnr.span.suppressed_calls.<span name>` attribute of
+                        the parent span instead. Defaults to None.
+        input_fields (Optional[Collection[str]], optional): Names of the
+                        arguments to record as the span input. Other
+                        arguments, e.g. large dataframes or clients, are not
+                        bound or serialized. Defaults to None (all arguments).
+        input_mapper (Optional[Callable[[dict[str, Any]], Any]], optional):
+                        Function that takes the dict of (selected) arguments
+                        and returns the value to record as the span input.
+                        Defaults to None.
+        output_fields (Optional[Collection[str]], optional): Keys (for dict
+                        outputs) or attribute names of the return value to
+                        record as the span output. Defaults to None.
+        output_mapper (Optional[Callable[[Any], Any]], optional): Function
+                        that takes the (selected) return value and returns the
+                        value to record as the span output. Defaults to None.
+        profile (Optional[Literal["cpu", "memory"]], optional): Profile the
+                        function and attach the top entries of a cProfile
+                        profile (`"cpu"`) or of a tracemalloc diff
+                        (`"memory"`) to the span as `lmnr.span.profile.*`
+                        attributes. Only one span is profiled at a time, so
+                        nested and concurrent profiled spans are skipped.
+                        Not supported for generator functions, and `"cpu"` is
+                        not supported for async functions. For async
+                        functions, the memory profile includes the other tasks
+                        that run on the event loop meanwhile.
+                        Defaults to None.
+        profile_sample_rate (float, optional): Fraction of the calls to
+                        profile, if `profile` is set. Defaults to 1.0.
 
     Raises:
+        ValueError: if `profile` is not supported for the function
         Exception: re-raises the exception if the wrapped function raises
                    an exception
 
@@ -58,6 +112,14 @@ def observe(
                 ignore_input=ignore_input,
                 ignore_output=ignore_output,
                 span_type=span_type,
+                sample_rate=sample_rate,
+                max_per_second=max_per_second,
+                input_fields=input_fields,
+                input_mapper=input_mapper,
+                output_fields=output_fields,
+                output_mapper=output_mapper,
+                profile=profile,
+                profile_sample_rate=profile_sample_rate,
             )(func)
             if is_async(func)
             else entity_method(
@@ -65,6 +127,14 @@ def observe(
                 ignore_input=ignore_input,
                 ignore_output=ignore_output,
                 span_type=span_type,
+                sample_rate=sample_rate,
+                max_per_second=max_per_second,
+                input_fields=input_fields,
+                input_mapper=input_mapper,
+                output_fields=output_fields,
+                output_mapper=output_mapper,
+                profile=profile,
+                profile_sample_rate=profile_sample_rate,
             )(func)
         )
 
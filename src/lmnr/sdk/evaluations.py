@@ -1,19 +1,26 @@
 import asyncio
+import os
 import re
 import uuid
 import dotenv
+from contextlib import nullcontext
 from tqdm import tqdm
-from typing import Any, Awaitable, Optional, Set, Union
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Sized
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Literal, Optional, Set, Union
 
 from lmnr.openllmetry_sdk.instruments import Instruments
-from lmnr.openllmetry_sdk.tracing.attributes import SPAN_TYPE
+from lmnr.openllmetry_sdk.tracing.attributes import SPAN_CACHED, SPAN_TYPE
 
 from lmnr.sdk.client.asynchronous.async_client import AsyncLaminarClient
 from lmnr.sdk.client.synchronous.sync_client import LaminarClient
 from lmnr.sdk.datasets import EvaluationDataset, LaminarDataset
 from lmnr.sdk.eval_control import EVALUATION_INSTANCE, PREPARE_ONLY
+from lmnr.sdk.executor_cache import ExecutorCache, get_executor_version
+from lmnr.sdk.executors import InstrumentedThreadPoolExecutor
 from lmnr.sdk.laminar import Laminar as L
 from lmnr.sdk.log import get_default_logger
+from lmnr.sdk.process_pool import TracedProcessPoolExecutor
 from lmnr.sdk.types import (
     Datapoint,
     EvaluationResultDatapoint,
@@ -26,11 +33,21 @@ from lmnr.sdk.types import (
     SpanType,
     TraceType,
 )
+from lmnr.sdk.uploader import (
+    DEFAULT_MAX_IN_FLIGHT_UPLOADS,
+    DEFAULT_UPLOAD_BATCH_SIZE,
+    DEFAULT_UPLOAD_FLUSH_INTERVAL_MS,
+    DEFAULT_UPLOAD_QUEUE_SIZE,
+    DatapointUploader,
+)
 from lmnr.sdk.utils import from_env, is_async
 
 DEFAULT_BATCH_SIZE = 5
 MAX_EXPORT_BATCH_SIZE = 64
 
+# `None` is a valid executor output
+_CACHE_MISS = object()
+
 
 def get_evaluation_url(
     project_id: str, evaluation_id: str, base_url: Optional[str] = None
@@ -46,26 +63,54 @@ def get_evaluation_url(
     return f"{url}/project/{project_id}/evaluations/{evaluation_id}"
 
 
-def get_average_scores(results: list[EvaluationResultDatapoint]) -> dict[str, Numeric]:
-    per_score_values = {}
-    for result in results:
-        for key, value in result.scores.items():
-            if key not in per_score_values:
-                per_score_values[key] = []
-            per_score_values[key].append(value)
+EvaluationData = Union[
+    EvaluationDataset,
+    list[Union[Datapoint, dict]],
+    Iterable[Union[Datapoint, dict]],
+    AsyncIterable[Union[Datapoint, dict]],
+]
+
+
+def _to_datapoint(point: Union[Datapoint, dict]) -> Datapoint:
+    return Datapoint.model_validate(point) if isinstance(point, dict) else point
+
+
+class ScoreAverages:
+    """Running averages of the scores of an evaluation, so that the results
+    don't have to be kept until the end."""
 
-    average_scores = {}
-    for key, values in per_score_values.items():
-        average_scores[key] = sum(values) / len(values)
+    def __init__(self):
+        self._sums: dict[str, Numeric] = {}
+        self._counts: dict[str, int] = {}
 
-    return average_scores
+    def add(self, scores: dict[str, Numeric]):
+        for key, value in scores.items():
+            self._sums[key] = self._sums.get(key, 0) + value
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def get(self) -> dict[str, Numeric]:
+        return {key: total / self._counts[key] for key, total in self._sums.items()}
+
+
+def get_average_scores(results: list[EvaluationResultDatapoint]) -> dict[str, Numeric]:
+    averages = ScoreAverages()
+    for result in results:
+        averages.add(result.scores)
+    return averages.get()
 
 
 class EvaluationReporter:
     def __init__(self, base_url):
         self.base_url = base_url
 
-    def start(self, length: int):
+    def start(self, length: Optional[int]):
+        if length is None:
+            # count-only mode for data of unknown length
+            self.cli_progress = tqdm(
+                bar_format="{n_fmt} datapoints | {elapsed} elapsed",
+                ncols=60,
+            )
+            return
         self.cli_progress = tqdm(
             total=length,
             bar_format="{bar} {percentage:3.0f}% | ETA: {remaining}s | {n_fmt}/{total_fmt}",
@@ -95,7 +140,7 @@ class EvaluationReporter:
 class Evaluation:
     def __init__(
         self,
-        data: Union[EvaluationDataset, list[Union[Datapoint, dict]]],
+        data: EvaluationData,
         executor: Any,
         evaluators: dict[str, EvaluatorFunction],
         human_evaluators: list[HumanEvaluator] = [],
@@ -109,13 +154,27 @@ class Evaluation:
         instruments: Optional[Set[Instruments]] = None,
         max_export_batch_size: Optional[int] = MAX_EXPORT_BATCH_SIZE,
         trace_export_timeout_seconds: Optional[int] = None,
+        evaluator_concurrency_limit: Optional[int] = None,
+        upload_batch_size: int = DEFAULT_UPLOAD_BATCH_SIZE,
+        upload_flush_interval_ms: int = DEFAULT_UPLOAD_FLUSH_INTERVAL_MS,
+        max_in_flight_uploads: int = DEFAULT_MAX_IN_FLIGHT_UPLOADS,
+        upload_queue_size: int = DEFAULT_UPLOAD_QUEUE_SIZE,
+        executor_mode: Literal["thread", "process"] = "thread",
+        workers: Optional[int] = None,
+        worker_initializer: Optional[Callable[..., Any]] = None,
+        worker_initargs: tuple = (),
+        thread_pool_size: Optional[int] = None,
+        executor_cache: Optional[Union[str, os.PathLike, ExecutorCache]] = None,
+        executor_version: Optional[str] = None,
     ):
         """
         Initializes an instance of the Evaluations class.
 
         Parameters:
-            data (Union[List[EvaluationDatapoint|dict], EvaluationDataset]):\
-                List of data points to evaluate or an evaluation dataset.
+            data (EvaluationData): List of data points to evaluate, an\
+                evaluation dataset, or any iterable or async iterable of data\
+                points (e.g. a generator), which may be of unknown length and\
+                is consumed lazily, as datapoints finish.
                             `data` is the input to the executor function,
                             `target` is the input to the evaluator function.
             executor (Callable[..., Any]): The executor function.\
@@ -160,10 +219,79 @@ class Evaluation:
                 used.
                 See https://docs.lmnr.ai/tracing/automatic-instrumentation
                 Defaults to None.
+            evaluator_concurrency_limit (Optional[int], optional): The maximum\
+                number of evaluator calls that run at the same time across the\
+                evaluation. The evaluators of a datapoint run concurrently,\
+                so the time per datapoint is that of the slowest evaluator.\
+                If None, it is only limited by `concurrency_limit` times the\
+                number of evaluators.
+                Defaults to None.
+            upload_batch_size (int, optional): The maximum number of\
+                datapoints sent to Laminar in one request. Datapoints are\
+                uploaded in the background, in gzip-compressed batches.
+                Defaults to 100.
+            upload_flush_interval_ms (int, optional): The maximum time a\
+                datapoint waits for its batch to fill up before the batch is\
+                sent.
+                Defaults to 200.
+            max_in_flight_uploads (int, optional): The maximum number of\
+                upload requests sent at the same time.
+                Defaults to 4.
+            upload_queue_size (int, optional): The maximum number of\
+                datapoints waiting to be uploaded. Once reached, new\
+                datapoints are not started until the uploads catch up.
+                Defaults to 1000.
+            executor_mode (Literal["thread", "process"], optional): Where\
+                synchronous executors and evaluators run. "process" runs them\
+                in a pool of worker processes, so that CPU-bound functions\
+                are not serialized on the GIL. The functions, datapoints and\
+                outputs must then be picklable, i.e. the functions must be\
+                defined at the top level of a module. Spans started in the\
+                workers are sent back and exported with the evaluation trace.
+                Async functions always run in the event loop.
+                Defaults to "thread".
+            workers (Optional[int], optional): The number of worker processes\
+                in "process" mode. Defaults to the number of CPUs.
+            worker_initializer (Optional[Callable[..., Any]], optional): A\
+                picklable function called once in each worker process with\
+                `worker_initargs`, e.g. to load a model.
+                Defaults to None.
+            worker_initargs (tuple, optional): Arguments of\
+                `worker_initializer`. Defaults to ().
+            thread_pool_size (Optional[int], optional): The number of threads\
+                of the pool that runs synchronous executors and evaluators in\
+                "thread" mode. Each evaluation has its own pool, so that its\
+                concurrency is not limited by other users of the default\
+                executor of the event loop. The time functions wait for a\
+                thread is recorded on their spans as\
+                `lmnr.span.values.executor.queue_wait_ms.*`.
+                Defaults to `concurrency_limit` times the number of\
+                evaluators, i.e. enough for every datapoint in flight to run\
+                all of its evaluators at once. Threads are only started\
+                when needed.
+            executor_cache (Optional[Union[str, os.PathLike, ExecutorCache]],\
+                optional): A path to a SQLite file, or an `ExecutorCache`,\
+                to cache executor outputs in. The executor is then only\
+                called for datapoints whose data was not seen before by the\
+                same `executor_version`, which is useful when iterating on\
+                evaluators. Spans of cached executor calls have the\
+                `lmnr.span.cached` attribute set. Pass an `ExecutorCache`\
+                to set size limits.
+                Defaults to None (no caching).
+            executor_version (Optional[str], optional): The version of the\
+                executor in the cache keys. Change it to invalidate the\
+                cached outputs, e.g. when the prompt or model changes.
+                Defaults to a hash of the source code of the executor.
         """
 
         if not evaluators:
             raise ValueError("No evaluators provided")
+        if evaluator_concurrency_limit is not None and evaluator_concurrency_limit < 1:
+            raise ValueError("evaluator_concurrency_limit must be at least 1")
+        if executor_mode not in ("thread", "process"):
+            raise ValueError('executor_mode must be "thread" or "process"')
+        if thread_pool_size is not None and thread_pool_size < 1:
+            raise ValueError("thread_pool_size must be at least 1")
 
         evaluator_name_regex = re.compile(r"^[\w\s-]+$")
         for evaluator_name in evaluators:
@@ -179,21 +307,35 @@ class Evaluation:
         self.is_finished = False
         self.reporter = EvaluationReporter(base_url)
         if isinstance(data, list):
-            self.data = [
-                (Datapoint.model_validate(point) if isinstance(point, dict) else point)
-                for point in data
-            ]
+            self.data = [_to_datapoint(point) for point in data]
         else:
             self.data = data
         self.executor = executor
+        if isinstance(executor_cache, ExecutorCache) or executor_cache is None:
+            self._executor_cache = executor_cache
+            self._owns_executor_cache = False
+        else:
+            self._executor_cache = ExecutorCache(executor_cache)
+            self._owns_executor_cache = True
+        self._executor_version = (
+            executor_version
+            if executor_version is not None or executor_cache is None
+            else get_executor_version(executor)
+        )
         self.evaluators = evaluators
         self.group_name = group_name
         self.name = name
         self.concurrency_limit = concurrency_limit
         self.batch_size = concurrency_limit
+        self.evaluator_concurrency_limit = evaluator_concurrency_limit
+        self._evaluator_semaphore: Optional[asyncio.Semaphore] = None
         self._logger = get_default_logger(self.__class__.__name__)
         self.human_evaluators = human_evaluators
-        self.upload_tasks = []
+        self.upload_batch_size = upload_batch_size
+        self.upload_flush_interval_ms = upload_flush_interval_ms
+        self.max_in_flight_uploads = max_in_flight_uploads
+        self.upload_queue_size = upload_queue_size
+        self._uploader: Optional[DatapointUploader] = None
         self.base_http_url = f"{base_url}:{http_port or 443}"
 
         api_key = project_api_key
@@ -223,6 +365,23 @@ class Evaluation:
             max_export_batch_size=max_export_batch_size,
             export_timeout_seconds=trace_export_timeout_seconds,
         )
+        # Runs synchronous executors and evaluators. Created after tracing is
+        # initialized, so that worker processes continue the traces.
+        self._sync_functions_executor: Executor = (
+            TracedProcessPoolExecutor(
+                workers,
+                initializer=worker_initializer,
+                initargs=worker_initargs,
+                project_api_key=self.project_api_key,
+                base_http_url=self.base_http_url,
+                instruments=instruments,
+            )
+            if executor_mode == "process"
+            else InstrumentedThreadPoolExecutor(
+                thread_pool_size or concurrency_limit * len(evaluators),
+                thread_name_prefix="lmnr-evaluation",
+            )
+        )
 
     async def run(self) -> Awaitable[None]:
         if self.is_finished:
@@ -237,74 +396,123 @@ class Evaluation:
                     self.project_api_key,
                 )
             )
-        self.reporter.start(len(self.data))
+        self.reporter.start(len(self.data) if isinstance(self.data, Sized) else None)
         try:
-            evaluation = await self.client._evals.init(
-                name=self.name, group_name=self.group_name
-            )
-            result_datapoints = await self._evaluate_in_batches(evaluation.id)
-
-            # Wait for all background upload tasks to complete
-            if self.upload_tasks:
-                self._logger.debug(
-                    f"Waiting for {len(self.upload_tasks)} upload tasks to complete"
+            try:
+                evaluation = await self.client._evals.init(
+                    name=self.name, group_name=self.group_name
+                )
+                self._uploader = DatapointUploader(
+                    self.client._evals,
+                    evaluation.id,
+                    self.group_name,
+                    max_batch_size=self.upload_batch_size,
+                    flush_interval_ms=self.upload_flush_interval_ms,
+                    max_in_flight=self.max_in_flight_uploads,
+                    max_queue_size=self.upload_queue_size,
                 )
-                await asyncio.gather(*self.upload_tasks)
-                self._logger.debug("All upload tasks completed")
-        except Exception as e:
-            self.reporter.stopWithError(e)
+                average_scores = await self._evaluate_in_batches(evaluation.id)
+
+                # Wait for all background uploads to complete
+                await self._uploader.flush()
+            except Exception as e:
+                self.reporter.stopWithError(e)
+
+            self.reporter.stop(average_scores, evaluation.projectId, evaluation.id)
+        finally:
+            # also on errors, so that the worker pool and the cache are closed
             self.is_finished = True
             await self._shutdown()
-            return
-
-        average_scores = get_average_scores(result_datapoints)
-        self.reporter.stop(average_scores, evaluation.projectId, evaluation.id)
-        self.is_finished = True
-        await self._shutdown()
 
     async def _shutdown(self):
+        if self._uploader is not None:
+            try:
+                await self._uploader.flush()
+            except Exception as e:
+                self._logger.warning(f"Failed to upload evaluation datapoints: {e}")
+        self._sync_functions_executor.shutdown(wait=False, cancel_futures=True)
+        if self._owns_executor_cache:
+            self._executor_cache.close()
         L.shutdown()
         await self.client.close()
         if isinstance(self.data, LaminarDataset) and self.data.client:
             self.data.client.close()
 
-    async def _evaluate_in_batches(
-        self, eval_id: uuid.UUID
-    ) -> list[EvaluationResultDatapoint]:
-
+    async def _evaluate_in_batches(self, eval_id: uuid.UUID) -> dict[str, Numeric]:
+        """Evaluates the datapoints, at most `concurrency_limit` at a time.
+        The next datapoint is only pulled from the data when one finishes,
+        and the results are not kept, so the memory use does not grow with
+        the number of datapoints. Returns the average scores.
+        """
         semaphore = asyncio.Semaphore(self.concurrency_limit)
-        tasks = []
-        data_iter = self.data if isinstance(self.data, list) else range(len(self.data))
+        tasks: set[asyncio.Task] = set()
+        errors: list[BaseException] = []
+        averages = ScoreAverages()
 
         async def evaluate_task(datapoint, index):
             try:
                 result = await self._evaluate_datapoint(eval_id, datapoint, index)
+                averages.add(result.scores)
                 self.reporter.update(1)
-                return index, result
             finally:
                 semaphore.release()
 
-        # Create tasks only after acquiring semaphore
-        for idx, item in enumerate(data_iter):
-            await semaphore.acquire()
-            datapoint = item if isinstance(self.data, list) else self.data[item]
-            task = asyncio.create_task(evaluate_task(datapoint, idx))
-            tasks.append(task)
+        def on_task_done(task: asyncio.Task):
+            tasks.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                errors.append(task.exception())
 
-        # Wait for all tasks to complete and preserve order
-        results = await asyncio.gather(*tasks)
-        ordered_results = [result for _, result in sorted(results, key=lambda x: x[0])]
-
-        return ordered_results
+        datapoints = self._iter_datapoints()
+        try:
+            index = 0
+            while True:
+                # Pull the next datapoint only after acquiring the semaphore
+                await semaphore.acquire()
+                if errors:
+                    break
+                try:
+                    datapoint = await datapoints.__anext__()
+                except StopAsyncIteration:
+                    break
+                task = asyncio.create_task(evaluate_task(datapoint, index))
+                tasks.add(task)
+                task.add_done_callback(on_task_done)
+                index += 1
+
+            if tasks and not errors:
+                await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            # only left if the evaluation failed
+            pending = list(tasks)
+            for task in pending:
+                task.cancel()
+            # let the cancelled datapoints finish cleaning up before returning
+            await asyncio.gather(*pending, return_exceptions=True)
+            await datapoints.aclose()
+
+        if errors:
+            raise errors[0]
+        return averages.get()
+
+    async def _iter_datapoints(self) -> AsyncIterator[Datapoint]:
+        if isinstance(self.data, EvaluationDataset):
+            for idx in range(len(self.data)):
+                yield self.data[idx]
+        elif isinstance(self.data, AsyncIterable):
+            async for point in self.data:
+                yield _to_datapoint(point)
+        else:
+            for point in self.data:
+                yield _to_datapoint(point)
 
     async def _evaluate_datapoint(
         self, eval_id: uuid.UUID, datapoint: Datapoint, index: int
     ) -> EvaluationResultDatapoint:
         evaluation_id = uuid.uuid4()
-        with L.start_as_current_span("evaluation") as evaluation_span:
+        async with L.astart_as_current_span("evaluation") as evaluation_span:
             L._set_trace_type(trace_type=TraceType.EVALUATION)
             evaluation_span.set_attribute(SPAN_TYPE, SpanType.EVALUATION.value)
-            with L.start_as_current_span(
+            async with L.astart_as_current_span(
                 "executor", input={"data": datapoint.data}
             ) as executor_span:
                 executor_span_id = uuid.UUID(
@@ -319,39 +527,58 @@ class Evaluation:
                     trace_id=trace_id,
                     executor_span_id=executor_span_id,
                 )
-                # First, create datapoint with trace_id so that we can show the dp in the UI
-                await self.client._evals.save_datapoints(
-                    eval_id, [partial_datapoint], self.group_name
-                )
+                # First, create datapoint with trace_id so that we can show the dp in the UI.
+                # Only waits if the upload queue is full, not for the round trip.
+                # The uploader sends the final datapoint only after this one.
+                await self._uploader.put(partial_datapoint)
                 executor_span.set_attribute(SPAN_TYPE, SpanType.EXECUTOR.value)
-                # Run synchronous executors in a thread pool to avoid blocking
-                if not is_async(self.executor):
-                    loop = asyncio.get_event_loop()
-                    output = await loop.run_in_executor(
-                        None, self.executor, datapoint.data
+                cache_key = (
+                    ExecutorCache.key(datapoint.data, self._executor_version)
+                    if self._executor_cache is not None
+                    else None
+                )
+                # SQLite calls block, so they run off the event loop
+                output = (
+                    await asyncio.to_thread(
+                        self._executor_cache.get, cache_key, _CACHE_MISS
                     )
+                    if cache_key is not None
+                    else _CACHE_MISS
+                )
+                if output is not _CACHE_MISS:
+                    executor_span.set_attribute(SPAN_CACHED, True)
                 else:
-                    output = await self.executor(datapoint.data)
+                    # Run synchronous executors in a thread pool to avoid blocking
+                    if not is_async(self.executor):
+                        loop = asyncio.get_event_loop()
+                        output = await loop.run_in_executor(
+                            self._sync_functions_executor, self.executor, datapoint.data
+                        )
+                    else:
+                        output = await self.executor(datapoint.data)
+                    if cache_key is not None:
+                        await asyncio.to_thread(
+                            self._executor_cache.set, cache_key, output
+                        )
 
                 L.set_span_output(output)
             target = datapoint.target
 
-            # Iterate over evaluators
+            # Run the evaluators concurrently. Each one runs in its own task,
+            # with a copy of the context, so its span is a child of the
+            # evaluation span.
+            values = await asyncio.gather(
+                *(
+                    self._run_evaluator(evaluator_name, evaluator, output, target)
+                    for evaluator_name, evaluator in self.evaluators.items()
+                ),
+                return_exceptions=True,
+            )
+            # Merge in the order of `evaluators`, regardless of completion order
             scores: dict[str, Numeric] = {}
-            for evaluator_name, evaluator in self.evaluators.items():
-                with L.start_as_current_span(
-                    evaluator_name, input={"output": output, "target": target}
-                ) as evaluator_span:
-                    evaluator_span.set_attribute(SPAN_TYPE, SpanType.EVALUATOR.value)
-                    if is_async(evaluator):
-                        value = await evaluator(output, target)
-                    else:
-                        loop = asyncio.get_event_loop()
-                        value = await loop.run_in_executor(
-                            None, evaluator, output, target
-                        )
-                    L.set_span_output(value)
-
+            for evaluator_name, value in zip(self.evaluators, values):
+                if isinstance(value, BaseException):
+                    raise value
                 # If evaluator returns a single number, use evaluator name as key
                 if isinstance(value, NumericTypes):
                     scores[evaluator_name] = value
@@ -375,17 +602,46 @@ class Evaluation:
             index=index,
         )
 
-        # Create background upload task without awaiting it
-        upload_task = asyncio.create_task(
-            self.client._evals.save_datapoints(eval_id, [datapoint], self.group_name)
-        )
-        self.upload_tasks.append(upload_task)
+        # Uploaded in the background, with the results of other datapoints
+        await self._uploader.put(datapoint)
 
         return datapoint
 
+    async def _run_evaluator(
+        self,
+        evaluator_name: str,
+        evaluator: EvaluatorFunction,
+        output: Any,
+        target: Any,
+    ) -> Union[Numeric, dict[str, Numeric]]:
+        async with self._get_evaluator_semaphore():
+            async with L.astart_as_current_span(
+                evaluator_name, input={"output": output, "target": target}
+            ) as evaluator_span:
+                evaluator_span.set_attribute(SPAN_TYPE, SpanType.EVALUATOR.value)
+                if is_async(evaluator):
+                    value = await evaluator(output, target)
+                else:
+                    loop = asyncio.get_event_loop()
+                    value = await loop.run_in_executor(
+                        self._sync_functions_executor, evaluator, output, target
+                    )
+                L.set_span_output(value)
+        return value
+
+    def _get_evaluator_semaphore(self) -> Union[asyncio.Semaphore, nullcontext]:
+        if self.evaluator_concurrency_limit is None:
+            return nullcontext()
+        # Created lazily, so that it is bound to the loop the evaluation runs in
+        if self._evaluator_semaphore is None:
+            self._evaluator_semaphore = asyncio.Semaphore(
+                self.evaluator_concurrency_limit
+            )
+        return self._evaluator_semaphore
+
 
 def evaluate(
-    data: Union[EvaluationDataset, list[Union[Datapoint, dict]]],
+    data: EvaluationData,
     executor: ExecutorFunction,
     evaluators: dict[str, EvaluatorFunction],
     human_evaluators: list[HumanEvaluator] = [],
@@ -399,6 +655,18 @@ def evaluate(
     instruments: Optional[Set[Instruments]] = None,
     max_export_batch_size: Optional[int] = MAX_EXPORT_BATCH_SIZE,
     trace_export_timeout_seconds: Optional[int] = None,
+    evaluator_concurrency_limit: Optional[int] = None,
+    upload_batch_size: int = DEFAULT_UPLOAD_BATCH_SIZE,
+    upload_flush_interval_ms: int = DEFAULT_UPLOAD_FLUSH_INTERVAL_MS,
+    max_in_flight_uploads: int = DEFAULT_MAX_IN_FLIGHT_UPLOADS,
+    upload_queue_size: int = DEFAULT_UPLOAD_QUEUE_SIZE,
+    executor_mode: Literal["thread", "process"] = "thread",
+    workers: Optional[int] = None,
+    worker_initializer: Optional[Callable[..., Any]] = None,
+    worker_initargs: tuple = (),
+    thread_pool_size: Optional[int] = None,
+    executor_cache: Optional[Union[str, os.PathLike, ExecutorCache]] = None,
+    executor_version: Optional[str] = None,
 ) -> Optional[Awaitable[None]]:
     """
     If added to the file which is called through `lmnr eval` command, then
@@ -410,8 +678,9 @@ def evaluate(
     You must await the call to `evaluate`.
 
     Parameters:
-        data (Union[list[EvaluationDatapoint|dict]], EvaluationDataset]):\
-            List of data points to evaluate or an evaluation dataset.
+        data (EvaluationData): List of data points to evaluate, an evaluation\
+            dataset, or any iterable or async iterable of data points, which\
+            may be of unknown length and is consumed lazily.
                 `data` is the input to the executor function,
                 `target` is the input to the evaluator function.
         executor (Callable[..., Any]): The executor function.\
@@ -457,6 +726,48 @@ def evaluate(
                         Defaults to None.
         trace_export_timeout_seconds (Optional[int], optional): The timeout for\
                         trace export on OpenTelemetry exporter. Defaults to None.
+        evaluator_concurrency_limit (Optional[int], optional): The maximum\
+                        number of evaluator calls that run at the same time.\
+                        The evaluators of a datapoint run concurrently.\
+                        If None, it is not limited separately.
+                        Defaults to None.
+        upload_batch_size (int, optional): The maximum number of datapoints\
+                        sent to Laminar in one request. Defaults to 100.
+        upload_flush_interval_ms (int, optional): The maximum time a\
+                        datapoint waits for its batch to fill up before the\
+                        batch is sent. Defaults to 200.
+        max_in_flight_uploads (int, optional): The maximum number of upload\
+                        requests sent at the same time. Defaults to 4.
+        upload_queue_size (int, optional): The maximum number of datapoints\
+                        waiting to be uploaded. Once reached, new datapoints\
+                        are not started until the uploads catch up.\
+                        Defaults to 1000.
+        executor_mode (Literal["thread", "process"], optional): Where\
+                        synchronous executors and evaluators run. "process"\
+                        runs them in a pool of worker processes, for\
+                        CPU-bound functions. They must then be picklable,\
+                        i.e. defined at the top level of a module.
+                        Defaults to "thread".
+        workers (Optional[int], optional): The number of worker processes\
+                        in "process" mode. Defaults to the number of CPUs.
+        worker_initializer (Optional[Callable[..., Any]], optional): A\
+                        picklable function called once in each worker\
+                        process with `worker_initargs`. Defaults to None.
+        worker_initargs (tuple, optional): Arguments of\
+                        `worker_initializer`. Defaults to ().
+        thread_pool_size (Optional[int], optional): The number of threads\
+                        of the evaluation's own pool for synchronous\
+                        executors and evaluators in "thread" mode.\
+                        Defaults to `concurrency_limit` times the number of\
+                        evaluators.
+        executor_cache (Optional[Union[str, os.PathLike, ExecutorCache]],\
+                        optional): A path to a SQLite file, or an\
+                        `ExecutorCache`, to cache executor outputs in, so\
+                        that re-runs only call the executor for new data.
+                        Defaults to None (no caching).
+        executor_version (Optional[str], optional): The version of the\
+                        executor in the cache keys. Defaults to a hash of\
+                        the source code of the executor.
     """
     evaluation = Evaluation(
         data=data,
@@ -473,6 +784,18 @@ def evaluate(
         instruments=instruments,
         max_export_batch_size=max_export_batch_size,
         trace_export_timeout_seconds=trace_export_timeout_seconds,
+        evaluator_concurrency_limit=evaluator_concurrency_limit,
+        upload_batch_size=upload_batch_size,
+        upload_flush_interval_ms=upload_flush_interval_ms,
+        max_in_flight_uploads=max_in_flight_uploads,
+        upload_queue_size=upload_queue_size,
+        executor_mode=executor_mode,
+        workers=workers,
+        worker_initializer=worker_initializer,
+        worker_initargs=worker_initargs,
+        thread_pool_size=thread_pool_size,
+        executor_cache=executor_cache,
+        executor_version=executor_version,
     )
 
     if PREPARE_ONLY.get():
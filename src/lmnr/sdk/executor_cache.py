@@ -0,0 +1,218 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import types
+
+from typing import Any, Callable, Optional, Union
+
+from lmnr.sdk.log import get_default_logger
+from lmnr.sdk.utils import serialize
+
+DEFAULT_CACHE_MAX_ENTRIES = 100_000
+DEFAULT_CACHE_MAX_SIZE_BYTES = 1024 * 1024 * 1024
+# number of least recently used entries read at a time when evicting
+EVICTION_BATCH_SIZE = 100
+
+
+def get_executor_version(executor: Callable[..., Any]) -> str:
+    """A hash of the source code of the executor, used as its version when no
+    version is given. Only the executor function itself is hashed, not the
+    functions it calls.
+    """
+    fn = inspect.unwrap(executor)
+    try:
+        code = inspect.getsource(fn).encode("utf-8")
+    except (OSError, TypeError):
+        # e.g. defined in a REPL, or a callable object
+        code = _code_bytes(fn.__code__) if hasattr(fn, "__code__") else b""
+    name = getattr(fn, "__qualname__", type(fn).__qualname__).encode("utf-8")
+    return hashlib.sha256(name + b"\0" + code).hexdigest()[:16]
+
+
+def _code_bytes(code: types.CodeType) -> bytes:
+    # The constants, e.g. prompt strings, aren't part of the bytecode. Nested
+    # functions are code objects, whose repr contains their address.
+    parts = [code.co_code]
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            parts.append(_code_bytes(const))
+        elif isinstance(const, frozenset):
+            parts.append(repr(sorted(repr(item) for item in const)).encode("utf-8"))
+        else:
+            parts.append(repr(const).encode("utf-8"))
+    return b"\0".join(parts)
+
+
+def _canonicalize(data: Any) -> Any:
+    """A JSON-serializable form of `data` that is the same across runs, with
+    string keys and sorted set members. Raises a TypeError for objects that
+    only have the default `repr`, which contains their address."""
+    if data is None or isinstance(data, (str, int, float, bool)):
+        return data
+    if isinstance(data, dict):
+        # keys are JSON encoded, so that e.g. 1 and "1" don't collide
+        return {
+            _canonical_json(_canonicalize(key)): _canonicalize(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, (set, frozenset)):
+        return sorted((_canonicalize(item) for item in data), key=_canonical_json)
+    if isinstance(data, (list, tuple)):
+        return [_canonicalize(item) for item in data]
+    serialized = serialize(data)
+    if isinstance(serialized, str):
+        cls = type(data)
+        if cls.__str__ is object.__str__ and cls.__repr__ is object.__repr__:
+            raise TypeError(f"{cls.__name__} has no stable representation")
+        return serialized
+    return _canonicalize(serialized)
+
+
+def _canonical_json(data: Any) -> str:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+
+class ExecutorCache:
+    """An on-disk cache of executor outputs in a SQLite database, keyed by a
+    stable hash of the datapoint data and the executor version, so that
+    re-running an evaluation, e.g. after changing the evaluators, doesn't
+    call the executor again for the datapoints it has already seen.
+
+    The least recently used entries are evicted once there are more than
+    `max_entries` entries, or their total size exceeds `max_size_bytes`.
+    The methods block on disk I/O, and can be called from any thread.
+
+    Outputs are stored pickled, so only open cache files you created.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+        max_size_bytes: int = DEFAULT_CACHE_MAX_SIZE_BYTES,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_size_bytes < 1:
+            raise ValueError("max_size_bytes must be at least 1")
+        self.path = os.fspath(path)
+        self.max_entries = max_entries
+        self.max_size_bytes = max_size_bytes
+        self._logger = get_default_logger(self.__class__.__name__)
+        # the connection is shared between the event loop and executor threads
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS executor_outputs ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_used INTEGER NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS executor_outputs_last_used"
+                " ON executor_outputs (last_used)"
+            )
+            # a counter rather than a timestamp, so that the order is exact
+            self._clock, self._count, self._total_size = self._connection.execute(
+                "SELECT COALESCE(MAX(last_used), 0), COUNT(*), COALESCE(SUM(size), 0)"
+                " FROM executor_outputs"
+            ).fetchone()
+
+    @staticmethod
+    def key(data: Any, executor_version: str) -> Optional[str]:
+        """The cache key of the output for `data`, or None if `data` can't be
+        represented the same way across runs, i.e. can't be cached."""
+        try:
+            payload = _canonical_json(_canonicalize(data))
+        except (TypeError, ValueError, RecursionError):
+            return None
+        return hashlib.sha256(
+            executor_version.encode("utf-8") + b"\0" + payload.encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM executor_outputs WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return default
+            self._clock += 1
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE executor_outputs SET last_used = ? WHERE key = ?",
+                    (self._clock, key),
+                )
+        try:
+            return pickle.loads(row[0])
+        except Exception as e:
+            self._logger.warning(f"Failed to load a cached executor output: {e}")
+            return default
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            blob = pickle.dumps(value)
+        except Exception as e:
+            self._logger.warning(f"Executor output can't be cached: {e}")
+            return
+        if len(blob) > self.max_size_bytes:
+            return
+        with self._lock, self._connection:
+            replaced = self._connection.execute(
+                "SELECT size FROM executor_outputs WHERE key = ?", (key,)
+            ).fetchone()
+            if replaced is not None:
+                self._count -= 1
+                self._total_size -= replaced[0]
+            self._clock += 1
+            self._connection.execute(
+                "INSERT OR REPLACE INTO executor_outputs (key, value, size, last_used)"
+                " VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), self._clock),
+            )
+            self._count += 1
+            self._total_size += len(blob)
+            self._evict()
+
+    def _is_full(self) -> bool:
+        return self._count > self.max_entries or self._total_size > self.max_size_bytes
+
+    def _evict(self) -> None:
+        while self._is_full():
+            rows = self._connection.execute(
+                "SELECT key, size FROM executor_outputs ORDER BY last_used LIMIT ?",
+                (EVICTION_BATCH_SIZE,),
+            ).fetchall()
+            if not rows:
+                break
+            evicted = []
+            for key, size in rows:
+                if not self._is_full():
+                    break
+                evicted.append((key,))
+                self._count -= 1
+                self._total_size -= size
+            self._connection.executemany(
+                "DELETE FROM executor_outputs WHERE key = ?", evicted
+            )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM executor_outputs")
+            self._count = 0
+            self._total_size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,131 @@
+import itertools
+import threading
+import time
+import weakref
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+from opentelemetry import trace
+from opentelemetry.metrics import CallbackOptions, Meter, Observation
+
+from lmnr.openllmetry_sdk.tracing.counters import (
+    find_span_counters,
+    get_span_counters,
+)
+
+QUEUE_WAIT_VALUE = "executor.queue_wait_ms"
+RUN_TIME_VALUE = "executor.run_ms"
+
+_executors: "weakref.WeakSet[InstrumentedThreadPoolExecutor]" = weakref.WeakSet()
+_executor_ids = itertools.count()
+
+
+class InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    """A `ThreadPoolExecutor` that records, for every task submitted within
+    a span, the time the task waited in the queue and the time it ran, as the
+    `executor.queue_wait_ms` and `executor.run_ms` value summaries of the span
+    (see `Laminar.observe_value`). The number of queued tasks and busy
+    workers is available from `stats()`, and as metrics if Laminar is
+    initialized with `enable_metrics=True`.
+
+    Long queue waits mean the pool is the bottleneck. To instrument code that
+    uses `loop.run_in_executor(None, ...)`, set an instance as the default
+    executor of the loop with `loop.set_default_executor`.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        thread_name_prefix: str = "",
+        name: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(max_workers, thread_name_prefix, **kwargs)
+        self.name = name or thread_name_prefix or f"executor-{next(_executor_ids)}"
+        self._queued = 0
+        self._running = 0
+        self._stats_lock = threading.Lock()
+        _executors.add(self)
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        span = trace.get_current_span()
+        span_id = None
+        if span.is_recording():
+            span_id = span.get_span_context().span_id
+            # create the counters while the span is surely open, the task
+            # only records into them if the span hasn't ended meanwhile
+            get_span_counters(span_id)
+        submitted_at = time.perf_counter_ns()
+
+        def run():
+            started_at = time.perf_counter_ns()
+            with self._stats_lock:
+                self._queued -= 1
+                self._running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                ended_at = time.perf_counter_ns()
+                with self._stats_lock:
+                    self._running -= 1
+                counters = find_span_counters(span_id) if span_id else None
+                if counters is not None:
+                    counters.observe(QUEUE_WAIT_VALUE, (started_at - submitted_at) / 1e6)
+                    counters.observe(RUN_TIME_VALUE, (ended_at - started_at) / 1e6)
+
+        with self._stats_lock:
+            self._queued += 1
+        try:
+            return super().submit(run)
+        except BaseException:
+            with self._stats_lock:
+                self._queued -= 1
+            raise
+
+    def stats(self) -> dict[str, float]:
+        with self._stats_lock:
+            queued, running = self._queued, self._running
+        return {
+            "max_workers": self._max_workers,
+            "running": running,
+            "queued": queued,
+            "utilization": running / self._max_workers,
+        }
+
+
+def register_executor_metrics(meter: Meter) -> None:
+    """Report the stats of all live `InstrumentedThreadPoolExecutor`s as
+    gauges, grouped by executor name."""
+
+    def observe(key: str) -> Callable[[CallbackOptions], Iterable[Observation]]:
+        def callback(options: CallbackOptions) -> Iterable[Observation]:
+            for executor in list(_executors):
+                yield Observation(
+                    executor.stats()[key], {"executor.name": executor.name}
+                )
+
+        return callback
+
+    meter.create_observable_gauge(
+        "lmnr.executor.running",
+        callbacks=[observe("running")],
+        unit="{task}",
+        description="Number of tasks running in the executor",
+    )
+    meter.create_observable_gauge(
+        "lmnr.executor.queued",
+        callbacks=[observe("queued")],
+        unit="{task}",
+        description="Number of tasks waiting for a worker of the executor",
+    )
+    meter.create_observable_gauge(
+        "lmnr.executor.utilization",
+        callbacks=[observe("utilization")],
+        unit="1",
+        description="Fraction of the executor workers that are busy",
+    )
@@ -1,4 +1,4 @@
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 from contextvars import Context
 from lmnr.openllmetry_sdk import TracerManager
 from lmnr.openllmetry_sdk.instruments import Instruments
@@ -12,15 +12,20 @@ from lmnr.openllmetry_sdk.config import MAX_MANUAL_SPAN_PAYLOAD_SIZE
 from lmnr.openllmetry_sdk.decorators.base import json_dumps
 from opentelemetry import context as context_api, trace
 from opentelemetry.context import attach, detach
+from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import (
+    OTLPMetricExporter,
+)
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
     OTLPSpanExporter,
     Compression,
 )
 from opentelemetry.sdk.trace.id_generator import RandomIdGenerator
+from opentelemetry.trace import Status, StatusCode
 from opentelemetry.util.types import AttributeValue
 
 from typing import Any, Literal, Optional, Set, Union
 
+import asyncio
 import copy
 import datetime
 import logging
@@ -34,18 +39,31 @@ from lmnr.openllmetry_sdk.tracing.attributes import (
     SPAN_OUTPUT,
     TRACE_TYPE,
 )
+from lmnr.openllmetry_sdk.tracing.costs import PriceTable
+from lmnr.openllmetry_sdk.tracing.counters import get_span_counters
+from lmnr.openllmetry_sdk.tracing.profiling import profile_span, validate_profile
+from lmnr.openllmetry_sdk.tracing.propagation import TraceparentPropagator
+from lmnr.openllmetry_sdk.tracing.rollup import (
+    ROLLUPS_CONTEXT_KEY,
+    SpanRollup,
+    get_active_rollup,
+)
 from lmnr.openllmetry_sdk.tracing.tracing import (
+    TracerWrapper,
     get_association_properties,
     remove_association_properties,
     set_association_properties,
     update_association_properties,
 )
+from lmnr.sdk.traceparent import encode_traceparent
 from lmnr.sdk.utils import from_env
 
 from .log import VerboseColorfulFormatter
 
 from .types import (
     LaminarSpanContext,
+    SpanSpec,
+    TraceUsage,
     TraceType,
     TracingLevel,
 )
@@ -68,6 +86,13 @@ class Laminar:
         disable_batch: bool = False,
         max_export_batch_size: Optional[int] = None,
         export_timeout_seconds: Optional[int] = None,
+        enable_metrics: bool = False,
+        metrics_export_interval_seconds: Optional[int] = None,
+        propagate_http_context: bool = False,
+        compute_costs: bool = False,
+        model_prices: Optional[Union[str, dict[str, tuple[float, float]]]] = None,
+        stack_sampling_interval_ms: Optional[float] = None,
+        event_loop_lag_threshold_ms: Optional[float] = None,
     ):
         """Initialize Laminar context across the application.
         This method must be called before using any other Laminar methods or
@@ -100,6 +125,52 @@ class Laminar:
                         exporter. Defaults to 30 seconds (unlike the\
                         OpenTelemetry default of 10 seconds).
                         Defaults to None.
+            enable_metrics (bool, optional): If set to True, token usage,\
+                        cost and latency metrics are derived from LLM spans,\
+                        grouped by provider, model and association\
+                        properties, and exported via OTLP in periodic batches.
+                        Defaults to False.
+            metrics_export_interval_seconds (Optional[int], optional): Interval\
+                        between metrics exports. Defaults to 60 seconds.
+                        Defaults to None.
+            propagate_http_context (bool, optional): If set to True, the\
+                        current span context is injected as a W3C\
+                        `traceparent` header into outgoing httpx, requests\
+                        and aiohttp requests, and the `traceparent`\
+                        propagator is added to the global propagators for\
+                        extraction, so that traces continue across services.\
+                        Other global propagators, e.g. baggage, are kept.\
+                        No extra spans are created.
+                        Defaults to False.
+            compute_costs (bool, optional): If set to True, the input, output\
+                        and total cost of LLM spans that don't report it are\
+                        computed locally from the model and token counts, and\
+                        the cost of each span and its descendants is set as\
+                        `lmnr.span.total_cost` when the span ends.
+                        Defaults to False.
+            model_prices (Optional[Union[str, dict[str, tuple[float, float]]]],\
+                        optional): Prices in USD per 1M input and output\
+                        tokens by model name, that override or extend the\
+                        built-in price table, or a path to a JSON price table\
+                        that replaces it. Implies `compute_costs`.
+                        Defaults to None.
+            stack_sampling_interval_ms (Optional[float], optional): If set, a\
+                        background thread samples the stacks of all threads\
+                        at this interval, and the folded stack counts sampled\
+                        while a span was the latest active span in its thread\
+                        are set as `lmnr.span.profile.stacks` when it ends.\
+                        Gives per-span flame graphs without deterministic\
+                        profiling overhead. 10 (100 samples per second) is a\
+                        reasonable value.
+                        Defaults to None (disabled).
+            event_loop_lag_threshold_ms (Optional[float], optional): If set,\
+                        asyncio event loops that run spans are monitored with\
+                        a heartbeat callback. The max and total scheduling\
+                        lag that overlapped each span are set as\
+                        `lmnr.span.event_loop_lag.*` attributes, and loops\
+                        blocked for longer than this threshold get an\
+                        `event_loop_blocked` event with the blocking stack.
+                        Defaults to None (disabled).
 
         Raises:
             ValueError: If project API key is not set
@@ -154,6 +225,37 @@ class Laminar:
             instruments=instruments,
             disable_batch=disable_batch,
             max_export_batch_size=max_export_batch_size,
+            propagator=TraceparentPropagator() if propagate_http_context else None,
+            price_table=(
+                _get_price_table(model_prices)
+                if compute_costs or model_prices
+                else None
+            ),
+            stack_sampling_interval_seconds=(
+                stack_sampling_interval_ms / 1000
+                if stack_sampling_interval_ms
+                else None
+            ),
+            event_loop_lag_threshold_seconds=(
+                event_loop_lag_threshold_ms / 1000
+                if event_loop_lag_threshold_ms
+                else None
+            ),
+            metric_exporter=(
+                OTLPMetricExporter(
+                    endpoint=cls.__base_grpc_url,
+                    headers={"authorization": f"Bearer {cls.__project_api_key}"},
+                    compression=Compression.Gzip,
+                    timeout=export_timeout_seconds or 30,
+                )
+                if enable_metrics
+                else None
+            ),
+            metrics_export_interval_millis=(
+                metrics_export_interval_seconds * 1000
+                if metrics_export_interval_seconds
+                else None
+            ),
         )
 
     @classmethod
@@ -215,6 +317,40 @@ class Laminar:
 
         current_span.add_event(name, event, timestamp)
 
+    @classmethod
+    def count(cls, name: str, value: Union[int, float] = 1):
+        """Increment a counter on the current span. Unlike `Laminar.event`,
+        this does not add anything to the span per call; the counters are
+        accumulated in memory and set as `lmnr.span.counters.<name>`
+        attributes when the span ends. Useful for high-frequency signals,
+        e.g. cache hits or retries.
+
+        Args:
+            name (str): counter name
+            value (Union[int, float], optional): value to add to the counter.\
+                Defaults to 1.
+        """
+        span = trace.get_current_span()
+        if not span.is_recording():
+            return
+        get_span_counters(span.get_span_context().span_id).count(name, value)
+
+    @classmethod
+    def observe_value(cls, name: str, value: Union[int, float]):
+        """Observe a value on the current span, e.g. a latency or a retrieval
+        score. The count, sum, min, max and histogram bucket counts of the
+        values observed under `name` are set as `lmnr.span.values.<name>.*`
+        attributes when the span ends.
+
+        Args:
+            name (str): name of the observed value
+            value (Union[int, float]): the observed value
+        """
+        span = trace.get_current_span()
+        if not span.is_recording():
+            return
+        get_span_counters(span.get_span_context().span_id).observe(name, value)
+
     @classmethod
     @contextmanager
     def start_as_current_span(
@@ -227,6 +363,8 @@ class Laminar:
         context: Optional[Context] = None,
         labels: Optional[list[str]] = None,
         parent_span_context: Optional[LaminarSpanContext] = None,
+        profile: Optional[Literal["cpu", "memory"]] = None,
+        profile_sample_rate: float = 1.0,
     ):
         """Start a new span as the current span. Useful for manual
         instrumentation. If `span_type` is set to `"LLM"`, you should report
@@ -261,7 +399,17 @@ class Laminar:
                 Defaults to None.
             labels (Optional[list[str]], optional): labels to set for the\
                 span. Defaults to None.
+            profile (Optional[Literal["cpu", "memory"]], optional): profile\
+                the code run within the span and attach the top entries of\
+                a cProfile profile or of a tracemalloc diff to the span. See\
+                `observe` for details. cProfile only profiles the current\
+                thread, so don't use `"cpu"` around `await`s, where it would\
+                also profile the other tasks of the event loop.\
+                Defaults to None.
+            profile_sample_rate (float, optional): fraction of the spans to\
+                profile, if `profile` is set. Defaults to 1.0.
         """
+        validate_profile(profile)
 
         if not cls.is_initialized():
             yield trace.NonRecordingSpan(
@@ -273,6 +421,20 @@ class Laminar:
             )
             return
 
+        rollup = get_active_rollup(name)
+        if rollup is not None:
+            # Inside `Laminar.rollup(name)`, the span is only measured and
+            # aggregated. Yield a non-recording span, so that the output and
+            # attributes set on it are not set on the parent.
+            serialized_input = None
+            if input is not None and rollup.wants_input():
+                serialized_input = _serialize_input(input)
+            parent_span = trace.get_current_span(context or context_api.get_current())
+            span = trace.NonRecordingSpan(parent_span.get_span_context())
+            with rollup.measure(serialized_input), trace.use_span(span):
+                yield span
+            return
+
         with get_tracer() as tracer:
             ctx = context or context_api.get_current()
             if parent_span_context is not None:
@@ -312,7 +474,8 @@ class Laminar:
                             SPAN_INPUT,
                             serialized_input,
                         )
-                yield span
+                with profile_span(span, profile, profile_sample_rate):
+                    yield span
 
             # TODO: Figure out if this is necessary
             try:
@@ -320,6 +483,279 @@ class Laminar:
             except Exception:
                 pass
 
+    @classmethod
+    @asynccontextmanager
+    async def astart_as_current_span(
+        cls,
+        name: str,
+        input: Any = None,
+        span_type: Union[
+            Literal["DEFAULT"], Literal["LLM"], Literal["TOOL"]
+        ] = "DEFAULT",
+        context: Optional[Context] = None,
+        labels: Optional[list[str]] = None,
+        parent_span_context: Optional[LaminarSpanContext] = None,
+        offload_input_serialization: bool = False,
+    ):
+        """Async version of `Laminar.start_as_current_span`. Starts a new span
+        as the current span for the duration of the `async with` block.
+
+        The span is attached to the context of the task that enters the
+        block, and detached from it when the block exits, so concurrent tasks
+        each see their own span as current across awaits.
+
+        Usage example:
+        ```python
+        async with Laminar.astart_as_current_span("my_span", input="my_input"):
+            await my_async_function()
+            Laminar.set_span_output("my_output")
+        ```
+
+        Args:
+            name (str): name of the span
+            input (Any, optional): input to the span. Will be sent as an\
+                attribute, so must be json serializable. Defaults to None.
+            span_type (Union[Literal["DEFAULT"], Literal["LLM"]], optional):\
+                type of the span. If you use `"LLM"`, you should report usage\
+                and response attributes manually. Defaults to "DEFAULT".
+            context (Optional[Context], optional): raw OpenTelemetry context\
+                to attach the span to. Defaults to None.
+            labels (Optional[list[str]], optional): labels to set for the\
+                span. Defaults to None.
+            parent_span_context (Optional[LaminarSpanContext], optional): parent\
+                span context to use for the span. See\
+                `Laminar.start_as_current_span` for more information.\
+                Defaults to None.
+            offload_input_serialization (bool, optional): If set to True, the\
+                input is serialized in a worker thread, so that serializing\
+                large inputs does not block the event loop.\
+                Defaults to False.
+        """
+        if not cls.is_initialized():
+            yield trace.NonRecordingSpan(
+                trace.SpanContext(
+                    trace_id=RandomIdGenerator().generate_trace_id(),
+                    span_id=RandomIdGenerator().generate_span_id(),
+                    is_remote=False,
+                )
+            )
+            return
+
+        rollup = get_active_rollup(name)
+        if rollup is not None:
+            serialized_input = None
+            if input is not None and rollup.wants_input():
+                serialized_input = await _aserialize_input(
+                    input, offload_input_serialization
+                )
+            parent_span = trace.get_current_span(context or context_api.get_current())
+            span = trace.NonRecordingSpan(parent_span.get_span_context())
+            with rollup.measure(serialized_input), trace.use_span(span):
+                yield span
+            return
+
+        with get_tracer() as tracer:
+            ctx = context or context_api.get_current()
+            if parent_span_context is not None:
+                span_context = LaminarSpanContext.try_to_otel_span_context(
+                    parent_span_context, cls.__logger
+                )
+                ctx = trace.set_span_in_context(
+                    trace.NonRecordingSpan(span_context), ctx
+                )
+            label_props = {}
+            if labels:
+                label_props = {f"{ASSOCIATION_PROPERTIES}.labels": labels}
+            span = tracer.start_span(
+                name,
+                context=ctx,
+                attributes={
+                    SPAN_TYPE: span_type,
+                    **(label_props),
+                },
+            )
+
+        ctx_token = attach(trace.set_span_in_context(span, ctx))
+        try:
+            if input is not None:
+                span.set_attribute(
+                    SPAN_INPUT,
+                    await _aserialize_input(input, offload_input_serialization),
+                )
+            yield span
+        except BaseException as e:
+            # same as `tracer.start_as_current_span` does in the sync version
+            span.record_exception(e, escaped=True)
+            span.set_status(
+                trace.Status(trace.StatusCode.ERROR, f"{type(e).__name__}: {e}")
+            )
+            raise
+        finally:
+            span.end()
+            try:
+                detach(ctx_token)
+            except Exception:
+                # The block was exited in a different context than the one
+                # it was entered in, e.g. the context manager was passed to
+                # another task. The context of the original task is
+                # discarded with it, so there is nothing to restore.
+                pass
+
+    @classmethod
+    @contextmanager
+    def rollup(cls, name: str, max_sampled_inputs: int = 3):
+        """Aggregate the spans named `name` created within this `with` context
+        into a single span. Useful for tight loops over many small calls, e.g.
+        tool calls or retrievals, that would otherwise produce hundreds of
+        tiny spans.
+
+        The resulting span carries the number of calls, the total, min, max,
+        and p95 durations in nanoseconds, the number of calls that raised an
+        exception, and the inputs of the first `max_sampled_inputs` calls.
+        Only spans created with `@observe` or `Laminar.start_as_current_span`
+        are aggregated.
+
+        Usage example:
+        ```python
+        @observe()
+        def rerank(document):
+            ...
+
+        with Laminar.rollup("rerank"):
+            for document in documents:
+                rerank(document)
+        ```
+
+        Args:
+            name (str): name of the spans to aggregate, and of the resulting\
+                span.
+            max_sampled_inputs (int, optional): number of inputs to keep\
+                on the resulting span. Defaults to 3.
+        """
+        if not cls.is_initialized():
+            yield
+            return
+
+        rollup = SpanRollup(name, max_sampled_inputs=max_sampled_inputs)
+        rollups = context_api.get_value(ROLLUPS_CONTEXT_KEY) or {}
+        ctx_token = attach(
+            context_api.set_value(ROLLUPS_CONTEXT_KEY, {**rollups, name: rollup})
+        )
+        try:
+            yield
+        finally:
+            detach(ctx_token)
+            if rollup.count > 0:
+                with get_tracer() as tracer:
+                    span = tracer.start_span(
+                        name,
+                        start_time=rollup.start_time,
+                        attributes={
+                            SPAN_TYPE: "DEFAULT",
+                            **rollup.to_attributes(),
+                        },
+                    )
+                    span.end(end_time=rollup.end_time)
+
+    @classmethod
+    def record_spans(
+        cls, spans: list[Union[SpanSpec, dict[str, Any]]]
+    ) -> list[LaminarSpanContext]:
+        """Record a batch of already finished, pre-timed spans, e.g. work
+        timed by another system or replayed from a log. The spans are not
+        started or attached to the context, they are sent to the span
+        processor directly, so this is much cheaper than opening and closing
+        a span for each of them.
+
+        Usage example:
+        ```python
+        Laminar.record_spans([
+            {"name": "batch", "start_time": t0, "end_time": t3},
+            {"name": "item", "start_time": t0, "end_time": t1, "parent": 0},
+            {"name": "item", "start_time": t1, "end_time": t3, "parent": 0},
+        ])
+        ```
+
+        Args:
+            spans (list[Union[SpanSpec, dict[str, Any]]]): the spans to\
+                record. A span's `parent` can refer to an earlier span in\
+                the batch by its index. See `SpanSpec` for all fields.
+
+        Returns:
+            list[LaminarSpanContext]: the span contexts of the recorded spans,\
+                in the same order as `spans`. Empty if Laminar is not\
+                initialized.
+        """
+        if not cls.is_initialized():
+            return []
+
+        specs = [
+            spec if isinstance(spec, SpanSpec) else SpanSpec.model_validate(spec)
+            for spec in spans
+        ]
+        current_span_context = trace.get_current_span().get_span_context()
+        default_parent = (
+            current_span_context if current_span_context.is_valid else None
+        )
+        wrapper = TracerWrapper()
+        id_generator = RandomIdGenerator()
+        span_contexts: list[trace.SpanContext] = []
+        for index, spec in enumerate(specs):
+            if isinstance(spec.parent, int):
+                if not 0 <= spec.parent < index:
+                    raise ValueError(
+                        f"Span {index} refers to parent {spec.parent}, which "
+                        "is not an earlier span in the batch"
+                    )
+                parent = span_contexts[spec.parent]
+            elif spec.parent is not None:
+                parent = LaminarSpanContext.try_to_otel_span_context(
+                    spec.parent, cls.__logger
+                )
+            else:
+                parent = default_parent
+
+            span_context = trace.SpanContext(
+                trace_id=(
+                    parent.trace_id if parent else id_generator.generate_trace_id()
+                ),
+                span_id=id_generator.generate_span_id(),
+                is_remote=False,
+                trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED),
+            )
+            span_contexts.append(span_context)
+
+            attributes = {SPAN_TYPE: spec.span_type}
+            for key, value in spec.attributes.items():
+                attributes[key.value if isinstance(key, Attributes) else key] = value
+            if spec.input is not None:
+                attributes[SPAN_INPUT] = _serialize_input(spec.input)
+            if spec.output is not None:
+                attributes[SPAN_OUTPUT] = _serialize_output(spec.output)
+
+            wrapper.record_span(
+                spec.name,
+                span_context,
+                parent,
+                attributes,
+                start_time=spec.start_time,
+                end_time=spec.end_time,
+                status=(
+                    Status(StatusCode.ERROR, spec.error)
+                    if spec.error is not None
+                    else None
+                ),
+            )
+
+        return [
+            LaminarSpanContext(
+                trace_id=uuid.UUID(int=span_context.trace_id),
+                span_id=uuid.UUID(int=span_context.span_id),
+                is_remote=False,
+            )
+            for span_context in span_contexts
+        ]
+
     @classmethod
     @contextmanager
     def with_labels(cls, labels: list[str], context: Optional[Context] = None):
@@ -486,14 +922,7 @@ class Laminar:
         """
         span = trace.get_current_span()
         if output is not None and span != trace.INVALID_SPAN:
-            serialized_output = json_dumps(output)
-            if len(serialized_output) > MAX_MANUAL_SPAN_PAYLOAD_SIZE:
-                span.set_attribute(
-                    SPAN_OUTPUT,
-                    "Laminar: output too large to record",
-                )
-            else:
-                span.set_attribute(SPAN_OUTPUT, serialized_output)
+            span.set_attribute(SPAN_OUTPUT, _serialize_output(output))
 
     @classmethod
     @contextmanager
@@ -587,6 +1016,41 @@ class Laminar:
             trace_id=uuid.UUID(int=span.get_span_context().trace_id),
             span_id=uuid.UUID(int=span.get_span_context().span_id),
             is_remote=span.get_span_context().is_remote,
+            trace_flags=span.get_span_context().trace_flags,
+        )
+
+    @classmethod
+    def get_current_trace_usage(cls) -> TraceUsage:
+        """Get the token usage, cost, and number of LLM and tool calls of the
+        spans of the current trace that have ended so far. Useful for budget
+        checks in agent loops without a round trip to the backend. Costs are
+        only known for spans that report them, or if Laminar is initialized
+        with `compute_costs=True`.
+
+        The totals are also set as `lmnr.trace.usage.*` attributes on the root
+        span of the trace when it ends.
+
+        Example:
+        ```python
+        with Laminar.start_as_current_span("agent"):
+            while not done:
+                step()
+                if Laminar.get_current_trace_usage().cost > MAX_COST:
+                    break
+        ```
+        """
+        span_context = trace.get_current_span().get_span_context()
+        if not cls.is_initialized() or not span_context.is_valid:
+            return TraceUsage()
+        usage = TracerWrapper().get_trace_usage(span_context.trace_id)
+        if usage is None:
+            return TraceUsage()
+        return TraceUsage(
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cost=usage.cost,
+            llm_calls=usage.llm_calls,
+            tool_calls=usage.tool_calls,
         )
 
     @classmethod
@@ -599,9 +1063,15 @@ class Laminar:
         return span_context.model_dump()
 
     @classmethod
-    def serialize_span_context(cls, span: Optional[trace.Span] = None) -> Optional[str]:
+    def serialize_span_context(
+        cls, span: Optional[trace.Span] = None, compact: bool = False
+    ) -> Optional[str]:
         """Get the laminar span context for a given span as a string.
         If no span is provided, the current active span will be used.
+        If `compact` is True, the span context is serialized as a W3C
+        `traceparent` string, which is shorter and much faster to parse
+        than the default JSON. Both forms are accepted by
+        `Laminar.deserialize_span_context` and `parent_span_context`.
 
         This is useful for continuing a trace across services.
 
@@ -627,6 +1097,14 @@ class Laminar:
           service_b
         ```
         """
+        if compact:
+            span = span or trace.get_current_span()
+            if span == trace.INVALID_SPAN:
+                return None
+            span_context = span.get_span_context()
+            return encode_traceparent(
+                span_context.trace_id, span_context.span_id, span_context.trace_flags
+            )
         span_context = cls.get_laminar_span_context(span)
         if span_context is None:
             return None
@@ -724,3 +1202,34 @@ class Laminar:
             TRACE_TYPE: trace_type.value,
         }
         update_association_properties(association_properties)
+
+
+def _get_price_table(
+    model_prices: Optional[Union[str, dict[str, tuple[float, float]]]],
+) -> PriceTable:
+    if isinstance(model_prices, str):
+        return PriceTable.from_file(model_prices)
+    price_table = PriceTable.default()
+    if model_prices:
+        price_table = price_table.with_overrides(model_prices)
+    return price_table
+
+
+def _serialize_input(input: Any) -> str:
+    serialized_input = json_dumps(input)
+    if len(serialized_input) > MAX_MANUAL_SPAN_PAYLOAD_SIZE:
+        return "Laminar: input too large to record"
+    return serialized_input
+
+
+def _serialize_output(output: Any) -> str:
+    serialized_output = json_dumps(output)
+    if len(serialized_output) > MAX_MANUAL_SPAN_PAYLOAD_SIZE:
+        return "Laminar: output too large to record"
+    return serialized_output
+
+
+async def _aserialize_input(input: Any, offload: bool = False) -> str:
+    if offload:
+        return await asyncio.to_thread(_serialize_input, input)
+    return _serialize_input(input)
@@ -0,0 +1,239 @@
+import multiprocessing
+import threading
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, NamedTuple, Optional, Sequence, Set
+
+from opentelemetry import context as context_api, trace
+from opentelemetry.sdk.trace import Event, ReadableSpan
+from opentelemetry.sdk.trace.export import (
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.trace import NonRecordingSpan, SpanContext, Status, StatusCode
+
+from lmnr.openllmetry_sdk import TracerManager
+from lmnr.openllmetry_sdk.instruments import Instruments
+from lmnr.openllmetry_sdk.tracing.tracing import TracerWrapper
+from lmnr.sdk.eval_control import PREPARE_ONLY
+from lmnr.sdk.log import get_default_logger
+from lmnr.sdk.traceparent import decode_traceparent, encode_traceparent
+
+logger = get_default_logger(__name__)
+
+
+class WorkerSpan(NamedTuple):
+    """A finished span from a worker process, in a picklable form."""
+
+    name: str
+    trace_id: int
+    span_id: int
+    trace_flags: int
+    parent_span_id: Optional[int]
+    attributes: dict[str, Any]
+    start_time: int
+    end_time: int
+    status_code: int
+    status_description: Optional[str]
+    events: list[tuple[str, dict[str, Any], int]]
+
+    @classmethod
+    def from_span(cls, span: ReadableSpan) -> "WorkerSpan":
+        return cls(
+            name=span.name,
+            trace_id=span.context.trace_id,
+            span_id=span.context.span_id,
+            trace_flags=span.context.trace_flags,
+            parent_span_id=span.parent.span_id if span.parent else None,
+            attributes=dict(span.attributes or {}),
+            start_time=span.start_time,
+            end_time=span.end_time,
+            status_code=span.status.status_code.value,
+            status_description=span.status.description,
+            events=[
+                (event.name, dict(event.attributes or {}), event.timestamp)
+                for event in span.events
+            ],
+        )
+
+    def record(self) -> None:
+        """Send the span to the span processor of this process."""
+        parent = (
+            SpanContext(
+                trace_id=self.trace_id,
+                span_id=self.parent_span_id,
+                is_remote=False,
+                trace_flags=trace.TraceFlags(self.trace_flags),
+            )
+            if self.parent_span_id
+            else None
+        )
+        TracerWrapper().record_span(
+            self.name,
+            SpanContext(
+                trace_id=self.trace_id,
+                span_id=self.span_id,
+                is_remote=False,
+                trace_flags=trace.TraceFlags(self.trace_flags),
+            ),
+            parent,
+            self.attributes,
+            self.start_time,
+            self.end_time,
+            Status(StatusCode(self.status_code), self.status_description),
+            [
+                Event(name, attributes, timestamp)
+                for name, attributes, timestamp in self.events
+            ],
+        )
+
+
+class _WorkerResult(NamedTuple):
+    value: Any
+    error: Optional[Exception]
+    spans: list[WorkerSpan]
+
+
+class _CollectingSpanExporter(SpanExporter):
+    def __init__(self) -> None:
+        self._spans: list[ReadableSpan] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        with self._lock:
+            self._spans.extend(spans)
+        return SpanExportResult.SUCCESS
+
+    def pop(self) -> list[ReadableSpan]:
+        with self._lock:
+            spans, self._spans = self._spans, []
+        return spans
+
+    def shutdown(self) -> None:
+        pass
+
+
+# set in worker processes by `_init_worker`
+_collector: Optional[_CollectingSpanExporter] = None
+
+
+def _init_worker(
+    tracing: Optional[dict[str, Any]],
+    initializer: Optional[Callable[..., Any]],
+    initargs: tuple,
+) -> None:
+    global _collector
+    # Unpickling a function imports its module, e.g. an evaluation file, and
+    # the evaluations it defines must not run in the workers
+    PREPARE_ONLY.set(True)
+    if tracing is not None:
+        _collector = _CollectingSpanExporter()
+        TracerManager.init(
+            processor=SimpleSpanProcessor(_collector),
+            **tracing,
+        )
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _call_in_worker(
+    fn: Callable[..., Any], traceparent: Optional[str], args: tuple, kwargs: dict
+) -> _WorkerResult:
+    span_context = decode_traceparent(traceparent) if traceparent else None
+    ctx_token = (
+        context_api.attach(trace.set_span_in_context(NonRecordingSpan(span_context)))
+        if span_context is not None
+        else None
+    )
+    value, error = None, None
+    try:
+        value = fn(*args, **kwargs)
+    except Exception as e:
+        error = e
+    finally:
+        if ctx_token is not None:
+            context_api.detach(ctx_token)
+    spans = (
+        [WorkerSpan.from_span(span) for span in _collector.pop()]
+        if _collector is not None
+        else []
+    )
+    return _WorkerResult(value, error, spans)
+
+
+class TracedProcessPoolExecutor(ProcessPoolExecutor):
+    """A `ProcessPoolExecutor` for CPU-bound functions that continues the
+    trace of the submitting span in the worker processes.
+
+    Workers are started with the `spawn` method, so that they don't inherit
+    the threads and exporters of the parent, and run `initializer(*initargs)`
+    once after tracing is set up. The current span context is sent along with
+    each task, spans started in the worker (e.g. by `@observe` or auto
+    instrumentation) are collected there, and sent back with the result to
+    be exported by the parent process as children of the submitting span.
+
+    Functions and their arguments and results must be picklable, i.e. the
+    functions must be defined at the top level of a module that the workers
+    can import by name. Importing the module in a worker does not run the
+    evaluations defined in it.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        initializer: Optional[Callable[..., Any]] = None,
+        initargs: tuple = (),
+        project_api_key: Optional[str] = None,
+        base_http_url: Optional[str] = None,
+        instruments: Optional[Set[Instruments]] = None,
+    ):
+        tracing = (
+            {
+                "project_api_key": project_api_key,
+                "base_http_url": base_http_url,
+                "instruments": instruments,
+            }
+            if TracerWrapper.verify_initialized()
+            else None
+        )
+        super().__init__(
+            max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(tracing, initializer, initargs),
+        )
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        span_context = trace.get_current_span().get_span_context()
+        traceparent = (
+            encode_traceparent(
+                span_context.trace_id, span_context.span_id, span_context.trace_flags
+            )
+            if span_context.is_valid
+            else None
+        )
+        worker_future = super().submit(_call_in_worker, fn, traceparent, args, kwargs)
+        future = Future()
+
+        def on_done(worker_future: Future) -> None:
+            try:
+                result: _WorkerResult = worker_future.result()
+            except BaseException as e:
+                future.set_exception(e)
+                return
+            try:
+                if TracerWrapper.verify_initialized():
+                    # parents start before their children, and must be
+                    # recorded first
+                    for span in sorted(result.spans, key=lambda s: s.start_time):
+                        span.record()
+            except Exception as e:
+                logger.warning(f"Failed to record spans from a worker process: {e}")
+            if result.error is not None:
+                future.set_exception(result.error)
+            else:
+                future.set_result(result.value)
+
+        worker_future.add_done_callback(on_done)
+        return future
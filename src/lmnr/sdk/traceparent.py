@@ -0,0 +1,62 @@
+"""A compact, W3C `traceparent` compatible encoding of span contexts,
+e.g. `00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01`.
+
+Both directions are cached, since the same few contexts are usually encoded
+and parsed on every call between services.
+"""
+
+import functools
+from typing import Optional
+
+from opentelemetry.trace import SpanContext, TraceFlags
+
+_VERSION = "00"
+_TRACEPARENT_LENGTH = 55
+_HEX_DIGITS = frozenset("0123456789abcdef")
+
+
+@functools.lru_cache(maxsize=1024)
+def encode_traceparent(trace_id: int, span_id: int, trace_flags: int = 1) -> str:
+    return f"{_VERSION}-{trace_id:032x}-{span_id:016x}-{trace_flags:02x}"
+
+
+def is_traceparent(value: str) -> bool:
+    """Cheap check to tell a traceparent from other serialized forms, such
+    as the JSON produced by `LaminarSpanContext.__str__`."""
+    return (
+        len(value) >= _TRACEPARENT_LENGTH
+        and value[2] == "-"
+        and value[35] == "-"
+        and value[52] == "-"
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def decode_traceparent(value: str) -> Optional[SpanContext]:
+    """Parse a traceparent into a remote span context. Returns None if the
+    value is not a valid traceparent."""
+    if not is_traceparent(value):
+        return None
+    version = value[:2]
+    if version == "ff" or not _HEX_DIGITS.issuperset(version):
+        return None
+    # versions after 00 may append fields, but must keep the first four
+    if len(value) > _TRACEPARENT_LENGTH and (
+        version == _VERSION or value[_TRACEPARENT_LENGTH] != "-"
+    ):
+        return None
+    trace_id_hex = value[3:35]
+    span_id_hex = value[36:52]
+    flags_hex = value[53:55]
+    if not _HEX_DIGITS.issuperset(trace_id_hex + span_id_hex + flags_hex):
+        return None
+    trace_id = int(trace_id_hex, 16)
+    span_id = int(span_id_hex, 16)
+    if trace_id == 0 or span_id == 0:
+        return None
+    return SpanContext(
+        trace_id=trace_id,
+        span_id=span_id,
+        is_remote=True,
+        trace_flags=TraceFlags(int(flags_hex, 16)),
+    )
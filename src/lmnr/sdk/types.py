@@ -8,6 +8,7 @@ import pydantic
 from typing import Any, Awaitable, Callable, Literal, Optional, Union
 import uuid
 
+from .traceparent import decode_traceparent, encode_traceparent, is_traceparent
 from .utils import serialize
 
 
@@ -243,6 +244,22 @@ class TracingLevel(Enum):
     ALL = 2
 
 
+class TraceUsage(pydantic.BaseModel):
+    """Token usage, cost, and number of LLM and tool calls of the spans of a
+    trace that have ended so far. See `Laminar.get_current_trace_usage`.
+    """
+
+    input_tokens: int = pydantic.Field(default=0)
+    output_tokens: int = pydantic.Field(default=0)
+    cost: float = pydantic.Field(default=0.0)
+    llm_calls: int = pydantic.Field(default=0)
+    tool_calls: int = pydantic.Field(default=0)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
 class LaminarSpanContext(pydantic.BaseModel):
     """
     A span context that can be used to continue a trace across services. This
@@ -253,16 +270,39 @@ class LaminarSpanContext(pydantic.BaseModel):
 
     The difference between this and the OpenTelemetry span context is that
     the `trace_id` and `span_id` are stored as UUIDs instead of integers for
-    easier debugging, and the separate trace flags are not currently stored.
+    easier debugging, and the separate trace flags are not stored in the JSON
+    form.
+
+    Besides the JSON form, a span context can be serialized to and read from
+    a compact W3C `traceparent` string, see `to_traceparent`, which keeps the
+    trace flags, i.e. whether the trace is sampled.
     """
 
     trace_id: uuid.UUID
     span_id: uuid.UUID
     is_remote: bool = pydantic.Field(default=False)
+    trace_flags: int = pydantic.Field(default=TraceFlags.SAMPLED, exclude=True)
 
     def __str__(self) -> str:
         return self.model_dump_json()
 
+    def to_traceparent(self) -> str:
+        return encode_traceparent(
+            self.trace_id.int, self.span_id.int, self.trace_flags
+        )
+
+    @classmethod
+    def from_traceparent(cls, value: str) -> "LaminarSpanContext":
+        span_context = decode_traceparent(value)
+        if span_context is None:
+            raise ValueError("Invalid traceparent provided")
+        return cls(
+            trace_id=uuid.UUID(int=span_context.trace_id),
+            span_id=uuid.UUID(int=span_context.span_id),
+            is_remote=True,
+            trace_flags=span_context.trace_flags,
+        )
+
     @classmethod
     def try_to_otel_span_context(
         cls,
@@ -277,7 +317,7 @@ class LaminarSpanContext(pydantic.BaseModel):
                 trace_id=span_context.trace_id.int,
                 span_id=span_context.span_id.int,
                 is_remote=span_context.is_remote,
-                trace_flags=TraceFlags(TraceFlags.SAMPLED),
+                trace_flags=TraceFlags(span_context.trace_flags),
             )
         elif isinstance(span_context, SpanContext) or (
             isinstance(getattr(span_context, "trace_id", None), int)
@@ -289,6 +329,11 @@ class LaminarSpanContext(pydantic.BaseModel):
                 "Please use `LaminarSpanContext` instead."
             )
             return span_context
+        elif isinstance(span_context, str) and is_traceparent(span_context):
+            otel_span_context = decode_traceparent(span_context)
+            if otel_span_context is None:
+                raise ValueError("Invalid span_context provided")
+            return otel_span_context
         elif isinstance(span_context, dict) or isinstance(span_context, str):
             try:
                 laminar_span_context = cls.deserialize(span_context)
@@ -314,11 +359,39 @@ class LaminarSpanContext(pydantic.BaseModel):
             }
             return cls.model_validate(converted_data)
         elif isinstance(data, str):
+            if is_traceparent(data):
+                return cls.from_traceparent(data)
             return cls.deserialize(json.loads(data))
         else:
             raise ValueError("Invalid span_context provided")
 
 
+class SpanSpec(pydantic.BaseModel):
+    """
+    A pre-timed span to be recorded with `Laminar.record_spans`.
+
+    `parent` is either the index of an earlier spec in the same batch, or a
+    span context to attach the span to. If not set, the span is attached to
+    the current span, if any.
+    """
+
+    name: str
+    start_time: int  # nanoseconds since epoch
+    end_time: int  # nanoseconds since epoch
+    input: Any = pydantic.Field(default=None)
+    output: Any = pydantic.Field(default=None)
+    span_type: Literal["DEFAULT", "LLM", "TOOL"] = pydantic.Field(default="DEFAULT")
+    attributes: dict[str, Any] = pydantic.Field(default_factory=dict)
+    parent: Optional[Union[int, LaminarSpanContext]] = pydantic.Field(default=None)
+    error: Optional[str] = pydantic.Field(default=None)
+
+    @pydantic.model_validator(mode="after")
+    def _check_times(self) -> "SpanSpec":
+        if self.end_time < self.start_time:
+            raise ValueError("end_time must not be before start_time")
+        return self
+
+
 class ModelProvider(str, Enum):
     ANTHROPIC = "anthropic"
     BEDROCK = "bedrock"
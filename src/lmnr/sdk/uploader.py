@@ -0,0 +1,162 @@
+import asyncio
+import uuid
+
+from typing import Optional, Union
+
+from lmnr.sdk.client.asynchronous.resources.evals import AsyncEvals
+from lmnr.sdk.log import get_default_logger
+from lmnr.sdk.types import EvaluationResultDatapoint, PartialEvaluationDatapoint
+
+DEFAULT_UPLOAD_BATCH_SIZE = 100
+DEFAULT_UPLOAD_FLUSH_INTERVAL_MS = 200
+DEFAULT_MAX_IN_FLIGHT_UPLOADS = 4
+DEFAULT_UPLOAD_QUEUE_SIZE = 1000
+
+UploadDatapoint = Union[EvaluationResultDatapoint, PartialEvaluationDatapoint]
+
+
+class DatapointUploader:
+    """Coalesces the datapoints of an evaluation into batched, gzip-compressed
+    `save_datapoints` requests in the background.
+
+    A batch is sent once it has `max_batch_size` points, or `flush_interval_ms`
+    after its first point was added, whichever comes first. At most
+    `max_in_flight` requests are sent at a time. A batch that contains a point
+    with the same id as a point in an earlier batch (i.e. the final result of
+    a datapoint whose partial record is still being sent) is only sent after
+    that earlier batch, so the server always sees the partial record first.
+
+    At most `max_queue_size` datapoints are held at a time, counting both
+    those waiting for a batch and those being sent. `put` waits for room, so
+    that callers slow down when the uploads fall behind, instead of the
+    memory growing without bound. A failed request is logged right away, and
+    raised by the next call to `put` or `flush`.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        evals: AsyncEvals,
+        eval_id: uuid.UUID,
+        group_name: Optional[str] = None,
+        max_batch_size: int = DEFAULT_UPLOAD_BATCH_SIZE,
+        flush_interval_ms: int = DEFAULT_UPLOAD_FLUSH_INTERVAL_MS,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT_UPLOADS,
+        max_queue_size: int = DEFAULT_UPLOAD_QUEUE_SIZE,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size must be at least 1")
+        self._evals = evals
+        self._eval_id = eval_id
+        self._group_name = group_name
+        self._max_batch_size = max_batch_size
+        self._flush_interval_seconds = max(flush_interval_ms, 0) / 1000
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._queue_slots = asyncio.Semaphore(max_queue_size)
+        self._pending: list[tuple[UploadDatapoint, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        # id of a datapoint -> future that is done once the last batch
+        # containing it has been sent
+        self._last_batch: dict[uuid.UUID, asyncio.Future] = {}
+        self._errors: list[Exception] = []
+        self._logger = get_default_logger(self.__class__.__name__)
+
+    async def put(self, datapoint: UploadDatapoint) -> asyncio.Future:
+        """Add a datapoint to the next batch. Waits while the queue is full.
+
+        Returns:
+            asyncio.Future: Done once the batch with the datapoint has been\
+                sent, or has failed.
+
+        Raises:
+            Exception: The first error of a failed request since the last\
+                call to `put` or `flush`.
+        """
+        self._raise_error()
+        await self._queue_slots.acquire()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((datapoint, future))
+        if len(self._pending) >= self._max_batch_size:
+            self._send_pending()
+        elif self._timer is None:
+            self._timer = loop.call_later(
+                self._flush_interval_seconds, self._send_pending
+            )
+        return future
+
+    async def flush(self) -> None:
+        """Send all pending datapoints and wait for all requests to complete.
+
+        Raises:
+            Exception: The first error of a failed request since the last flush.
+        """
+        self._send_pending()
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self._errors:
+            error = self._errors[0]
+            self._errors = []
+            raise error
+
+    def _send_pending(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+
+        loop = asyncio.get_running_loop()
+        sent = loop.create_future()
+        dependencies = set()
+        for datapoint, _ in batch:
+            # points of the same datapoint within a batch are sent in order
+            previous = self._last_batch.get(datapoint.id)
+            if previous is not None and previous is not sent:
+                dependencies.add(previous)
+            self._last_batch[datapoint.id] = sent
+
+        task = loop.create_task(self._send(batch, dependencies, sent))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(
+        self,
+        batch: list[tuple[UploadDatapoint, asyncio.Future]],
+        dependencies: set[asyncio.Future],
+        sent: asyncio.Future,
+    ) -> None:
+        try:
+            # Earlier batches never wait for later ones, so this can't deadlock
+            if dependencies:
+                await asyncio.wait(dependencies)
+            async with self._in_flight:
+                await self._evals.save_datapoints(
+                    self._eval_id,
+                    [datapoint for datapoint, _ in batch],
+                    self._group_name,
+                    compress=True,
+                )
+        except Exception as e:
+            self._logger.warning(
+                f"Failed to upload {len(batch)} evaluation datapoints: {e}"
+            )
+            self._errors.append(e)
+        finally:
+            sent.set_result(None)
+            for datapoint, future in batch:
+                self._queue_slots.release()
+                if not future.done():
+                    future.set_result(None)
+                if self._last_batch.get(datapoint.id) is sent:
+                    del self._last_batch[datapoint.id]
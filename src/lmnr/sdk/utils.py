@@ -88,19 +88,35 @@ def get_input_from_func_args(
     is_method: bool = False,
     func_args: list[typing.Any] = [],
     func_kwargs: dict[str, typing.Any] = {},
+    fields: typing.Optional[typing.Collection[str]] = None,
+    param_names: typing.Optional[typing.Sequence[str]] = None,
 ) -> dict[str, typing.Any]:
+    # `param_names` can be computed once per function with `get_param_names`,
+    # `inspect.signature` is relatively expensive
+    if param_names is None:
+        param_names = get_param_names(func)
     # Remove implicitly passed "self" or "cls" argument for
     # instance or class methods
-    res = func_kwargs.copy()
-    for i, k in enumerate(inspect.signature(func).parameters.keys()):
+    if fields is None:
+        res = func_kwargs.copy()
+    else:
+        res = {k: v for k, v in func_kwargs.items() if k in fields}
+    for i, k in enumerate(param_names):
         if is_method and k in ["self", "cls"]:
             continue
+        # Only bind the selected arguments, if any
+        if fields is not None and k not in fields:
+            continue
         # If param has default value, then it's not present in func args
         if i < len(func_args):
             res[k] = func_args[i]
     return res
 
 
+def get_param_names(func: typing.Callable) -> tuple[str, ...]:
+    return tuple(inspect.signature(func).parameters.keys())
+
+
 def from_env(key: str) -> typing.Optional[str]:
     if val := os.getenv(key):
         return val
@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import NonRecordingSpan, SpanContext
+
+from lmnr import Attributes
+from lmnr.openllmetry_sdk.tracing.costs import CostCalculator, PriceTable
+
+
+@pytest.fixture
+def tracer_and_exporter():
+    exporter = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return tracer_provider.get_tracer("test"), exporter
+
+
+def _llm_attributes(model: str, input_tokens: int, output_tokens: int) -> dict:
+    return {
+        Attributes.PROVIDER.value: "openai",
+        Attributes.REQUEST_MODEL.value: model,
+        Attributes.INPUT_TOKEN_COUNT.value: input_tokens,
+        Attributes.OUTPUT_TOKEN_COUNT.value: output_tokens,
+    }
+
+
+def test_price_table_lookup():
+    price_table = PriceTable({"gpt-4o": (2.5, 10.0)}, version="test")
+    assert price_table.get("gpt-4o") == (2.5e-6, 10e-6)
+    assert price_table.get("gpt-4o-2024-08-06") == (2.5e-6, 10e-6)
+    assert price_table.get("openai/gpt-4o") == (2.5e-6, 10e-6)
+    assert price_table.get("gpt-5") is None
+
+    overridden = price_table.with_overrides({"gpt-4o": (1.0, 2.0)})
+    assert overridden.get("gpt-4o") == (1e-6, 2e-6)
+    assert PriceTable.default().get("claude-3-5-sonnet-20241022") == (3e-6, 15e-6)
+
+
+def test_price_table_from_file(tmp_path):
+    path = tmp_path / "prices.json"
+    path.write_text(
+        json.dumps({"version": "v2", "prices": {"my-model": [1.0, 4.0]}})
+    )
+    price_table = PriceTable.from_file(str(path))
+    assert price_table.version == "v2"
+    assert price_table.get("my-model") == (1e-6, 4e-6)
+
+
+def test_cost_calculator_rollup(tracer_and_exporter):
+    tracer, exporter = tracer_and_exporter
+    calculator = CostCalculator(PriceTable({"model": (1.0, 2.0)}))
+
+    with tracer.start_as_current_span("agent"):
+        with tracer.start_as_current_span("step"):
+            with tracer.start_as_current_span(
+                "llm", attributes=_llm_attributes("model", 1_000_000, 500_000)
+            ):
+                pass
+            with tracer.start_as_current_span(
+                "llm", attributes={Attributes.TOTAL_COST.value: 0.5}
+            ):
+                pass
+        with tracer.start_as_current_span(
+            "unknown_model", attributes=_llm_attributes("other", 10, 10)
+        ):
+            pass
+
+    cost_attributes = {}
+    for span in exporter.get_finished_spans():
+        cost_attributes.setdefault(span.name, []).append(calculator.on_end(span))
+
+    computed, reported = cost_attributes["llm"]
+    assert computed == {
+        "gen_ai.usage.input_cost": 1.0,
+        "gen_ai.usage.output_cost": 1.0,
+        "gen_ai.usage.cost": 2.0,
+        "lmnr.span.total_cost": 2.0,
+    }
+    assert reported == {"lmnr.span.total_cost": 0.5}
+    assert cost_attributes["step"] == [{"lmnr.span.total_cost": 2.5}]
+    assert cost_attributes["unknown_model"] == [{}]
+    assert cost_attributes["agent"] == [{"lmnr.span.total_cost": 2.5}]
+    assert calculator._descendants_cost == {}
+
+
+def test_cost_calculator_drops_costs_of_parents_that_never_end(
+    tracer_and_exporter,
+):
+    tracer, exporter = tracer_and_exporter
+    calculator = CostCalculator(PriceTable({"model": (1.0, 2.0)}))
+
+    with tracer.start_as_current_span("root") as root:
+        root_context = root.get_span_context()
+        # e.g. a parent that was started in another process
+        parent = NonRecordingSpan(
+            SpanContext(
+                trace_id=root_context.trace_id,
+                span_id=0x1234,
+                is_remote=False,
+                trace_flags=root_context.trace_flags,
+            )
+        )
+        with tracer.start_as_current_span(
+            "llm",
+            context=trace.set_span_in_context(parent),
+            attributes={Attributes.TOTAL_COST.value: 0.5},
+        ):
+            pass
+
+    [llm_span, root_span] = exporter.get_finished_spans()
+    assert calculator.on_end(llm_span) == {"lmnr.span.total_cost": 0.5}
+    assert calculator._descendants_cost == {root_context.trace_id: {0x1234: 0.5}}
+    assert calculator.on_end(root_span) == {}
+    assert calculator._descendants_cost == {}
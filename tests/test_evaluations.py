@@ -0,0 +1,509 @@
+import asyncio
+import datetime
+import json
+import os
+import pytest
+import sqlite3
+import sys
+import textwrap
+import threading
+import uuid
+
+from lmnr import ExecutorCache, observe
+from lmnr.cli import load_evaluation_file
+from lmnr.sdk.eval_control import EVALUATION_INSTANCE, PREPARE_ONLY
+from lmnr.sdk.evaluations import Evaluation
+from lmnr.sdk.types import EvaluationResultDatapoint, InitEvaluationResponse
+from lmnr.sdk.uploader import DatapointUploader
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+
+class FakeEvals:
+    """Records the datapoints instead of sending them to the Laminar API."""
+
+    def __init__(self):
+        self.saved = []
+
+    async def init(self, name=None, group_name=None):
+        return InitEvaluationResponse(
+            id=uuid.uuid4(),
+            createdAt=datetime.datetime.now(),
+            groupId="default",
+            name=name or "test",
+            projectId=uuid.uuid4(),
+        )
+
+    async def save_datapoints(self, eval_id, datapoints, group_name=None, **kwargs):
+        self.saved.extend(datapoints)
+
+
+class FakeClient:
+    def __init__(self):
+        self._evals = FakeEvals()
+
+    async def close(self):
+        pass
+
+
+# defined at the top level, so that they can be run in worker processes
+@observe()
+def square(x):
+    return x * x
+
+
+def process_executor(data):
+    return {"value": square(data), "pid": os.getpid()}
+
+
+def process_evaluator(output, target):
+    return int(output["value"] == target)
+
+
+def make_evaluation(**kwargs) -> Evaluation:
+    evaluation = Evaluation(project_api_key="test_key", **kwargs)
+    evaluation.client = FakeClient()
+    evaluation._uploader = DatapointUploader(
+        evaluation.client._evals, uuid.uuid4(), flush_interval_ms=0
+    )
+    return evaluation
+
+
+@pytest.mark.asyncio
+async def test_evaluators_run_concurrently(exporter: InMemorySpanExporter):
+    async def slow(output, target):
+        await asyncio.sleep(0.2)
+        return 1
+
+    async def fast(output, target):
+        return {"fast_a": 2, "fast_b": 3}
+
+    evaluation = make_evaluation(
+        data=[{"data": "x", "target": "y"}],
+        executor=lambda data: data,
+        evaluators={"slow_1": slow, "fast": fast, "slow_2": slow},
+    )
+    start = asyncio.get_running_loop().time()
+    result = await evaluation._evaluate_datapoint(uuid.uuid4(), evaluation.data[0], 0)
+    elapsed = asyncio.get_running_loop().time() - start
+
+    assert elapsed < 0.35
+    # merged in the order of the evaluators, not in the order of completion
+    assert list(result.scores.items()) == [
+        ("slow_1", 1),
+        ("fast_a", 2),
+        ("fast_b", 3),
+        ("slow_2", 1),
+    ]
+
+    spans = exporter.get_finished_spans()
+    evaluation_span = [span for span in spans if span.name == "evaluation"][0]
+    evaluator_spans = [
+        span for span in spans if span.name in ("slow_1", "fast", "slow_2")
+    ]
+    assert len(evaluator_spans) == 3
+    assert all(
+        span.parent.span_id == evaluation_span.context.span_id
+        for span in evaluator_spans
+    )
+
+
+@pytest.mark.asyncio
+async def test_evaluator_concurrency_limit(exporter: InMemorySpanExporter):
+    running = 0
+    max_running = 0
+
+    async def evaluator(output, target):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return 1
+
+    evaluation = make_evaluation(
+        data=[{"data": i, "target": i} for i in range(3)],
+        executor=lambda data: data,
+        evaluators={f"evaluator_{i}": evaluator for i in range(4)},
+        evaluator_concurrency_limit=2,
+    )
+    await asyncio.gather(
+        *(
+            evaluation._evaluate_datapoint(uuid.uuid4(), datapoint, index)
+            for index, datapoint in enumerate(evaluation.data)
+        )
+    )
+
+    assert max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_evaluator_exception(exporter: InMemorySpanExporter):
+    def failing(output, target):
+        raise ValueError("test")
+
+    evaluation = make_evaluation(
+        data=[{"data": "x", "target": "y"}],
+        executor=lambda data: data,
+        evaluators={"ok": lambda output, target: 1, "failing": failing},
+    )
+    with pytest.raises(ValueError):
+        await evaluation._evaluate_datapoint(uuid.uuid4(), evaluation.data[0], 0)
+
+    spans = exporter.get_finished_spans()
+    assert {span.name for span in spans} >= {"evaluation", "ok", "failing"}
+
+
+def test_evaluator_concurrency_limit_invalid():
+    with pytest.raises(ValueError):
+        make_evaluation(
+            data=[{"data": "x", "target": "y"}],
+            executor=lambda data: data,
+            evaluators={"ok": lambda output, target: 1},
+            evaluator_concurrency_limit=0,
+        )
+
+
+@pytest.mark.asyncio
+async def test_evaluation_run_uploads_in_batches(exporter: InMemorySpanExporter):
+    evaluation = make_evaluation(
+        data=[{"data": i, "target": i} for i in range(10)],
+        executor=lambda data: data,
+        evaluators={"equal": lambda output, target: int(output == target)},
+        upload_batch_size=4,
+    )
+    await evaluation.run()
+
+    saved = evaluation.client._evals.saved
+    assert len(saved) == 20
+    results = [point for point in saved if isinstance(point, EvaluationResultDatapoint)]
+    assert sorted(point.index for point in results) == list(range(10))
+    assert all(point.scores == {"equal": 1} for point in results)
+
+
+@pytest.mark.asyncio
+async def test_evaluation_process_mode(exporter: InMemorySpanExporter):
+    evaluation = make_evaluation(
+        data=[{"data": i, "target": i * i} for i in range(3)],
+        executor=process_executor,
+        evaluators={"correct": process_evaluator},
+        instruments=set(),
+        executor_mode="process",
+        workers=1,
+    )
+    try:
+        results = [
+            await evaluation._evaluate_datapoint(uuid.uuid4(), datapoint, index)
+            for index, datapoint in enumerate(evaluation.data)
+        ]
+    finally:
+        evaluation._sync_functions_executor.shutdown()
+
+    assert all(result.scores == {"correct": 1} for result in results)
+    assert all(result.executor_output["pid"] != os.getpid() for result in results)
+
+    spans = exporter.get_finished_spans()
+    executor_spans = [span for span in spans if span.name == "executor"]
+    square_spans = [span for span in spans if span.name == "square"]
+    assert len(square_spans) == 3
+    for executor_span, square_span in zip(executor_spans, square_spans):
+        assert square_span.context.trace_id == executor_span.context.trace_id
+        assert square_span.parent.span_id == executor_span.context.span_id
+    assert square_spans[0].attributes["lmnr.span.path"] == (
+        "evaluation",
+        "executor",
+        "square",
+    )
+    assert json.loads(square_spans[0].attributes["lmnr.span.output"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_evaluation_process_mode_from_cli(
+    exporter: InMemorySpanExporter, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(sys, "path", sys.path.copy())
+    file = tmp_path / "square_eval.py"
+    file.write_text(
+        textwrap.dedent(
+            """
+            from lmnr import evaluate
+
+            def executor(data):
+                return data * data
+
+            def evaluator(output, target):
+                return int(output == target)
+
+            evaluate(
+                data=[{"data": i, "target": i * i} for i in range(3)],
+                executor=executor,
+                evaluators={"correct": evaluator},
+                project_api_key="test_key",
+                instruments=set(),
+                executor_mode="process",
+                workers=1,
+            )
+            """
+        )
+    )
+    # the same way as `lmnr eval`
+    prep_token = PREPARE_ONLY.set(True)
+    try:
+        assert load_evaluation_file(str(file))
+        evaluation = EVALUATION_INSTANCE.get()
+    finally:
+        PREPARE_ONLY.reset(prep_token)
+    evaluation.client = FakeClient()
+    try:
+        await evaluation.run()
+    finally:
+        sys.modules.pop("square_eval", None)
+
+    results = [
+        point
+        for point in evaluation.client._evals.saved
+        if isinstance(point, EvaluationResultDatapoint)
+    ]
+    assert len(results) == 3
+    assert all(result.scores == {"correct": 1} for result in results)
+
+
+def test_evaluation_executor_mode_invalid():
+    with pytest.raises(ValueError):
+        make_evaluation(
+            data=[{"data": "x", "target": "y"}],
+            executor=lambda data: data,
+            evaluators={"ok": lambda output, target: 1},
+            executor_mode="fiber",
+        )
+
+
+@pytest.mark.asyncio
+async def test_evaluation_thread_pool(exporter: InMemorySpanExporter):
+    evaluation = make_evaluation(
+        data=[{"data": i, "target": i} for i in range(2)],
+        executor=lambda data: data,
+        evaluators={"a": lambda output, target: 1, "b": lambda output, target: 1},
+        concurrency_limit=3,
+    )
+    assert evaluation._sync_functions_executor.max_workers == 6
+    await evaluation.run()
+
+    executor_spans = [
+        span for span in exporter.get_finished_spans() if span.name == "executor"
+    ]
+    assert len(executor_spans) == 2
+    for span in executor_spans:
+        assert span.attributes["lmnr.span.values.executor.queue_wait_ms.count"] == 1
+    # the pool is shut down with the evaluation
+    with pytest.raises(RuntimeError):
+        evaluation._sync_functions_executor.submit(print)
+
+
+@pytest.mark.asyncio
+async def test_evaluation_shutdown_on_error(exporter: InMemorySpanExporter, tmp_path):
+    def executor(data):
+        raise ValueError("test")
+
+    evaluation = make_evaluation(
+        data=[{"data": "x", "target": "y"}],
+        executor=executor,
+        evaluators={"ok": lambda output, target: 1},
+        executor_cache=tmp_path / "cache.db",
+    )
+    with pytest.raises(ValueError):
+        await evaluation.run()
+
+    assert evaluation.is_finished
+    with pytest.raises(RuntimeError):
+        evaluation._sync_functions_executor.submit(print)
+    with pytest.raises(sqlite3.ProgrammingError):
+        evaluation._executor_cache._connection.execute("SELECT 1")
+
+
+def test_evaluation_thread_pool_size():
+    evaluation = make_evaluation(
+        data=[{"data": "x", "target": "y"}],
+        executor=lambda data: data,
+        evaluators={"ok": lambda output, target: 1},
+        thread_pool_size=16,
+    )
+    assert evaluation._sync_functions_executor.max_workers == 16
+    evaluation._sync_functions_executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_evaluation_streams_iterable(exporter: InMemorySpanExporter):
+    pulled = 0
+    max_in_flight = 0
+    in_flight = 0
+
+    def datapoints():
+        nonlocal pulled
+        for i in range(20):
+            pulled += 1
+            yield {"data": i, "target": i}
+
+    async def executor(data):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        # datapoints are pulled only when a slot frees up
+        assert pulled - data <= 3
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return data
+
+    evaluation = make_evaluation(
+        data=datapoints(),
+        executor=executor,
+        evaluators={"equal": lambda output, target: int(output == target)},
+        concurrency_limit=3,
+    )
+    await evaluation.run()
+
+    assert pulled == 20
+    assert max_in_flight == 3
+    assert evaluation.reporter.cli_progress.total is None
+    assert evaluation.reporter.cli_progress.n == 20
+    results = [
+        point
+        for point in evaluation.client._evals.saved
+        if isinstance(point, EvaluationResultDatapoint)
+    ]
+    assert sorted(point.index for point in results) == list(range(20))
+
+
+@pytest.mark.asyncio
+async def test_evaluation_streams_async_iterable(exporter: InMemorySpanExporter):
+    async def datapoints():
+        for i in range(5):
+            await asyncio.sleep(0)
+            yield {"data": i, "target": i}
+
+    evaluation = make_evaluation(
+        data=datapoints(),
+        executor=lambda data: data,
+        evaluators={"equal": lambda output, target: int(output == target)},
+    )
+    evaluation.reporter.start(None)
+    scores = await evaluation._evaluate_in_batches(uuid.uuid4())
+    await evaluation._uploader.flush()
+
+    assert scores == {"equal": 1}
+    assert len(evaluation.client._evals.saved) == 10
+
+
+@pytest.mark.asyncio
+async def test_evaluation_stream_stops_on_error(exporter: InMemorySpanExporter):
+    pulled = 0
+
+    def datapoints():
+        nonlocal pulled
+        while True:
+            pulled += 1
+            yield {"data": pulled}
+
+    def executor(data):
+        if data == 3:
+            raise ValueError("test")
+        return data
+
+    evaluation = make_evaluation(
+        data=datapoints(),
+        executor=executor,
+        evaluators={"ok": lambda output, target: 1},
+        concurrency_limit=2,
+    )
+    evaluation.reporter.start(None)
+    with pytest.raises(ValueError):
+        await evaluation._evaluate_in_batches(uuid.uuid4())
+    assert pulled < 10
+
+
+@pytest.mark.asyncio
+async def test_evaluation_error_waits_for_cancelled_datapoints(
+    exporter: InMemorySpanExporter,
+):
+    cleaned_up = []
+
+    async def executor(data):
+        if data == 1:
+            raise ValueError("test")
+        try:
+            await asyncio.sleep(10)
+        finally:
+            cleaned_up.append(data)
+
+    evaluation = make_evaluation(
+        data=[{"data": 0}, {"data": 1}],
+        executor=executor,
+        evaluators={"ok": lambda output, target: 1},
+        concurrency_limit=2,
+    )
+    evaluation.reporter.start(None)
+    with pytest.raises(ValueError):
+        await evaluation._evaluate_in_batches(uuid.uuid4())
+    assert cleaned_up == [0]
+
+
+@pytest.mark.asyncio
+async def test_evaluation_executor_cache(exporter: InMemorySpanExporter, tmp_path):
+    calls = []
+
+    def executor(data):
+        calls.append(data)
+        return data * 2
+
+    def run_evaluation(data):
+        return make_evaluation(
+            data=[{"data": i, "target": i * 2} for i in data],
+            executor=executor,
+            evaluators={"correct": lambda output, target: int(output == target)},
+            executor_cache=tmp_path / "cache.db",
+        ).run()
+
+    await run_evaluation(range(3))
+    assert calls == [0, 1, 2]
+    exporter.clear()
+
+    await run_evaluation(range(4))
+    assert calls == [0, 1, 2, 3]
+
+    executor_spans = [
+        span for span in exporter.get_finished_spans() if span.name == "executor"
+    ]
+    cached = [
+        span for span in executor_spans if span.attributes.get("lmnr.span.cached")
+    ]
+    assert len(executor_spans) == 4
+    outputs = [json.loads(span.attributes["lmnr.span.output"]) for span in cached]
+    assert sorted(outputs) == [0, 2, 4]
+
+
+@pytest.mark.asyncio
+async def test_evaluation_executor_cache_off_event_loop(
+    exporter: InMemorySpanExporter, tmp_path
+):
+    threads = []
+
+    class RecordingCache(ExecutorCache):
+        def get(self, key, default=None):
+            threads.append(threading.current_thread())
+            return super().get(key, default)
+
+        def set(self, key, value):
+            threads.append(threading.current_thread())
+            super().set(key, value)
+
+    cache = RecordingCache(tmp_path / "cache.db")
+    evaluation = make_evaluation(
+        data=[{"data": i, "target": i} for i in range(3)],
+        executor=lambda data: data,
+        evaluators={"equal": lambda output, target: int(output == target)},
+        executor_cache=cache,
+    )
+    await evaluation.run()
+    cache.close()
+
+    assert len(threads) == 6
+    assert threading.current_thread() not in threads
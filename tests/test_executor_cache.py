@@ -0,0 +1,138 @@
+import os
+import pytest
+import subprocess
+import sys
+
+from lmnr import ExecutorCache
+from lmnr.sdk.executor_cache import get_executor_version
+
+MISS = object()
+
+
+def test_executor_cache_get_set(tmp_path):
+    cache = ExecutorCache(tmp_path / "cache.db")
+    key = ExecutorCache.key({"question": "2 + 2?"}, "v1")
+
+    assert cache.get(key, MISS) is MISS
+    cache.set(key, {"answer": 4})
+    assert cache.get(key) == {"answer": 4}
+    # None is a valid output
+    cache.set("none", None)
+    assert cache.get("none", MISS) is None
+    assert len(cache) == 2
+
+
+def test_executor_cache_persists(tmp_path):
+    cache = ExecutorCache(tmp_path / "cache.db")
+    cache.set("key", [1, 2, 3])
+    cache.close()
+
+    cache = ExecutorCache(tmp_path / "cache.db")
+    assert cache.get("key") == [1, 2, 3]
+    assert len(cache) == 1
+
+
+def test_executor_cache_key():
+    # stable regardless of the order of the keys
+    assert ExecutorCache.key({"a": 1, "b": 2}, "v1") == ExecutorCache.key(
+        {"b": 2, "a": 1}, "v1"
+    )
+    assert ExecutorCache.key({"a": 1}, "v1") != ExecutorCache.key({"a": 1}, "v2")
+    assert ExecutorCache.key({"a": 1}, "v1") != ExecutorCache.key({"a": 2}, "v1")
+    # mixed key types can't be sorted, and 1 and "1" are different keys
+    assert ExecutorCache.key({1: "a", "b": 2}, "v1") is not None
+    assert ExecutorCache.key({1: "a"}, "v1") != ExecutorCache.key({"1": "a"}, "v1")
+    # sets are iterated in an order that changes across runs
+    assert ExecutorCache.key({"a": {"x", "y", 1}}, "v1") == ExecutorCache.key(
+        {"a": {1, "y", "x"}}, "v1"
+    )
+    # the default repr contains the address of the object
+    assert ExecutorCache.key({"a": object()}, "v1") is None
+
+
+def test_executor_cache_key_stable_across_runs():
+    code = (
+        "from lmnr import ExecutorCache;"
+        "print(ExecutorCache.key({'a': {'x', 'y', 'z'}, 1: 'b'}, 'v1'))"
+    )
+    keys = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            env={**os.environ, "PYTHONHASHSEED": str(seed)},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in range(3)
+    }
+    assert len(keys) == 1
+
+
+def test_executor_cache_evicts_least_recently_used(tmp_path):
+    cache = ExecutorCache(tmp_path / "cache.db", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b", MISS) is MISS
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_executor_cache_evicts_by_size(tmp_path):
+    cache = ExecutorCache(tmp_path / "cache.db", max_size_bytes=2500)
+    for key in "abc":
+        cache.set(key, b"x" * 1000)
+
+    assert len(cache) == 2
+    assert cache.get("a", MISS) is MISS
+    # larger than the whole cache, not stored
+    cache.set("d", b"x" * 3000)
+    assert cache.get("d", MISS) is MISS
+    assert len(cache) == 2
+
+
+def test_executor_cache_evicts_in_batches(tmp_path):
+    cache = ExecutorCache(tmp_path / "cache.db")
+    for i in range(250):
+        cache.set(str(i), i)
+    cache.close()
+
+    # more than one batch over the limit
+    cache = ExecutorCache(tmp_path / "cache.db", max_entries=10)
+    cache.set("new", 0)
+
+    assert len(cache) == 10
+    assert cache.get("240", MISS) is MISS
+    assert [cache.get(str(i)) for i in range(241, 250)] == list(range(241, 250))
+    assert cache.get("new") == 0
+
+
+def test_executor_cache_invalid_limits(tmp_path):
+    with pytest.raises(ValueError):
+        ExecutorCache(tmp_path / "cache.db", max_entries=0)
+
+
+def test_get_executor_version():
+    def executor(data):
+        return data
+
+    def other_executor(data):
+        return data * 2
+
+    assert get_executor_version(executor) == get_executor_version(executor)
+    assert get_executor_version(executor) != get_executor_version(other_executor)
+
+
+def test_get_executor_version_includes_constants():
+    def define_executor(prompt):
+        # not defined in a file, so the bytecode is hashed instead of the source
+        namespace = {}
+        exec(f"def executor(data):\n    return {prompt!r} + data", namespace)
+        return namespace["executor"]
+
+    assert get_executor_version(define_executor("Answer briefly")) != (
+        get_executor_version(define_executor("Answer in detail"))
+    )
@@ -0,0 +1,76 @@
+import threading
+import time
+
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from lmnr import InstrumentedThreadPoolExecutor, Laminar
+from lmnr.openllmetry_sdk.tracing.counters import _span_counters
+from lmnr.sdk.executors import register_executor_metrics
+
+
+def test_executor_queue_wait_and_run_time(exporter: InMemorySpanExporter):
+    executor = InstrumentedThreadPoolExecutor(max_workers=1)
+    with Laminar.start_as_current_span("test"):
+        futures = [executor.submit(time.sleep, 0.05) for _ in range(2)]
+        for future in futures:
+            future.result()
+    executor.shutdown()
+
+    spans = exporter.get_finished_spans()
+    assert len(spans) == 1
+    attributes = spans[0].attributes
+    assert attributes["lmnr.span.values.executor.run_ms.count"] == 2
+    assert attributes["lmnr.span.values.executor.run_ms.min"] >= 50
+    assert attributes["lmnr.span.values.executor.queue_wait_ms.count"] == 2
+    # the second task waits for the first one to finish
+    assert attributes["lmnr.span.values.executor.queue_wait_ms.max"] >= 40
+
+
+def test_executor_span_ends_before_task(exporter: InMemorySpanExporter):
+    executor = InstrumentedThreadPoolExecutor(max_workers=1)
+    with Laminar.start_as_current_span("test"):
+        future = executor.submit(time.sleep, 0.2)
+    future.result()
+    executor.shutdown()
+
+    # the task doesn't recreate the counters of the ended span
+    assert _span_counters == {}
+    [span] = exporter.get_finished_spans()
+    assert "lmnr.span.values.executor.run_ms.count" not in span.attributes
+
+
+def test_executor_stats_and_metrics():
+    reader = InMemoryMetricReader()
+    register_executor_metrics(MeterProvider(metric_readers=[reader]).get_meter("test"))
+    executor = InstrumentedThreadPoolExecutor(max_workers=2, name="test-pool")
+    release = threading.Event()
+    futures = [executor.submit(release.wait) for _ in range(3)]
+    while executor.stats()["running"] < 2:
+        time.sleep(0.001)
+
+    assert executor.stats() == {
+        "max_workers": 2,
+        "running": 2,
+        "queued": 1,
+        "utilization": 1.0,
+    }
+    points = {
+        metric.name: point
+        for resource_metrics in reader.get_metrics_data().resource_metrics
+        for scope_metrics in resource_metrics.scope_metrics
+        for metric in scope_metrics.metrics
+        for point in metric.data.data_points
+        if point.attributes["executor.name"] == "test-pool"
+    }
+    assert points["lmnr.executor.running"].value == 2
+    assert points["lmnr.executor.queued"].value == 1
+    assert points["lmnr.executor.utilization"].value == 1.0
+
+    release.set()
+    for future in futures:
+        future.result()
+    executor.shutdown()
+    assert executor.stats()["running"] == 0
+    assert executor.stats()["queued"] == 0
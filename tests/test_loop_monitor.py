@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import pytest
+
+from opentelemetry.sdk.trace import TracerProvider
+
+from lmnr.openllmetry_sdk.tracing.loop_monitor import LoopLagMonitor
+
+
+def _block(seconds: float):
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor():
+    tracer = TracerProvider().get_tracer("test")
+    monitor = LoopLagMonitor(threshold_seconds=0.05)
+    monitor.start()
+    try:
+        span = tracer.start_span("test")
+        monitor.on_start(span)
+        await asyncio.sleep(0.1)
+        _block(0.3)
+        await asyncio.sleep(0.1)
+        span.end()
+        attributes = monitor.on_end(span)
+    finally:
+        monitor.shutdown()
+
+    assert attributes["lmnr.span.event_loop_lag.max_ms"] >= 200
+    assert (
+        attributes["lmnr.span.event_loop_lag.total_ms"]
+        >= attributes["lmnr.span.event_loop_lag.max_ms"]
+    )
+    [event] = [e for e in span.events if e.name == "event_loop_blocked"]
+    assert event.attributes["duration_ms"] >= 200
+    assert "_block" in event.attributes["stack"]
+    assert monitor._span_loops == {}
+
+
+def test_loop_lag_monitor_no_loop():
+    tracer = TracerProvider().get_tracer("test")
+    monitor = LoopLagMonitor()
+    span = tracer.start_span("test")
+    monitor.on_start(span)
+    span.end()
+    assert monitor.on_end(span) == {}
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_shutdown():
+    tracer = TracerProvider().get_tracer("test")
+    monitor = LoopLagMonitor(threshold_seconds=0.02)
+    monitor.start()
+    span = tracer.start_span("test")
+    monitor.on_start(span)
+    heartbeats = 0
+    heartbeat = monitor._heartbeat
+
+    def counting_heartbeat(state):
+        nonlocal heartbeats
+        heartbeats += 1
+        heartbeat(state)
+
+    monitor._heartbeat = counting_heartbeat
+    await asyncio.sleep(0.05)
+    monitor.shutdown()
+    assert monitor._loops == {}
+    assert monitor._span_loops == {}
+
+    # the heartbeat that was already scheduled runs once more, then stops
+    await asyncio.sleep(0.05)
+    heartbeats_after_shutdown = heartbeats
+    await asyncio.sleep(0.05)
+    assert heartbeats == heartbeats_after_shutdown
+    span.end()
+    assert monitor.on_end(span) == {}
@@ -0,0 +1,108 @@
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.trace import Status, StatusCode
+
+from lmnr import Attributes
+from lmnr.openllmetry_sdk.tracing.metrics import LLMMetricsSpanProcessor
+
+
+def _get_metrics(reader: InMemoryMetricReader) -> dict:
+    metrics = {}
+    metrics_data = reader.get_metrics_data()
+    if metrics_data is None:
+        return metrics
+    for resource_metrics in metrics_data.resource_metrics:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                metrics[metric.name] = metric.data.data_points
+    return metrics
+
+
+def _setup():
+    reader = InMemoryMetricReader()
+    meter_provider = MeterProvider(metric_readers=[reader])
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(
+        LLMMetricsSpanProcessor(meter_provider.get_meter("test"))
+    )
+    return reader, tracer_provider.get_tracer("test")
+
+
+def test_llm_span_metrics():
+    reader, tracer = _setup()
+    for _ in range(2):
+        with tracer.start_as_current_span(
+            "openai.chat",
+            attributes={
+                Attributes.PROVIDER.value: "openai",
+                Attributes.REQUEST_MODEL.value: "gpt-4o",
+                Attributes.INPUT_TOKEN_COUNT.value: 10,
+                Attributes.OUTPUT_TOKEN_COUNT.value: 5,
+                Attributes.TOTAL_COST.value: 0.5,
+                "lmnr.association.properties.user_id": "user",
+                "lmnr.association.properties.session_id": "session",
+                "lmnr.association.properties.metadata.request": "1",
+                "lmnr.association.properties.trace_type": "DEFAULT",
+            },
+        ):
+            pass
+
+    metrics = _get_metrics(reader)
+
+    token_points = {
+        point.attributes["gen_ai.token.type"]: point
+        for point in metrics["gen_ai.client.token.usage"]
+    }
+    assert token_points["input"].sum == 20
+    assert token_points["input"].count == 2
+    assert token_points["output"].sum == 10
+
+    [cost_point] = metrics["lmnr.llm.cost"]
+    assert cost_point.value == 1.0
+    assert cost_point.attributes == {
+        "gen_ai.system": "openai",
+        "gen_ai.request.model": "gpt-4o",
+        "lmnr.association.properties.trace_type": "DEFAULT",
+    }
+
+    [duration_point] = metrics["gen_ai.client.operation.duration"]
+    assert duration_point.count == 2
+
+
+def test_llm_span_metrics_error_and_partial_cost():
+    reader, tracer = _setup()
+    with tracer.start_as_current_span(
+        "llm",
+        attributes={
+            "lmnr.span.type": "LLM",
+            Attributes.INPUT_COST.value: 0.25,
+            Attributes.OUTPUT_COST.value: 0.5,
+        },
+    ) as span:
+        span.set_status(Status(StatusCode.ERROR, "Rate limit of 10 RPM reached"))
+    try:
+        with tracer.start_as_current_span(
+            "llm",
+            attributes={"lmnr.span.type": "LLM", Attributes.TOTAL_COST.value: 1.0},
+        ):
+            raise ValueError("Request 1234 failed")
+    except ValueError:
+        pass
+
+    metrics = _get_metrics(reader)
+    cost_points = {
+        point.attributes["error.type"]: point.value
+        for point in metrics["lmnr.llm.cost"]
+    }
+    # free-text status descriptions are not used as metric attributes
+    assert cost_points == {"error": 0.75, "ValueError": 1.0}
+    assert "gen_ai.client.token.usage" not in metrics
+
+
+def test_non_llm_span_metrics():
+    reader, tracer = _setup()
+    with tracer.start_as_current_span("tool", attributes={"lmnr.span.type": "TOOL"}):
+        pass
+
+    assert _get_metrics(reader) == {}
@@ -1,8 +1,11 @@
 import json
 import pytest
 
-from lmnr import observe
+from lmnr import Laminar, observe, TracingLevel, use_span
+from opentelemetry import trace
 from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.sdk.trace.id_generator import RandomIdGenerator
+from opentelemetry.trace import NonRecordingSpan, SpanContext, TraceFlags
 
 
 def test_observe(exporter: InMemorySpanExporter):
@@ -169,3 +172,209 @@ def test_observe_nested(exporter: InMemorySpanExporter):
 
     assert foo_span.attributes["lmnr.span.instrumentation_source"] == "python"
     assert bar_span.attributes["lmnr.span.instrumentation_source"] == "python"
+
+
+def test_observe_tracing_level_off(exporter: InMemorySpanExporter):
+    @observe()
+    def observed_foo():
+        return "foo"
+
+    with Laminar.set_tracing_level(TracingLevel.OFF):
+        result = observed_foo()
+
+    assert result == "foo"
+    assert len(exporter.get_finished_spans()) == 0
+
+
+def test_observe_unsampled_trace(exporter: InMemorySpanExporter):
+    @observe()
+    def observed_foo():
+        return "foo"
+
+    unsampled_parent = NonRecordingSpan(
+        SpanContext(
+            trace_id=RandomIdGenerator().generate_trace_id(),
+            span_id=RandomIdGenerator().generate_span_id(),
+            is_remote=False,
+            trace_flags=TraceFlags(TraceFlags.DEFAULT),
+        )
+    )
+    with use_span(unsampled_parent):
+        result = observed_foo()
+
+    assert result == "foo"
+    assert len(exporter.get_finished_spans()) == 0
+
+
+def test_observe_sample_rate(exporter: InMemorySpanExporter):
+    @observe(sample_rate=0)
+    def observed_bar():
+        return "bar"
+
+    @observe()
+    def observed_foo():
+        for _ in range(3):
+            observed_bar()
+        return "foo"
+
+    result = observed_foo()
+    spans = exporter.get_finished_spans()
+
+    assert result == "foo"
+    assert len(spans) == 1
+    assert spans[0].name == "observed_foo"
+    assert spans[0].attributes["lmnr.span.suppressed_calls.observed_bar"] == 3
+
+
+def test_observe_max_per_second(exporter: InMemorySpanExporter):
+    @observe(max_per_second=2)
+    def observed_bar():
+        return "bar"
+
+    @observe()
+    def observed_foo():
+        for _ in range(5):
+            observed_bar()
+
+    observed_foo()
+    spans = exporter.get_finished_spans()
+
+    bar_spans = [span for span in spans if span.name == "observed_bar"]
+    foo_span = [span for span in spans if span.name == "observed_foo"][0]
+    assert len(bar_spans) == 2
+    assert foo_span.attributes["lmnr.span.suppressed_calls.observed_bar"] == 3
+
+
+def test_observe_input_fields(exporter: InMemorySpanExporter):
+    @observe(input_fields=["query", "top_k"])
+    def observed_foo(client, query, documents, top_k=3):
+        return "foo"
+
+    observed_foo(object(), "what is laminar?", ["doc"] * 100, top_k=5)
+    spans = exporter.get_finished_spans()
+    assert len(spans) == 1
+    assert json.loads(spans[0].attributes["lmnr.span.input"]) == {
+        "query": "what is laminar?",
+        "top_k": 5,
+    }
+
+
+def test_observe_input_output_mappers(exporter: InMemorySpanExporter):
+    @observe(
+        input_fields=["documents"],
+        input_mapper=lambda inp: {"num_documents": len(inp["documents"])},
+        output_fields=["answer"],
+        output_mapper=lambda out: out["answer"].upper(),
+    )
+    def observed_foo(query, documents):
+        return {"answer": "foo", "embeddings": [0.1] * 100}
+
+    result = observed_foo("query", ["a", "b"])
+    spans = exporter.get_finished_spans()
+
+    assert result["answer"] == "foo"
+    assert len(spans) == 1
+    assert json.loads(spans[0].attributes["lmnr.span.input"]) == {"num_documents": 2}
+    assert json.loads(spans[0].attributes["lmnr.span.output"]) == "FOO"
+
+
+def test_observe_exception_restores_context(exporter: InMemorySpanExporter):
+    @observe()
+    def observed_foo():
+        raise ValueError("test")
+
+    span_before = trace.get_current_span()
+    with pytest.raises(ValueError):
+        observed_foo()
+
+    assert trace.get_current_span() == span_before
+
+
+def test_observe_profile_cpu(exporter: InMemorySpanExporter):
+    def busy():
+        return sum(i * i for i in range(10_000))
+
+    @observe(profile="cpu")
+    def observed_foo():
+        return busy()
+
+    observed_foo()
+
+    spans = exporter.get_finished_spans()
+    assert len(spans) == 1
+    profile = json.loads(spans[0].attributes["lmnr.span.profile.cpu"])
+    assert 0 < len(profile) <= 20
+    assert any(entry["function"].startswith("busy ") for entry in profile)
+    assert all(
+        entry["cumulative_s"] >= entry["own_s"] and entry["calls"] > 0
+        for entry in profile
+    )
+
+
+def test_observe_profile_memory(exporter: InMemorySpanExporter):
+    @observe(profile="memory")
+    def observed_foo():
+        return [bytearray(1024) for _ in range(100)]
+
+    result = observed_foo()
+
+    spans = exporter.get_finished_spans()
+    profile = json.loads(spans[0].attributes["lmnr.span.profile.memory"])
+    assert profile[0]["size_diff"] >= 100 * 1024
+    assert profile[0]["location"].startswith(__file__)
+    assert spans[0].attributes["lmnr.span.profile.memory.peak_bytes"] >= 100 * 1024
+    assert len(result) == 100
+
+
+def test_observe_profile_nested(exporter: InMemorySpanExporter):
+    @observe(profile="cpu")
+    def inner():
+        return 1
+
+    @observe(profile="cpu")
+    def outer():
+        return inner()
+
+    outer()
+
+    spans = exporter.get_finished_spans()
+    inner_span = [span for span in spans if span.name == "inner"][0]
+    outer_span = [span for span in spans if span.name == "outer"][0]
+    assert "lmnr.span.profile.cpu" in outer_span.attributes
+    assert "lmnr.span.profile.cpu" not in inner_span.attributes
+
+
+def test_observe_profile_sample_rate(exporter: InMemorySpanExporter):
+    @observe(profile="cpu", profile_sample_rate=0.0)
+    def observed_foo():
+        return 1
+
+    observed_foo()
+
+    spans = exporter.get_finished_spans()
+    assert "lmnr.span.profile.cpu" not in spans[0].attributes
+
+
+def test_observe_profile_invalid():
+    with pytest.raises(ValueError):
+        observe(profile="gpu")(lambda: None)
+
+
+def test_observe_profile_unsupported():
+    async def async_foo():
+        return 1
+
+    def generator_foo():
+        yield 1
+
+    async def async_generator_foo():
+        yield 1
+
+    # cProfile would also profile the other tasks of the event loop
+    with pytest.raises(ValueError):
+        observe(profile="cpu")(async_foo)
+    observe(profile="memory")(async_foo)
+    for fn in (generator_foo, async_generator_foo):
+        for profile in ("cpu", "memory"):
+            with pytest.raises(ValueError):
+                observe(profile=profile)(fn)
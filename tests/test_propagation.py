@@ -0,0 +1,178 @@
+import httpx
+import pytest
+import requests
+
+from opentelemetry import baggage, propagate, trace
+from opentelemetry.baggage.propagation import W3CBaggagePropagator
+from opentelemetry.propagators.composite import CompositePropagator
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace.propagation.tracecontext import (
+    TraceContextTextMapPropagator,
+)
+from requests.adapters import BaseAdapter
+
+from lmnr import Laminar
+from lmnr.openllmetry_sdk.tracing.propagation import (
+    HTTPContextPropagationInstrumentor,
+    TraceparentPropagator,
+    _inject_into_kwargs,
+    compose_with_global_textmap,
+)
+
+
+@pytest.fixture
+def propagation():
+    original_textmap = propagate.get_global_textmap()
+    propagate.set_global_textmap(TraceparentPropagator())
+    instrumentor = HTTPContextPropagationInstrumentor()
+    instrumentor.instrument()
+    try:
+        yield
+    finally:
+        instrumentor.uninstrument()
+        propagate.set_global_textmap(original_textmap)
+
+
+class _RecordingAdapter(BaseAdapter):
+    def __init__(self):
+        super().__init__()
+        self.headers = []
+
+    def send(self, request, **kwargs):
+        self.headers.append(dict(request.headers))
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+    def close(self):
+        pass
+
+
+def _traceparent(span: trace.Span) -> str:
+    span_context = span.get_span_context()
+    return (
+        f"00-{span_context.trace_id:032x}-{span_context.span_id:016x}"
+        f"-{span_context.trace_flags:02x}"
+    )
+
+
+def test_httpx_propagation(exporter: InMemorySpanExporter, propagation):
+    sent_headers = []
+
+    def handler(request: httpx.Request):
+        sent_headers.append(request.headers)
+        return httpx.Response(200)
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    with Laminar.start_as_current_span("test") as span:
+        client.get("http://service-b")
+    client.get("http://service-b")
+
+    assert sent_headers[0]["traceparent"] == _traceparent(span)
+    assert sent_headers[1].get("traceparent") != _traceparent(span)
+    # no spans are created for the requests
+    assert len(exporter.get_finished_spans()) == 1
+
+
+@pytest.mark.asyncio
+async def test_httpx_async_propagation(exporter: InMemorySpanExporter, propagation):
+    sent_headers = []
+
+    def handler(request: httpx.Request):
+        sent_headers.append(request.headers)
+        return httpx.Response(200)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        async with Laminar.astart_as_current_span("test") as span:
+            await client.get("http://service-b")
+
+    assert sent_headers[0]["traceparent"] == _traceparent(span)
+
+
+def test_requests_propagation(exporter: InMemorySpanExporter, propagation):
+    adapter = _RecordingAdapter()
+    session = requests.Session()
+    session.mount("http://", adapter)
+    with Laminar.start_as_current_span("test") as span:
+        session.get("http://service-b")
+        # explicitly set headers are kept
+        session.get("http://service-b", headers={"traceparent": "custom"})
+
+    assert adapter.headers[0]["traceparent"] == _traceparent(span)
+    assert adapter.headers[1]["traceparent"] == "custom"
+
+
+def test_traceparent_propagator_extract(exporter: InMemorySpanExporter):
+    with Laminar.start_as_current_span("outer") as span:
+        headers = {}
+        TraceparentPropagator().inject(headers)
+
+    context = TraceparentPropagator().extract(headers)
+    with Laminar.start_as_current_span("inner", context=context):
+        pass
+
+    inner_span = [s for s in exporter.get_finished_spans() if s.name == "inner"][0]
+    assert inner_span.parent.span_id == span.get_span_context().span_id
+    assert inner_span.attributes["lmnr.span.path"] == ("outer", "inner")
+    assert TraceparentPropagator().extract({"traceparent": "invalid"}) == {}
+
+
+def test_compose_with_global_textmap_keeps_baggage():
+    original_textmap = propagate.get_global_textmap()
+    try:
+        propagate.set_global_textmap(
+            CompositePropagator(
+                [TraceContextTextMapPropagator(), W3CBaggagePropagator()]
+            )
+        )
+        textmap = compose_with_global_textmap(TraceparentPropagator())
+    finally:
+        propagate.set_global_textmap(original_textmap)
+
+    span_context = trace.SpanContext(
+        trace_id=0x0AF7651916CD43DD8448EB211C80319C,
+        span_id=0xB7AD6B7169203331,
+        is_remote=True,
+        trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED),
+        trace_state=trace.TraceState([("vendor", "value")]),
+    )
+    context = baggage.set_baggage(
+        "user", "alice", trace.set_span_in_context(trace.NonRecordingSpan(span_context))
+    )
+    headers = {}
+    textmap.inject(headers, context)
+
+    assert headers == {
+        "traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01",
+        "tracestate": "vendor=value",
+        "baggage": "user=alice",
+    }
+    extracted = textmap.extract(headers)
+    assert baggage.get_baggage("user", extracted) == "alice"
+    extracted_span_context = trace.get_current_span(extracted).get_span_context()
+    assert extracted_span_context.trace_id == span_context.trace_id
+    assert extracted_span_context.trace_state == span_context.trace_state
+    # the traceparent propagator replaces the default trace context one
+    assert [type(p) for p in textmap._propagators] == [
+        W3CBaggagePropagator,
+        TraceparentPropagator,
+    ]
+
+
+def test_aiohttp_headers_propagation(exporter: InMemorySpanExporter):
+    multidict = pytest.importorskip("multidict")
+    sent_kwargs = []
+
+    def request(*args, **kwargs):
+        sent_kwargs.append(kwargs)
+
+    headers = multidict.CIMultiDict([("Accept", "text/plain"), ("Accept", "*/*")])
+    with Laminar.start_as_current_span("test") as span:
+        _inject_into_kwargs(request, None, (), {"headers": headers})
+        # explicitly set headers are kept, whatever their case
+        _inject_into_kwargs(request, None, (), {"headers": {"Traceparent": "custom"}})
+
+    assert sent_kwargs[0]["headers"].getall("accept") == ["text/plain", "*/*"]
+    assert sent_kwargs[0]["headers"]["traceparent"] == _traceparent(span)
+    assert "traceparent" not in headers
+    assert list(sent_kwargs[1]["headers"].items()) == [("Traceparent", "custom")]
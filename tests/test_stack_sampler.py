@@ -0,0 +1,63 @@
+import threading
+import time
+
+from opentelemetry.sdk.trace import TracerProvider
+
+from lmnr.openllmetry_sdk.tracing.stack_sampler import StackSampler
+
+
+def _busy(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(i for i in range(100))
+
+
+def test_stack_sampler():
+    tracer = TracerProvider().get_tracer("test")
+    sampler = StackSampler()
+
+    outer = tracer.start_span("outer")
+    sampler.on_start(outer)
+    inner = tracer.start_span("inner")
+    sampler.on_start(inner)
+    for _ in range(5):
+        sampler.sample()
+    inner.end()
+    inner_attributes = sampler.on_end(inner)
+    sampler.sample()
+    outer.end()
+    outer_attributes = sampler.on_end(outer)
+
+    [inner_stack] = inner_attributes["lmnr.span.profile.stacks"]
+    stack, count = inner_stack.rsplit(" ", 1)
+    assert count == "5"
+    assert "test_stack_sampler (test_stack_sampler.py:" in stack
+    [outer_stack] = outer_attributes["lmnr.span.profile.stacks"]
+    assert outer_stack.endswith(" 1")
+    assert sampler._thread_spans == {}
+    assert sampler._samples == {}
+
+
+def test_stack_sampler_thread():
+    tracer = TracerProvider().get_tracer("test")
+    sampler = StackSampler(interval_seconds=0.001)
+    sampler.start()
+    result = {}
+
+    def worker():
+        span = tracer.start_span("worker")
+        sampler.on_start(span)
+        _busy(0.2)
+        span.end()
+        result.update(sampler.on_end(span))
+
+    try:
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+    finally:
+        sampler.shutdown()
+
+    stacks = result["lmnr.span.profile.stacks"]
+    assert any("_busy (" in stack for stack in stacks)
+    assert all(stack.split(";")[0].startswith("_bootstrap (") for stack in stacks)
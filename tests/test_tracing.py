@@ -1,10 +1,14 @@
+import asyncio
 import json
 import pytest
+import time
 import uuid
 
 from lmnr import Attributes, Laminar, observe, TracingLevel, use_span
+from opentelemetry import trace
 from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
 
+from lmnr.openllmetry_sdk.tracing.tracing import TracerWrapper
 from lmnr.sdk.types import LaminarSpanContext
 
 
@@ -490,6 +494,83 @@ def test_span_context_str(exporter: InMemorySpanExporter):
     )
 
 
+def test_span_context_traceparent(exporter: InMemorySpanExporter):
+    def foo(context: str):
+        with Laminar.start_as_current_span("inner", parent_span_context=context):
+            pass
+
+    span = Laminar.start_span("test")
+    traceparent = Laminar.serialize_span_context(span, compact=True)
+    foo(traceparent)
+    span.end()
+
+    spans = exporter.get_finished_spans()
+    assert len(spans) == 2
+    inner_span = [span for span in spans if span.name == "inner"][0]
+    outer_span = [span for span in spans if span.name == "test"][0]
+
+    outer_span_context = outer_span.get_span_context()
+    assert traceparent == (
+        f"00-{outer_span_context.trace_id:032x}-{outer_span_context.span_id:016x}"
+        f"-{outer_span_context.trace_flags:02x}"
+    )
+    assert outer_span_context.trace_flags.sampled
+    assert inner_span.parent.span_id == outer_span_context.span_id
+    assert inner_span.attributes["lmnr.span.path"] == ("test", "inner")
+    assert inner_span.get_span_context().trace_id == outer_span_context.trace_id
+
+    laminar_span_context = Laminar.deserialize_span_context(traceparent)
+    assert laminar_span_context.trace_id.int == outer_span_context.trace_id
+    assert laminar_span_context.span_id.int == outer_span_context.span_id
+    assert laminar_span_context.to_traceparent() == traceparent
+    # the JSON form is still readable
+    json_span_context = Laminar.deserialize_span_context(
+        Laminar.serialize_span_context(span)
+    )
+    assert json_span_context.trace_id == laminar_span_context.trace_id
+    assert json_span_context.span_id == laminar_span_context.span_id
+
+
+def test_span_context_traceparent_unsampled(exporter: InMemorySpanExporter):
+    span = trace.NonRecordingSpan(
+        trace.SpanContext(
+            trace_id=0x0AF7651916CD43DD8448EB211C80319C,
+            span_id=0xB7AD6B7169203331,
+            is_remote=False,
+            trace_flags=trace.TraceFlags(trace.TraceFlags.DEFAULT),
+        )
+    )
+    traceparent = Laminar.serialize_span_context(span, compact=True)
+    assert traceparent == "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-00"
+
+    laminar_span_context = Laminar.deserialize_span_context(traceparent)
+    assert laminar_span_context.to_traceparent() == traceparent
+    assert Laminar.get_laminar_span_context(span).to_traceparent() == traceparent
+
+    # spans continuing an unsampled trace are not recorded either
+    for parent_span_context in (traceparent, laminar_span_context):
+        with Laminar.start_as_current_span(
+            "inner", parent_span_context=parent_span_context
+        ) as inner_span:
+            assert not inner_span.get_span_context().trace_flags.sampled
+    assert exporter.get_finished_spans() == ()
+
+
+@pytest.mark.parametrize(
+    "traceparent",
+    [
+        "00-00000000000000000000000000000000-b7ad6b7169203331-01",
+        "00-0af7651916cd43dd8448eb211c80319c-0000000000000000-01",
+        "ff-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01",
+        "00-0af7651916cd43dd8448eb211c80319g-b7ad6b7169203331-01",
+        "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01-extra",
+    ],
+)
+def test_span_context_invalid_traceparent(traceparent: str):
+    with pytest.raises(ValueError):
+        LaminarSpanContext.try_to_otel_span_context(traceparent)
+
+
 def test_span_context_ended_span(exporter: InMemorySpanExporter):
     # TODO: check with opentelemetry standards if we should allow this
     def foo(context: LaminarSpanContext):
@@ -564,3 +645,303 @@ def test_span_context_dict_fallback(exporter: InMemorySpanExporter):
     assert (
         inner_span.get_span_context().trace_id == outer_span.get_span_context().trace_id
     )
+
+
+def test_rollup(exporter: InMemorySpanExporter):
+    @observe()
+    def rerank(document: str):
+        if document == "bad":
+            raise ValueError("bad document")
+        return document
+
+    with Laminar.start_as_current_span("outer"):
+        with Laminar.rollup("rerank", max_sampled_inputs=2):
+            for document in ["a", "b", "c", "bad"]:
+                try:
+                    rerank(document)
+                except ValueError:
+                    pass
+
+    spans = exporter.get_finished_spans()
+    assert len(spans) == 2
+    outer_span = [span for span in spans if span.name == "outer"][0]
+    rollup_span = [span for span in spans if span.name == "rerank"][0]
+
+    assert rollup_span.parent.span_id == outer_span.get_span_context().span_id
+    assert rollup_span.attributes["lmnr.span.path"] == ("outer", "rerank")
+    assert rollup_span.attributes["lmnr.rollup.count"] == 4
+    assert rollup_span.attributes["lmnr.rollup.error_count"] == 1
+    assert (
+        rollup_span.attributes["lmnr.rollup.duration_ns.min"]
+        <= rollup_span.attributes["lmnr.rollup.duration_ns.p95"]
+        <= rollup_span.attributes["lmnr.rollup.duration_ns.max"]
+        <= rollup_span.attributes["lmnr.rollup.duration_ns.total"]
+    )
+    assert [
+        json.loads(inp) for inp in rollup_span.attributes["lmnr.rollup.sampled_inputs"]
+    ] == [{"document": "a"}, {"document": "b"}]
+
+
+def test_rollup_generator(exporter: InMemorySpanExporter):
+    @observe()
+    def stream(items: int):
+        for i in range(items):
+            time.sleep(0.01)
+            if i == 3:
+                raise ValueError("stream failed")
+            yield i
+
+    with Laminar.start_as_current_span("outer"):
+        with Laminar.rollup("stream"):
+            assert list(stream(2)) == [0, 1]
+            with pytest.raises(ValueError):
+                list(stream(5))
+
+    spans = exporter.get_finished_spans()
+    rollup_span = [span for span in spans if span.name == "stream"][0]
+    assert rollup_span.attributes["lmnr.rollup.count"] == 2
+    # errors raised while the generator is consumed are counted
+    assert rollup_span.attributes["lmnr.rollup.error_count"] == 1
+    # measured until the generator is exhausted, not only its creation
+    assert rollup_span.attributes["lmnr.rollup.duration_ns.min"] >= 20_000_000
+
+
+def test_rollup_start_as_current_span(exporter: InMemorySpanExporter):
+    with Laminar.start_as_current_span("outer"):
+        with Laminar.rollup("tool"):
+            for i in range(10):
+                with Laminar.start_as_current_span("tool", input=i):
+                    Laminar.set_span_output(i)
+            with Laminar.start_as_current_span("other"):
+                pass
+
+    spans = exporter.get_finished_spans()
+    assert len(spans) == 3
+    outer_span = [span for span in spans if span.name == "outer"][0]
+    rollup_span = [span for span in spans if span.name == "tool"][0]
+    other_span = [span for span in spans if span.name == "other"][0]
+
+    assert rollup_span.attributes["lmnr.rollup.count"] == 10
+    assert rollup_span.attributes["lmnr.rollup.sampled_inputs"] == ("0", "1", "2")
+    assert "lmnr.span.output" not in outer_span.attributes
+    assert other_span.attributes["lmnr.span.path"] == ("outer", "other")
+
+
+@pytest.mark.asyncio
+async def test_astart_as_current_span(exporter: InMemorySpanExporter):
+    @observe()
+    async def inner():
+        await asyncio.sleep(0)
+        return "inner"
+
+    span_before = trace.get_current_span()
+    async with Laminar.astart_as_current_span("test", input="my_input"):
+        await inner()
+        Laminar.set_span_output("foo")
+
+    spans = exporter.get_finished_spans()
+    assert len(spans) == 2
+    outer_span = [span for span in spans if span.name == "test"][0]
+    inner_span = [span for span in spans if span.name == "inner"][0]
+    assert json.loads(outer_span.attributes["lmnr.span.input"]) == "my_input"
+    assert json.loads(outer_span.attributes["lmnr.span.output"]) == "foo"
+    assert outer_span.attributes["lmnr.span.path"] == ("test",)
+    assert inner_span.attributes["lmnr.span.path"] == ("test", "inner")
+    assert trace.get_current_span() == span_before
+
+
+@pytest.mark.asyncio
+async def test_astart_as_current_span_exception(exporter: InMemorySpanExporter):
+    span_before = trace.get_current_span()
+    with pytest.raises(ValueError):
+        async with Laminar.astart_as_current_span(
+            "test", input="my_input", offload_input_serialization=True
+        ):
+            raise ValueError("error")
+
+    spans = exporter.get_finished_spans()
+    assert len(spans) == 1
+    assert json.loads(spans[0].attributes["lmnr.span.input"]) == "my_input"
+    assert spans[0].status.status_code == trace.StatusCode.ERROR
+    events = spans[0].events
+    assert len(events) == 1
+    assert events[0].name == "exception"
+    assert events[0].attributes["exception.type"] == "ValueError"
+    assert trace.get_current_span() == span_before
+
+
+@pytest.mark.asyncio
+async def test_astart_as_current_span_concurrent_tasks(
+    exporter: InMemorySpanExporter,
+):
+    async def task(name: str):
+        async with Laminar.astart_as_current_span(name):
+            await asyncio.sleep(0.01)
+            async with Laminar.astart_as_current_span(f"{name}_child"):
+                await asyncio.sleep(0.01)
+
+    async with Laminar.astart_as_current_span("outer"):
+        await asyncio.gather(task("a"), task("b"))
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    assert len(spans) == 5
+    for name in ["a", "b"]:
+        assert spans[f"{name}_child"].parent.span_id == spans[name].context.span_id
+        assert spans[name].parent.span_id == spans["outer"].context.span_id
+        assert spans[f"{name}_child"].attributes["lmnr.span.path"] == (
+            "outer",
+            name,
+            f"{name}_child",
+        )
+
+
+def test_record_spans(exporter: InMemorySpanExporter):
+    with Laminar.start_as_current_span("outer") as outer_span:
+        span_contexts = Laminar.record_spans(
+            [
+                {"name": "batch", "start_time": 1_000, "end_time": 4_000},
+                {
+                    "name": "item",
+                    "start_time": 1_000,
+                    "end_time": 2_000,
+                    "input": {"x": 1},
+                    "output": 2,
+                    "parent": 0,
+                },
+                {
+                    "name": "item",
+                    "start_time": 2_000,
+                    "end_time": 4_000,
+                    "span_type": "TOOL",
+                    "error": "failed",
+                    "parent": 0,
+                },
+            ]
+        )
+
+    spans = exporter.get_finished_spans()
+    assert len(spans) == 4
+    batch_span, item_span, failed_span = spans[:3]
+    outer_span_id = outer_span.get_span_context().span_id
+
+    assert [span_context.span_id.int for span_context in span_contexts] == [
+        span.get_span_context().span_id for span in spans[:3]
+    ]
+    assert batch_span.parent.span_id == outer_span_id
+    assert batch_span.start_time == 1_000
+    assert batch_span.end_time == 4_000
+    assert item_span.parent.span_id == batch_span.get_span_context().span_id
+    assert item_span.attributes["lmnr.span.path"] == ("outer", "batch", "item")
+    assert item_span.attributes["lmnr.span.ids_path"] == (
+        str(uuid.UUID(int=outer_span_id)),
+        str(uuid.UUID(int=batch_span.get_span_context().span_id)),
+        str(uuid.UUID(int=item_span.get_span_context().span_id)),
+    )
+    assert json.loads(item_span.attributes["lmnr.span.input"]) == {"x": 1}
+    assert json.loads(item_span.attributes["lmnr.span.output"]) == 2
+    assert failed_span.attributes["lmnr.span.type"] == "TOOL"
+    assert failed_span.status.status_code == trace.StatusCode.ERROR
+    assert failed_span.status.description == "failed"
+    assert all(
+        span.get_span_context().trace_id == outer_span.get_span_context().trace_id
+        for span in spans
+    )
+
+
+def test_record_spans_invalid_parent(exporter: InMemorySpanExporter):
+    with pytest.raises(ValueError):
+        Laminar.record_spans(
+            [{"name": "item", "start_time": 1_000, "end_time": 2_000, "parent": 0}]
+        )
+    assert len(exporter.get_finished_spans()) == 0
+
+
+def test_count_and_observe_value(exporter: InMemorySpanExporter):
+    with Laminar.start_as_current_span("test"):
+        for _ in range(1000):
+            Laminar.count("cache_hit")
+        Laminar.count("retries", 2)
+        for value in [3, 7, 30, 20_000]:
+            Laminar.observe_value("latency_ms", value)
+
+    spans = exporter.get_finished_spans()
+    assert len(spans) == 1
+    attributes = spans[0].attributes
+    assert len(spans[0].events) == 0
+    assert attributes["lmnr.span.counters.cache_hit"] == 1000
+    assert attributes["lmnr.span.counters.retries"] == 2
+    assert attributes["lmnr.span.values.latency_ms.count"] == 4
+    assert attributes["lmnr.span.values.latency_ms.sum"] == 20_040
+    assert attributes["lmnr.span.values.latency_ms.min"] == 3
+    assert attributes["lmnr.span.values.latency_ms.max"] == 20_000
+    buckets = attributes["lmnr.span.values.latency_ms.buckets"]
+    bounds = attributes["lmnr.span.values.latency_ms.bucket_bounds"]
+    assert len(buckets) == len(bounds) + 1
+    assert sum(buckets) == 4
+    assert buckets[1] == 1  # (0, 5]
+    assert buckets[2] == 1  # (5, 10]
+    assert buckets[-1] == 1  # > 10000
+
+
+def test_count_nested_spans(exporter: InMemorySpanExporter):
+    with Laminar.start_as_current_span("outer"):
+        Laminar.count("calls")
+        with Laminar.start_as_current_span("inner"):
+            Laminar.count("calls", 5)
+
+    Laminar.count("calls")  # outside of span context, ignored
+
+    spans = exporter.get_finished_spans()
+    inner_span = [span for span in spans if span.name == "inner"][0]
+    outer_span = [span for span in spans if span.name == "outer"][0]
+    assert inner_span.attributes["lmnr.span.counters.calls"] == 5
+    assert outer_span.attributes["lmnr.span.counters.calls"] == 1
+    assert outer_span.attributes["lmnr.span.path"] == ("outer",)
+
+
+def test_trace_usage(exporter: InMemorySpanExporter):
+    llm_attributes = {
+        Attributes.PROVIDER: "openai",
+        Attributes.REQUEST_MODEL: "gpt-4o",
+        Attributes.INPUT_TOKEN_COUNT: 100,
+        Attributes.OUTPUT_TOKEN_COUNT: 20,
+        Attributes.TOTAL_COST: 0.5,
+    }
+    with Laminar.start_as_current_span("agent"):
+        for _ in range(2):
+            with Laminar.start_as_current_span("llm", span_type="LLM"):
+                Laminar.set_span_attributes(llm_attributes)
+        with Laminar.start_as_current_span("tool", span_type="TOOL"):
+            pass
+        usage = Laminar.get_current_trace_usage()
+
+    assert usage.input_tokens == 200
+    assert usage.output_tokens == 40
+    assert usage.total_tokens == 240
+    assert usage.cost == 1.0
+    assert usage.llm_calls == 2
+    assert usage.tool_calls == 1
+
+    spans = exporter.get_finished_spans()
+    root_span = [span for span in spans if span.name == "agent"][0]
+    assert root_span.attributes["lmnr.trace.usage.input_tokens"] == 200
+    assert root_span.attributes["lmnr.trace.usage.output_tokens"] == 40
+    assert root_span.attributes["lmnr.trace.usage.cost"] == 1.0
+    assert root_span.attributes["lmnr.trace.usage.llm_calls"] == 2
+    assert root_span.attributes["lmnr.trace.usage.tool_calls"] == 1
+    llm_span = [span for span in spans if span.name == "llm"][0]
+    assert "lmnr.trace.usage.input_tokens" not in llm_span.attributes
+
+    # the accumulator is evicted when the root span ends
+    assert TracerWrapper().get_trace_usage(root_span.context.trace_id) is None
+
+
+def test_start_as_current_span_profile(exporter: InMemorySpanExporter):
+    with Laminar.start_as_current_span("test", profile="memory"):
+        data = [bytearray(1024) for _ in range(100)]
+
+    spans = exporter.get_finished_spans()
+    assert len(spans) == 1
+    profile = json.loads(spans[0].attributes["lmnr.span.profile.memory"])
+    assert profile[0]["size_diff"] >= 100 * 1024
+    assert len(data) == 100
@@ -0,0 +1,189 @@
+import asyncio
+import gzip
+import httpx
+import json
+import pytest
+import uuid
+
+from lmnr.sdk.client.asynchronous.resources.evals import AsyncEvals
+from lmnr.sdk.types import EvaluationResultDatapoint, PartialEvaluationDatapoint
+from lmnr.sdk.uploader import DatapointUploader
+
+
+class StubServer:
+    """Handles `save_datapoints` requests with an optional delay per request."""
+
+    def __init__(self, latency_seconds: float = 0, status_code: int = 200):
+        self.latency_seconds = latency_seconds
+        self.status_code = status_code
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency_seconds)
+            body = request.content
+            if request.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            self.requests.append(json.loads(body))
+            return httpx.Response(self.status_code, text="error")
+        finally:
+            self.in_flight -= 1
+
+    def points(self) -> list[dict]:
+        return [point for request in self.requests for point in request["points"]]
+
+
+def make_evals(server: StubServer) -> AsyncEvals:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(server.handle))
+    return AsyncEvals(client, "http://localhost", "test_key")
+
+
+def make_partial(index: int) -> PartialEvaluationDatapoint:
+    return PartialEvaluationDatapoint(
+        id=uuid.uuid4(),
+        data={"index": index},
+        target=None,
+        index=index,
+        trace_id=uuid.uuid4(),
+        executor_span_id=uuid.uuid4(),
+    )
+
+
+def make_result(partial: PartialEvaluationDatapoint) -> EvaluationResultDatapoint:
+    return EvaluationResultDatapoint(
+        id=partial.id,
+        data=partial.data,
+        target=partial.target,
+        executor_output="output",
+        scores={"score": 1},
+        trace_id=partial.trace_id,
+        executor_span_id=partial.executor_span_id,
+        index=partial.index,
+    )
+
+
+@pytest.mark.asyncio
+async def test_uploader_batches_by_size():
+    server = StubServer()
+    uploader = DatapointUploader(
+        make_evals(server), uuid.uuid4(), max_batch_size=10, flush_interval_ms=10_000
+    )
+    for i in range(25):
+        await uploader.put(make_partial(i))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    # two full batches are sent right away, the rest waits for the interval
+    assert len(server.requests) == 2
+
+    await uploader.flush()
+    assert [len(request["points"]) for request in server.requests] == [10, 10, 5]
+    assert [point["index"] for point in server.points()] == list(range(25))
+
+
+@pytest.mark.asyncio
+async def test_uploader_flushes_by_interval():
+    server = StubServer()
+    uploader = DatapointUploader(
+        make_evals(server), uuid.uuid4(), max_batch_size=100, flush_interval_ms=20
+    )
+    sent = await uploader.put(make_partial(0))
+    await uploader.put(make_partial(1))
+
+    await asyncio.wait_for(sent, timeout=1)
+    assert len(server.requests) == 1
+    assert len(server.requests[0]["points"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_uploader_max_in_flight():
+    server = StubServer(latency_seconds=0.02)
+    uploader = DatapointUploader(
+        make_evals(server), uuid.uuid4(), max_batch_size=1, max_in_flight=2
+    )
+    for i in range(6):
+        await uploader.put(make_partial(i))
+    await uploader.flush()
+
+    assert len(server.requests) == 6
+    assert server.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_uploader_sends_partial_before_result():
+    server = StubServer(latency_seconds=0.02)
+    uploader = DatapointUploader(
+        make_evals(server), uuid.uuid4(), max_batch_size=1, max_in_flight=4
+    )
+    partial = make_partial(0)
+    await uploader.put(partial)
+    await uploader.put(make_result(partial))
+    await uploader.flush()
+
+    assert [len(request["points"]) for request in server.requests] == [1, 1]
+    assert "executorOutput" not in server.requests[0]["points"][0]
+    assert "executorOutput" in server.requests[1]["points"][0]
+
+
+@pytest.mark.asyncio
+async def test_uploader_partial_and_result_in_one_batch():
+    server = StubServer()
+    uploader = DatapointUploader(make_evals(server), uuid.uuid4())
+    partial = make_partial(0)
+    await uploader.put(partial)
+    await uploader.put(make_result(partial))
+    await asyncio.wait_for(uploader.flush(), timeout=1)
+
+    assert len(server.requests) == 1
+    points = server.requests[0]["points"]
+    assert "executorOutput" not in points[0]
+    assert "executorOutput" in points[1]
+
+
+@pytest.mark.asyncio
+async def test_uploader_flush_raises_errors():
+    server = StubServer(status_code=500)
+    uploader = DatapointUploader(make_evals(server), uuid.uuid4())
+    sent = await uploader.put(make_partial(0))
+
+    with pytest.raises(ValueError):
+        await uploader.flush()
+    assert sent.done()
+    # errors are only raised once
+    await uploader.flush()
+
+
+@pytest.mark.asyncio
+async def test_uploader_put_raises_errors():
+    server = StubServer(status_code=500)
+    uploader = DatapointUploader(make_evals(server), uuid.uuid4(), max_batch_size=1)
+    sent = await uploader.put(make_partial(0))
+    await sent
+
+    with pytest.raises(ValueError):
+        await uploader.put(make_partial(1))
+
+
+@pytest.mark.asyncio
+async def test_uploader_backpressure():
+    server = StubServer(latency_seconds=0.05)
+    uploader = DatapointUploader(
+        make_evals(server),
+        uuid.uuid4(),
+        max_batch_size=1,
+        max_in_flight=1,
+        max_queue_size=2,
+    )
+    first = await uploader.put(make_partial(0))
+    await uploader.put(make_partial(1))
+    third = asyncio.ensure_future(uploader.put(make_partial(2)))
+    await asyncio.sleep(0.01)
+    assert not third.done()
+
+    await first
+    await asyncio.wait_for(third, timeout=1)
+    await uploader.flush()
+    assert len(server.points()) == 3